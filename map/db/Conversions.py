@@ -0,0 +1,120 @@
+from datetime import date, datetime, time
+import os
+import re
+
+_NUMBER = re.compile(r"[-+]?[0-9]*\.?[0-9]+")
+_RESOLUTION = re.compile(r"(\d+)\s*[xX×]\s*(\d+)")
+
+
+def parse_number(value):
+    """
+    Convert a metadata field to float.
+
+    Plain numbers take the fast ``float()`` path; the regex is only used for
+    values with units or other text around the number ("400 mm").
+
+    Args:
+        value: Raw value (number, string or None).
+
+    Returns:
+        float or None: Parsed number, or None if there is none.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        match = _NUMBER.search(str(value))
+        return float(match.group()) if match else None
+
+
+def parse_resolution(value):
+    """
+    Split a resolution string such as "8256 x 5504 pixels" into integers.
+
+    Args:
+        value (str): Raw resolution text.
+
+    Returns:
+        tuple[int | None, int | None]: ``(width, height)``.
+    """
+    match = _RESOLUTION.search(value) if value else None
+    if not match:
+        return None, None
+    return int(match.group(1)), int(match.group(2))
+
+
+def date_to_int(value):
+    """
+    Encode a date as a sortable YYYYMMDD integer.
+
+    Args:
+        value (date | str): Date object or ISO / dotted date string.
+
+    Returns:
+        int or None: Encoded date.
+    """
+    if value is None:
+        return None
+    if isinstance(value, (date, datetime)):
+        return value.year * 10000 + value.month * 100 + value.day
+    digits = re.sub(r"\D", "", str(value)[:10])
+    return int(digits) if len(digits) == 8 else None
+
+
+def time_to_seconds(value):
+    """
+    Encode a time of day as seconds since midnight.
+
+    Args:
+        value (time | str | int): Time object, "HH:MM:SS[.ffffff]" string, or
+            a value already in seconds.
+
+    Returns:
+        int or None: Seconds since midnight.
+    """
+    if value is None:
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, (time, datetime)):
+        return value.hour * 3600 + value.minute * 60 + value.second
+    try:
+        hours, minutes, seconds = str(value).replace(" GMT", "").split(":")
+        return int(hours) * 3600 + int(minutes) * 60 + int(float(seconds))
+    except ValueError:
+        return None
+
+
+def storage_fields(nasa_id, path, file_size=None):
+    """
+    Storage columns (mission, file_format, file_size) for one record.
+
+    Args:
+        nasa_id (str): NASA identifier; the mission is the part before the
+            first "-" ("ISS073-E-122523" -> "ISS073").
+        path (str): Stored file path; its extension gives the format.
+        file_size (int, optional): Size in bytes, as measured at ingest.
+
+    Returns:
+        dict: Column values for Image.
+    """
+    extension = os.path.splitext(path)[1] if path else ""
+    return {
+        "mission": nasa_id.split("-")[0] if nasa_id else None,
+        "file_format": extension[1:].lower() or None,
+        "file_size": file_size,
+    }
+
+
+def typed_image_fields(resolution, date_value, time_value):
+    """Typed Image columns (width, height, date_int, time_sec) for one record."""
+    width, height = parse_resolution(resolution)
+    return {
+        "width": width,
+        "height": height,
+        "date_int": date_to_int(date_value),
+        "time_sec": time_to_seconds(time_value),
+    }
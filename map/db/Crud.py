@@ -1,52 +1,203 @@
-from sqlalchemy import create_engine, case
+from sqlalchemy import bindparam, delete, func, select, text, tuple_, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 from sqlalchemy.orm import sessionmaker
+from db.Conversions import (
+    parse_number,
+    storage_fields,
+    time_to_seconds,
+    typed_image_fields,
+)
+from db.Engine import SQLITE_MAX_VARIABLES, get_engine
+from db.ExistenceIndex import notify_deleted, notify_inserted
+from db.ReadCache import bump_generation, get_read_cache
 from db.Tables import (
-    Base,
     Image,
     ImageDetails,
     MapLocation,
     CameraInformation,
-    Metadatos,
+    Catalog,
+    SEARCH_COLUMNS,
+    SEARCH_INDEX,
+    BULK_LOAD_TABLE,
+    catalog_insert_sql,
+    catalog_order,
+    refresh_derived_sql,
+    search_index_table,
+    spatial_index_table,
 )
+from concurrent.futures import ThreadPoolExecutor
+import functools
 import os
+import re
+import shutil
 import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 from map.routes import DB_URL
 
+# Bounded thread pool size for file removal and moves in batch mutations.
+FILE_WORKERS = 16
+
+# UI column names (Catalog) searchable through the FTS5 index.
+SEARCH_FIELDS = {
+    "NASA_ID": "nasa_id",
+    "LUGAR": "features",
+    "CAMARA": "camera",
+    "FORMATO": "format",
+}
+
+
+def _fts_query(term, column=None):
+    """
+    Turn free text into a safe FTS5 query: every word becomes a quoted
+    prefix match, so punctuation in NASA IDs or camera names is never
+    parsed as FTS syntax.
+    """
+    words = [w for w in re.split(r"\s+", term.strip()) if w]
+    if not words:
+        return None
+    query = " ".join('"{}"*'.format(w.replace('"', '""')) for w in words)
+    if column:
+        query = f"{{{column}}} : ({query})"
+    return query
+
+
+# Grouping keys accepted by MetadataCRUD.storage_stats().
+STORAGE_GROUPS = {
+    "year": Image.date_int // 10000,
+    "mission": Image.mission,
+    "camera": CameraInformation.camera,
+    "format": Image.file_format,
+}
+
+
+def cached_read(method):
+    """
+    Serve a read method from the instance's ReadCache, keyed by method name
+    and arguments. Calls with unhashable arguments bypass the cache.
+    """
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.read_cache is None:
+            return method(self, *args, **kwargs)
+        key = (method.__name__, args, tuple(sorted(kwargs.items())))
+        try:
+            hash(key)
+        except TypeError:
+            return method(self, *args, **kwargs)
+        return self.read_cache.get_or_load(
+            key, lambda: method(self, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def _chunks(items, size=SQLITE_MAX_VARIABLES):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def remove_file(path):
+    """Delete ``path``; returns False instead of raising if it cannot be removed."""
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
+
+
+def _move_file(move):
+    source, target = move
+    try:
+        os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+        shutil.move(source, target)
+        return True
+    except OSError:
+        return False
+
+
+def _metadata_tuple(row):
+    """Convert a Catalog row into the 21-column tuple used by the UI."""
+    return (
+        row.ID,
+        row.IMAGEN,
+        row.NASA_ID,
+        row.FECHA,
+        row.HORA,
+        row.RESOLUCION,
+        row.NADIR_LAT,
+        row.NADIR_LON,
+        row.CENTER_LAT,
+        row.CENTER_LON,
+        row.NADIR_CENTER,
+        row.ALTITUD,
+        row.LUGAR,
+        row.ELEVACION_SOL,
+        row.AZIMUT_SOL,
+        row.COBERTURA_NUBOSA,
+        row.CAMARA,
+        row.LONGITUD_FOCAL,
+        row.INCLINACION,
+        row.FORMATO,
+        row.CAMARA_METADATOS,
+    )
+
 
 class MetadataCRUD:
     """
     CRUD helper for image metadata stored in the database.
 
     Methods:
-        get_paginated_metadata(offset, limit): Return paginated records from the Metadatos view.
+        get_paginated_metadata(offset, limit): Return paginated records from the catalog.
+        get_metadata_page(after, before, limit): Keyset page of catalog records.
+        iter_metadata(batch_size): Stream all catalog records in constant memory.
+        query_bbox(lat_min, lat_max, lon_min, lon_max, date_range): Records inside a bounding box.
+        filter_metadata(min_width, min_height, time_range, limit): Records by size and time of day.
+        storage_stats(group_by, formats): Counts and byte totals by year, mission, camera or format.
+        get_path_by_size(file_format, file_size): Path of an image with a given size.
+        search_metadata(term, column, offset, limit): Ranked full-text search over the catalog.
+        count_search_results(term, column): Number of full-text search hits.
+        page_key(row): Keyset cursor for a metadata tuple.
         get_camera_name(image_id): Get the camera name for an image by its ID.
         get_image_id_by_nasa_id(nasa_id): Retrieve the internal image ID by NASA ID.
         create_image(...): Create a new image record.
         update_image_path(nasa_id, path): Update the file path for an existing image.
         delete_image(nasa_id): Delete an image and its file if it exists.
+        delete_images(nasa_ids, remove_files, max_workers): Batch delete in one transaction.
+        update_paths(paths, move_files, max_workers): Batch path update in one transaction.
         create_image_details(...): Create a details record associated with an image.
         create_map_location(...): Create a geographic location record for an image.
         create_camera_information(...): Create a camera information record for an image.
+        get_existing_nasa_ids(nasa_ids): Return the subset of NASA IDs already stored.
+        bulk_insert_metadata(records): Insert a batch of records into all four tables in one transaction.
+        rebuild_catalog(): Repopulate the denormalized Catalog table from the base tables.
         close_session(): Close the active database session.
     """
 
-    def __init__(self, db_url=DB_URL):
+    def __init__(self, db_url=DB_URL, use_cache=True, engine=None):
         """
         Initialize the database connection and create a session.
 
+        The engine comes from the process-wide registry, so connection
+        PRAGMAs and schema creation are handled once per database. Catalog
+        reads go through the shared ReadCache of that engine.
+
         Args:
             db_url (str): Database connection URL.
+            use_cache (bool): Serve repeated reads from the read cache.
+            engine (sqlalchemy.engine.Engine, optional): Use this engine
+                instead of the registry one (e.g. the federated shard views).
         """
-        self.engine = create_engine(db_url)
-        Base.metadata.create_all(self.engine)
+        self.engine = engine if engine is not None else get_engine(db_url)
         Session = sessionmaker(bind=self.engine)
         self.session = Session()
+        self.read_cache = get_read_cache(self.engine) if use_cache else None
 
+    @cached_read
     def get_paginated_metadata(self, offset=0, limit=100):
         """
-        Retrieve a subset of Metadatos records with pagination.
+        Retrieve a subset of catalog records with pagination.
 
         Args:
             offset (int): Number of records to skip.
@@ -57,97 +208,372 @@ class MetadataCRUD:
         """
         try:
             rows = (
-                self.session.query(Metadatos)
-                .order_by(
-                    case(
-                        (Metadatos.FECHA.is_(None), 1),  # Si FECHA es NULL → 1
-                        else_=0,  # Si no → 0
-                    ).asc(),  # Primero los no-nulos (0), luego los NULLs (1)
-                    Metadatos.FECHA.asc(),  # Luego ordena por la FECHA real
-                )
+                self.session.query(Catalog)
+                .order_by(*catalog_order())
                 .offset(offset)
                 .limit(limit)
                 .all()
             )
-            return [
-                (
-                    row.ID,
-                    row.IMAGEN,
-                    row.NASA_ID,
-                    row.FECHA,
-                    row.HORA,
-                    row.RESOLUCION,
-                    row.NADIR_LAT,
-                    row.NADIR_LON,
-                    row.CENTER_LAT,
-                    row.CENTER_LON,
-                    row.NADIR_CENTER,
-                    row.ALTITUD,
-                    row.LUGAR,
-                    row.ELEVACION_SOL,
-                    row.AZIMUT_SOL,
-                    row.COBERTURA_NUBOSA,
-                    row.CAMARA,
-                    row.LONGITUD_FOCAL,
-                    row.INCLINACION,
-                    row.FORMATO,
-                    row.CAMARA_METADATOS,
-                )
-                for row in rows
-            ]
+            return [_metadata_tuple(row) for row in rows]
         except Exception as e:
             print(f"Error retrieving metadata: {e}")
             return []
 
+    @staticmethod
+    def page_key(row):
+        """
+        Build the keyset cursor for a metadata tuple.
+
+        Args:
+            row (tuple): Tuple returned by the metadata read methods.
+
+        Returns:
+            tuple: ``(date IS NULL, date, image_id)`` for the row.
+        """
+        return (1 if row[3] is None else 0, row[3], row[0])
+
+    @cached_read
+    def get_metadata_page(self, after=None, before=None, limit=100):
+        """
+        Retrieve a page of catalog records using keyset (seek) pagination.
+
+        Pages are ordered by ``(date IS NULL, date, image_id)``. Passing the
+        key of the last row of a page as ``after`` returns the next page;
+        passing the key of the first row as ``before`` returns the previous
+        one. Each page is an index seek, so its cost does not depend on how
+        deep into the catalog it is.
+
+        Args:
+            after (tuple, optional): Key returned by page_key() to page forward from.
+            before (tuple, optional): Key returned by page_key() to page backward from.
+            limit (int): Maximum number of records to return.
+
+        Returns:
+            list[tuple]: Tuples containing metadata per image, in catalog order.
+        """
+        if after is not None and before is not None:
+            raise ValueError("Use either 'after' or 'before', not both")
+
+        descending = before is not None
+        key = before if descending else after
+
+        # Dated and undated images live in separate index segments; each
+        # segment is read with its own seek so the index is always usable.
+        segments = []
+        if descending:
+            if key[0] == 1:
+                segments.append((1, key[2]))
+            segments.append((0, key[1:] if key[0] == 0 else None))
+        else:
+            if key is None or key[0] == 0:
+                segments.append((0, key[1:] if key is not None else None))
+            segments.append((1, key[2] if key is not None and key[0] == 1 else None))
+
+        try:
+            rows = []
+            for is_null, bound in segments:
+                remaining = limit - len(rows)
+                if remaining <= 0:
+                    break
+
+                query = self.session.query(Catalog).filter(
+                    text(f"(FECHA IS NULL) = {is_null}")
+                )
+                if is_null:
+                    query = query.filter(Catalog.FECHA.is_(None))
+                    if bound is not None:
+                        query = query.filter(
+                            Catalog.ID < bound if descending else Catalog.ID > bound
+                        )
+                elif bound is not None:
+                    current = tuple_(Catalog.FECHA, Catalog.ID)
+                    query = query.filter(
+                        current < tuple(bound) if descending else current > tuple(bound)
+                    )
+
+                rows.extend(
+                    query.order_by(*catalog_order(descending)[1:])
+                    .limit(remaining)
+                    .all()
+                )
+
+            if descending:
+                rows.reverse()
+            return [_metadata_tuple(row) for row in rows]
+        except Exception as e:
+            print(f"Error retrieving metadata page: {e}")
+            return []
+
     def get_all_metadata(self):
         """
-        Retrieve all records from the Metadatos view (no pagination).
+        Retrieve all catalog records (no pagination).
 
         Returns:
             list[tuple]: Tuples containing metadata per image.
         """
         try:
             rows = (
-                self.session.query(Metadatos)
-                .order_by(
-                    case(
-                        (Metadatos.FECHA.is_(None), 1),  # Si FECHA es NULL → 1
-                        else_=0,  # Si no → 0
-                    ).asc(),  # Primero los no-nulos (0), luego los NULLs (1)
-                    Metadatos.FECHA.asc(),  # Luego ordena por la FECHA real
-                )
+                self.session.query(Catalog)
+                .order_by(*catalog_order())
                 .all()
             )
-            return [
-                (
-                    row.ID,
-                    row.IMAGEN,
-                    row.NASA_ID,
-                    row.FECHA,
-                    row.HORA,
-                    row.RESOLUCION,
-                    row.NADIR_LAT,
-                    row.NADIR_LON,
-                    row.CENTER_LAT,
-                    row.CENTER_LON,
-                    row.NADIR_CENTER,
-                    row.ALTITUD,
-                    row.LUGAR,
-                    row.ELEVACION_SOL,
-                    row.AZIMUT_SOL,
-                    row.COBERTURA_NUBOSA,
-                    row.CAMARA,
-                    row.LONGITUD_FOCAL,
-                    row.INCLINACION,
-                    row.FORMATO,
-                    row.CAMARA_METADATOS,
-                )
-                for row in rows
-            ]
+            return [_metadata_tuple(row) for row in rows]
         except Exception as e:
             print(f"Error retrieving all metadata: {e}")
             return []
 
+    def iter_metadata(self, batch_size=1000):
+        """
+        Stream every catalog record in catalog order.
+
+        Rows are fetched from the cursor in batches of ``batch_size`` and
+        yielded one at a time, so memory use stays constant regardless of
+        catalog size.
+
+        Args:
+            batch_size (int): Number of rows buffered per fetch.
+
+        Yields:
+            tuple: Tuple containing metadata per image.
+        """
+        stmt = (
+            select(Catalog.__table__)
+            .order_by(*catalog_order())
+            .execution_options(yield_per=batch_size)
+        )
+        for row in self.session.execute(stmt):
+            yield _metadata_tuple(row)
+
+    def query_bbox(
+        self, lat_min, lat_max, lon_min, lon_max, date_range=None, field="center"
+    ):
+        """
+        Retrieve catalog records whose point falls inside a bounding box.
+
+        Candidates come from the MapLocation R*Tree, so the lookup does not
+        scan the catalog. The R*Tree stores 32-bit coordinates, so results
+        are re-checked against the exact MapLocation values.
+
+        Args:
+            lat_min (float): Southern latitude bound.
+            lat_max (float): Northern latitude bound.
+            lon_min (float): Western longitude bound.
+            lon_max (float): Eastern longitude bound.
+            date_range (tuple, optional): ``(date_from, date_to)``; either end may be None.
+            field (str): Point to test, "center" (default) or "nadir".
+
+        Returns:
+            list[tuple]: Tuples containing metadata per image, in catalog order.
+        """
+        if lat_min > lat_max or lon_min > lon_max:
+            raise ValueError("Bounding box minimums must not exceed maximums")
+
+        rtree = spatial_index_table(field)
+        if field == "nadir":
+            lat_col, lon_col = Catalog.NADIR_LAT, Catalog.NADIR_LON
+        else:
+            lat_col, lon_col = Catalog.CENTER_LAT, Catalog.CENTER_LON
+
+        try:
+            query = (
+                self.session.query(Catalog)
+                .join(rtree, rtree.c.image_id == Catalog.ID)
+                .filter(
+                    rtree.c.max_lat >= lat_min,
+                    rtree.c.min_lat <= lat_max,
+                    rtree.c.max_lon >= lon_min,
+                    rtree.c.min_lon <= lon_max,
+                    lat_col.between(lat_min, lat_max),
+                    lon_col.between(lon_min, lon_max),
+                )
+            )
+            if date_range:
+                date_from, date_to = date_range
+                if date_from is not None:
+                    query = query.filter(Catalog.FECHA >= date_from)
+                if date_to is not None:
+                    query = query.filter(Catalog.FECHA <= date_to)
+
+            rows = query.order_by(*catalog_order()).all()
+            return [_metadata_tuple(row) for row in rows]
+        except Exception as e:
+            print(f"Error querying bounding box: {e}")
+            return []
+
+    def filter_metadata(
+        self, min_width=None, min_height=None, time_range=None, limit=100
+    ):
+        """
+        Retrieve catalog records by image size and time of day.
+
+        Filters run on the typed Image columns (width, height, time_sec),
+        each backed by an index.
+
+        Args:
+            min_width (int, optional): Minimum width in pixels.
+            min_height (int, optional): Minimum height in pixels.
+            time_range (tuple, optional): ``(time_from, time_to)`` as
+                datetime.time or seconds since midnight; either end may be None.
+            limit (int): Maximum number of records to return.
+
+        Returns:
+            list[tuple]: Tuples containing metadata per image, in catalog order.
+        """
+        conditions = []
+        if min_width is not None:
+            conditions.append(Image.width >= min_width)
+        if min_height is not None:
+            conditions.append(Image.height >= min_height)
+        if time_range:
+            time_from, time_to = (time_to_seconds(t) for t in time_range)
+            if time_from is not None:
+                conditions.append(Image.time_sec >= time_from)
+            if time_to is not None:
+                conditions.append(Image.time_sec <= time_to)
+
+        try:
+            query = self.session.query(Catalog)
+            if conditions:
+                query = query.filter(
+                    Catalog.ID.in_(select(Image.image_id).where(*conditions))
+                )
+            rows = query.order_by(*catalog_order()).limit(limit).all()
+            return [_metadata_tuple(row) for row in rows]
+        except Exception as e:
+            print(f"Error filtering metadata: {e}")
+            return []
+
+    @cached_read
+    def storage_stats(self, group_by=(), formats=None):
+        """
+        Aggregate image counts and file sizes without touching the filesystem.
+
+        Sizes come from Image.file_size, recorded at ingest; the format,
+        mission and year groupings read covering indexes on Image.
+
+        Args:
+            group_by (tuple[str]): Any of "year", "mission", "camera", "format".
+            formats (tuple[str], optional): Only these file formats ("jpg", "tif").
+
+        Returns:
+            list[dict]: One dict per group with the group keys plus ``count``,
+            ``total_bytes``, ``min_bytes``, ``max_bytes`` and ``mean_bytes``
+            (size figures cover the images whose size is known).
+        """
+        group_by = tuple(group_by)
+        unknown = [g for g in group_by if g not in STORAGE_GROUPS]
+        if unknown:
+            raise ValueError(f"Unknown storage grouping: {', '.join(unknown)}")
+
+        keys = [STORAGE_GROUPS[g].label(g) for g in group_by]
+        query = select(
+            *keys,
+            func.count().label("count"),
+            func.sum(Image.file_size).label("total_bytes"),
+            func.min(Image.file_size).label("min_bytes"),
+            func.max(Image.file_size).label("max_bytes"),
+            func.avg(Image.file_size).label("mean_bytes"),
+        ).select_from(Image)
+        if "camera" in group_by:
+            query = query.outerjoin(
+                CameraInformation, CameraInformation.image_id == Image.image_id
+            )
+        if formats:
+            query = query.where(
+                Image.file_format.in_([f.lower().lstrip(".") for f in formats])
+            )
+        if keys:
+            query = query.group_by(*keys).order_by(*keys)
+        return [dict(row._mapping) for row in self.session.execute(query)]
+
+    def get_path_by_size(self, file_format, file_size):
+        """
+        Get the path of an image with the given format and size (index seek),
+        e.g. to name the largest or smallest file from storage_stats().
+
+        Args:
+            file_format (str): File format ("jpg", "tif").
+            file_size (int): Size in bytes.
+
+        Returns:
+            str or None: Image path, or None if no image matches.
+        """
+        return self.session.execute(
+            select(Image.path)
+            .where(Image.file_format == file_format, Image.file_size == file_size)
+            .limit(1)
+        ).scalar()
+
+    def _search_query(self, term, column=None):
+        if column is not None and column not in SEARCH_COLUMNS:
+            if column not in SEARCH_FIELDS:
+                raise ValueError(f"Column is not searchable: {column}")
+            column = SEARCH_FIELDS[column]
+        match = _fts_query(term, column)
+        if match is None:
+            return None
+        fts = search_index_table()
+        return (
+            self.session.query(Catalog)
+            .join(fts, fts.c.rowid == Catalog.ID)
+            .filter(text(f"{SEARCH_INDEX} MATCH :match"))
+            .params(match=match)
+        ), fts
+
+    @cached_read
+    def search_metadata(self, term, column=None, offset=0, limit=100):
+        """
+        Full-text search over NASA ID, place (features), camera and format.
+
+        Hits are ranked with bm25 and paginated, and the search always runs
+        against the whole catalog through the FTS5 index.
+
+        Args:
+            term (str): Words to search; each word matches as a prefix.
+            column (str, optional): Restrict to one field, either an index
+                column (nasa_id, features, camera, format) or a UI column
+                name (NASA_ID, LUGAR, CAMARA, FORMATO).
+            offset (int): Number of hits to skip.
+            limit (int): Maximum number of hits to return.
+
+        Returns:
+            list[tuple]: Tuples containing metadata per image, best match first.
+        """
+        try:
+            built = self._search_query(term, column)
+            if built is None:
+                return []
+            query, fts = built
+            rows = (
+                query.order_by(fts.c.rank, Catalog.ID)
+                .offset(offset)
+                .limit(limit)
+                .all()
+            )
+            return [_metadata_tuple(row) for row in rows]
+        except ValueError:
+            raise
+        except Exception as e:
+            print(f"Error searching metadata: {e}")
+            return []
+
+    @cached_read
+    def count_search_results(self, term, column=None):
+        """
+        Count full-text search hits for ``term``.
+
+        Args:
+            term (str): Words to search.
+            column (str, optional): Field restriction, as in search_metadata().
+
+        Returns:
+            int: Number of matching images.
+        """
+        built = self._search_query(term, column)
+        if built is None:
+            return 0
+        return built[0].count()
+
     def get_camera_name(self, image_id):
         """
         Get the camera name associated with an image.
@@ -178,7 +604,7 @@ class MetadataCRUD:
         image = self.session.query(Image.image_id).filter_by(nasa_id=nasa_id).first()
         return image.image_id if image else None
 
-    def create_image(self, nasa_id, date, time, resolution, path):
+    def create_image(self, nasa_id, date, time, resolution, path, file_size=None):
         """
         Create a new image record in the database.
 
@@ -188,15 +614,24 @@ class MetadataCRUD:
             time (time): Capture time.
             resolution (str): Image resolution.
             path (str): Image file path.
+            file_size (int, optional): File size in bytes.
 
         Returns:
             Image: Created instance.
         """
         new_image = Image(
-            nasa_id=nasa_id, date=date, time=time, resolution=resolution, path=path
+            nasa_id=nasa_id,
+            date=date,
+            time=time,
+            resolution=resolution,
+            path=path,
+            **typed_image_fields(resolution, date, time),
+            **storage_fields(nasa_id, path, file_size),
         )
         self.session.add(new_image)
         self.session.commit()
+        bump_generation(self.engine)
+        notify_inserted(self.engine, [nasa_id])
         print(f"Image created with ID: {new_image.image_id}")
         return new_image
 
@@ -212,7 +647,10 @@ class MetadataCRUD:
             image = self.session.query(Image).filter_by(nasa_id=nasa_id).first()
             if image:
                 image.path = path
+                image.file_format = storage_fields(nasa_id, path)["file_format"]
+                image.file_missing = None
                 self.session.commit()
+                bump_generation(self.engine)
                 print(f"Path updated for NASA ID: {nasa_id}")
             else:
                 print(f"Image not found for NASA ID: {nasa_id}")
@@ -235,6 +673,8 @@ class MetadataCRUD:
                 if os.path.exists(path.path):
                     os.remove(path.path)
                 self.session.commit()
+                bump_generation(self.engine)
+                notify_deleted(self.engine, [nasa_id])
                 print(f"Image deleted for NASA ID: {nasa_id}")
             else:
                 print(f"Image not found for NASA ID: {nasa_id}")
@@ -242,6 +682,129 @@ class MetadataCRUD:
             self.session.rollback()
             print(f"Error deleting image for NASA ID {nasa_id}: {e}")
 
+    def delete_images(self, nasa_ids, remove_files=True, max_workers=FILE_WORKERS):
+        """
+        Delete many images, with their details, location and camera rows,
+        in a single transaction.
+
+        Rows are deleted with chunked ``DELETE ... WHERE image_id IN``
+        statements. Files are removed after the commit on a bounded thread
+        pool.
+
+        Args:
+            nasa_ids (Iterable[str]): NASA identifiers to delete.
+            remove_files (bool): Also remove the stored image files.
+            max_workers (int): Threads used to remove files.
+
+        Returns:
+            tuple[int, int]: Number of images deleted and files removed.
+        """
+        nasa_ids = list(dict.fromkeys(n for n in nasa_ids if n))
+        rows = []
+        for chunk in _chunks(nasa_ids):
+            rows.extend(
+                self.session.execute(
+                    select(Image.image_id, Image.nasa_id, Image.path).where(
+                        Image.nasa_id.in_(chunk)
+                    )
+                )
+            )
+        if not rows:
+            return 0, 0
+
+        try:
+            for chunk in _chunks([row.image_id for row in rows]):
+                for table in (
+                    ImageDetails.__table__,
+                    MapLocation.__table__,
+                    CameraInformation.__table__,
+                    Image.__table__,
+                ):
+                    self.session.execute(
+                        delete(table).where(table.c.image_id.in_(chunk))
+                    )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        bump_generation(self.engine)
+        notify_deleted(self.engine, [row.nasa_id for row in rows])
+
+        removed = 0
+        if remove_files:
+            paths = [row.path for row in rows if row.path]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                removed = sum(executor.map(remove_file, paths))
+        return len(rows), removed
+
+    def update_paths(self, paths, move_files=False, max_workers=FILE_WORKERS):
+        """
+        Set new file paths for many images in a single transaction.
+
+        Args:
+            paths (dict[str, str]): New path per NASA ID.
+            move_files (bool): First move each file from its stored path to
+                the new one on a bounded thread pool; images whose move
+                fails keep their old path.
+            max_workers (int): Threads used to move files.
+
+        Returns:
+            int: Number of images updated.
+        """
+        paths = {n: p for n, p in paths.items() if n}
+        if move_files and paths:
+            current = {}
+            for chunk in _chunks(list(paths)):
+                current.update(
+                    self.session.execute(
+                        select(Image.nasa_id, Image.path).where(
+                            Image.nasa_id.in_(chunk)
+                        )
+                    ).all()
+                )
+            moves = [
+                (nasa_id, current[nasa_id], target)
+                for nasa_id, target in paths.items()
+                if current.get(nasa_id)
+                and current[nasa_id] != target
+                and os.path.exists(current[nasa_id])
+            ]
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                moved = executor.map(_move_file, [m[1:] for m in moves])
+                failed = {m[0] for m, ok in zip(moves, moved) if not ok}
+            paths = {n: p for n, p in paths.items() if n not in failed}
+
+        if not paths:
+            return 0
+
+        image = Image.__table__
+        try:
+            result = self.session.execute(
+                update(image)
+                .where(image.c.nasa_id == bindparam("b_nasa_id"))
+                .values(
+                    path=bindparam("b_path"),
+                    file_format=bindparam("b_format"),
+                    file_missing=None,
+                ),
+                [
+                    {
+                        "b_nasa_id": n,
+                        "b_path": p,
+                        "b_format": storage_fields(n, p)["file_format"],
+                    }
+                    for n, p in paths.items()
+                ],
+            )
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        bump_generation(self.engine)
+        return result.rowcount
+
     def create_image_details(
         self, image_id, features, sun_elevation, sun_azimuth, cloud_cover
     ):
@@ -267,6 +830,7 @@ class MetadataCRUD:
         )
         self.session.add(new_detail)
         self.session.commit()
+        bump_generation(self.engine)
         print(f"Details created for image_id: {image_id}")
         return new_detail
 
@@ -307,6 +871,7 @@ class MetadataCRUD:
         )
         self.session.add(new_location)
         self.session.commit()
+        bump_generation(self.engine)
         print(f"Location created for image_id: {image_id}")
         return new_location
 
@@ -334,11 +899,188 @@ class MetadataCRUD:
             tilt=tilt,
             format=format,
             camera_metadata=camera_metadata,
+            tilt_deg=parse_number(tilt),
         )
         self.session.add(new_camera)
         self.session.commit()
+        bump_generation(self.engine)
         print(f"Camera information created for image_id: {image_id}")
         return new_camera
 
+    def get_existing_nasa_ids(self, nasa_ids):
+        """
+        Return the NASA IDs from the given list that already exist in Image.
+
+        The lookup is chunked so large lists stay under SQLite's host
+        parameter limit.
+
+        Args:
+            nasa_ids (Iterable[str]): NASA identifiers to check.
+
+        Returns:
+            set[str]: NASA IDs already present in the database.
+        """
+        nasa_ids = list(dict.fromkeys(n for n in nasa_ids if n))
+        existing = set()
+        for i in range(0, len(nasa_ids), SQLITE_MAX_VARIABLES):
+            chunk = nasa_ids[i : i + SQLITE_MAX_VARIABLES]
+            rows = self.session.execute(
+                select(Image.nasa_id).where(Image.nasa_id.in_(chunk))
+            )
+            existing.update(row.nasa_id for row in rows)
+        return existing
+
+    def bulk_insert_metadata(self, records):
+        """
+        Insert a batch of prepared records into Image, ImageDetails,
+        MapLocation and CameraInformation within a single transaction.
+
+        Existing NASA IDs are resolved with one query per chunk and skipped.
+        Each table is written with one executemany
+        ``INSERT ... ON CONFLICT DO NOTHING`` statement. The per-row insert
+        triggers are suspended for the transaction and the R*Trees, search
+        index and Catalog are refreshed once for the whole batch.
+
+        Args:
+            records (list[dict]): Prepared records keyed by column name
+                (nasa_id, date, time, resolution, path, features, ...).
+
+        Returns:
+            tuple[int, int]: Number of records written and skipped.
+        """
+        unique = {}
+        for record in records:
+            nasa_id = record.get("nasa_id")
+            if nasa_id and nasa_id not in unique:
+                unique[nasa_id] = record
+
+        existing = self.get_existing_nasa_ids(unique.keys())
+        new_records = [r for n, r in unique.items() if n not in existing]
+
+        if not new_records:
+            return 0, len(records)
+
+        try:
+            self.session.execute(
+                text(f"INSERT INTO {BULK_LOAD_TABLE} (active) VALUES (1)")
+            )
+            self.session.execute(
+                sqlite_insert(Image.__table__).on_conflict_do_nothing(
+                    index_elements=["nasa_id"]
+                ),
+                [
+                    {
+                        "nasa_id": r["nasa_id"],
+                        "date": r.get("date"),
+                        "time": r.get("time"),
+                        "resolution": r.get("resolution"),
+                        "path": r.get("path"),
+                        **typed_image_fields(
+                            r.get("resolution"), r.get("date"), r.get("time")
+                        ),
+                        **storage_fields(
+                            r["nasa_id"], r.get("path"), r.get("file_size")
+                        ),
+                    }
+                    for r in new_records
+                ],
+            )
+
+            new_ids = [r["nasa_id"] for r in new_records]
+            image_ids = {}
+            for i in range(0, len(new_ids), SQLITE_MAX_VARIABLES):
+                chunk = new_ids[i : i + SQLITE_MAX_VARIABLES]
+                rows = self.session.execute(
+                    select(Image.image_id, Image.nasa_id).where(
+                        Image.nasa_id.in_(chunk)
+                    )
+                )
+                image_ids.update((row.nasa_id, row.image_id) for row in rows)
+
+            details, locations, cameras = [], [], []
+            for r in new_records:
+                image_id = image_ids.get(r["nasa_id"])
+                if image_id is None:
+                    continue
+                details.append(
+                    {
+                        "image_id": image_id,
+                        "features": r.get("features"),
+                        "sun_elevation": r.get("sun_elevation"),
+                        "sun_azimuth": r.get("sun_azimuth"),
+                        "cloud_cover": r.get("cloud_cover"),
+                    }
+                )
+                locations.append(
+                    {
+                        "image_id": image_id,
+                        "nadir_lat": r.get("nadir_lat"),
+                        "nadir_lon": r.get("nadir_lon"),
+                        "center_lat": r.get("center_lat"),
+                        "center_lon": r.get("center_lon"),
+                        "nadir_center": r.get("nadir_center"),
+                        "altitude": r.get("altitude"),
+                    }
+                )
+                cameras.append(
+                    {
+                        "image_id": image_id,
+                        "camera": r.get("camera"),
+                        "focal_length": r.get("focal_length"),
+                        "tilt": r.get("tilt"),
+                        "format": r.get("format"),
+                        "camera_metadata": r.get("camera_metadata"),
+                        "tilt_deg": parse_number(r.get("tilt")),
+                    }
+                )
+
+            for table, rows in (
+                (ImageDetails.__table__, details),
+                (MapLocation.__table__, locations),
+                (CameraInformation.__table__, cameras),
+            ):
+                if rows:
+                    self.session.execute(
+                        sqlite_insert(table).on_conflict_do_nothing(), rows
+                    )
+
+            if image_ids:
+                for statement in refresh_derived_sql(image_ids.values()):
+                    self.session.execute(text(statement))
+            self.session.execute(text(f"DELETE FROM {BULK_LOAD_TABLE}"))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        bump_generation(self.engine)
+        notify_inserted(self.engine, image_ids.keys())
+
+        written = len(details)
+        return written, len(records) - written
+
+    def rebuild_catalog(self):
+        """
+        Rebuild the Catalog table from Image, MapLocation, ImageDetails and
+        CameraInformation.
+
+        Triggers keep the catalog current for every write made through
+        SQLite; this is for existing databases, or after writes that
+        bypassed the triggers (e.g. a restore of the base tables only).
+
+        Returns:
+            int: Number of catalog rows after the rebuild.
+        """
+        try:
+            self.session.execute(text("DELETE FROM Catalog"))
+            self.session.execute(text(catalog_insert_sql("1 = 1")))
+            self.session.commit()
+        except Exception:
+            self.session.rollback()
+            raise
+
+        bump_generation(self.engine)
+        return self.session.query(Catalog).count()
+
     def close_session(self):
         self.session.close()
@@ -0,0 +1,90 @@
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from db.Tables import Base, add_missing_columns
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from map.routes import DB_URL
+
+# SQLite caps host parameters per statement (999 on older builds); keep IN
+# lists comfortably below that.
+SQLITE_MAX_VARIABLES = 500
+
+# Applied to every new DBAPI connection. PRAGMAs such as cache_size, mmap_size
+# and temp_store are per-connection, so they have to be set here rather than
+# once on a throwaway connection.
+SQLITE_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = 20000",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA mmap_size = 536870912",
+    "PRAGMA busy_timeout = 30000",
+)
+
+_engines = {}
+_lock = threading.Lock()
+
+
+def _registry_key(db_url):
+    """Normalize SQLite file URLs so equivalent paths share one engine."""
+    url = make_url(db_url)
+    if url.get_backend_name() == "sqlite" and url.database not in (None, "", ":memory:"):
+        url = url.set(database=os.path.abspath(url.database))
+    return url.render_as_string(hide_password=False)
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record):
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in SQLITE_PRAGMAS:
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def get_engine(db_url=DB_URL):
+    """
+    Return the process-wide engine for ``db_url``, creating it on first use.
+
+    New engines get the performance PRAGMAs applied on every connection and
+    the schema (tables, indexes, virtual tables and triggers) created once,
+    after adding any typed columns missing from older databases.
+
+    Args:
+        db_url (str): Database connection URL.
+
+    Returns:
+        sqlalchemy.engine.Engine: Shared engine for that database.
+    """
+    key = _registry_key(db_url)
+    engine = _engines.get(key)
+    if engine is not None:
+        return engine
+
+    with _lock:
+        engine = _engines.get(key)
+        if engine is None:
+            engine = create_engine(key)
+            if engine.dialect.name == "sqlite":
+                event.listen(engine, "connect", _apply_sqlite_pragmas)
+            with engine.begin() as connection:
+                add_missing_columns(connection)
+            Base.metadata.create_all(engine)
+            _engines[key] = engine
+        return engine
+
+
+def sqlite_url(database_path):
+    """Build the SQLAlchemy URL for a SQLite file path."""
+    return f"sqlite:///{os.path.abspath(database_path)}"
+
+
+def dispose_engines():
+    """Close every pooled connection (e.g. before forking worker processes)."""
+    with _lock:
+        for engine in _engines.values():
+            engine.dispose()
+        _engines.clear()
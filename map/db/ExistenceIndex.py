@@ -0,0 +1,219 @@
+from sqlalchemy import func, select
+from db.Engine import SQLITE_MAX_VARIABLES, get_engine
+from db.Tables import Image
+import hashlib
+import math
+import os
+import sys
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from map.routes import DB_URL
+
+# Catalogs at or above this many images are indexed with a Bloom filter
+# instead of an exact set; positives are then confirmed against Image.
+BLOOM_THRESHOLD = 1_000_000
+BLOOM_ERROR_RATE = 0.001
+
+_indexes = {}
+_lock = threading.Lock()
+
+
+class BloomFilter:
+    """
+    Fixed-size Bloom filter over strings.
+
+    Membership tests never give false negatives; false positives occur at
+    roughly ``error_rate`` while fewer than ``capacity`` keys are stored.
+
+    Args:
+        capacity (int): Expected number of keys.
+        error_rate (float): Target false-positive rate.
+    """
+
+    def __init__(self, capacity, error_rate=BLOOM_ERROR_RATE):
+        capacity = max(int(capacity), 1)
+        self.size = max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        digest = hashlib.blake2b(key.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hashes)]
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, key):
+        return all(
+            self.bits[position >> 3] & (1 << (position & 7))
+            for position in self._positions(key)
+        )
+
+
+class NasaIdIndex:
+    """
+    In-memory index of the NASA IDs stored in the Image table.
+
+    The full ID list is read once, on first use. After that each lookup
+    first pulls rows with an ``image_id`` above the last one seen (a primary
+    key seek), so inserts from other processes are picked up without
+    rescanning. MetadataCRUD reports its own inserts and deletes through
+    notify_inserted() / notify_deleted(). Call reload() after deletes made
+    outside MetadataCRUD.
+
+    Small catalogs keep an exact set, so a lookup is a set membership test.
+    Large catalogs keep a Bloom filter: misses are definitive, and hits are
+    confirmed with chunked ``IN`` queries.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine of the database to index.
+        use_bloom (bool, optional): Force (True) or disable (False) the Bloom
+            filter; by default it is used from BLOOM_THRESHOLD images up.
+        batch_size (int): Rows fetched per batch while loading.
+    """
+
+    def __init__(self, engine, use_bloom=None, batch_size=10000):
+        self.engine = engine
+        self.use_bloom = use_bloom
+        self.batch_size = batch_size
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._ids = None
+        self._bloom = None
+        self._watermark = 0
+
+    def _add_rows(self, rows):
+        for image_id, nasa_id in rows:
+            if self._ids is not None:
+                self._ids.add(nasa_id)
+            else:
+                self._bloom.add(nasa_id)
+            if image_id > self._watermark:
+                self._watermark = image_id
+
+    def _load(self, conn):
+        total = conn.execute(select(func.count()).select_from(Image)).scalar()
+        use_bloom = self.use_bloom
+        if use_bloom is None:
+            use_bloom = total >= BLOOM_THRESHOLD
+
+        # Leave room for growth so the false-positive rate holds until reload.
+        self._ids = None if use_bloom else set()
+        self._bloom = BloomFilter(total * 2) if use_bloom else None
+        self._watermark = 0
+
+        result = conn.execution_options(yield_per=self.batch_size).execute(
+            select(Image.image_id, Image.nasa_id)
+        )
+        for rows in result.partitions():
+            self._add_rows(rows)
+        self._loaded = True
+
+    def _catch_up(self, conn):
+        self._add_rows(
+            conn.execute(
+                select(Image.image_id, Image.nasa_id).where(
+                    Image.image_id > self._watermark
+                )
+            )
+        )
+
+    def _query_existing(self, conn, nasa_ids):
+        existing = set()
+        for i in range(0, len(nasa_ids), SQLITE_MAX_VARIABLES):
+            chunk = nasa_ids[i : i + SQLITE_MAX_VARIABLES]
+            rows = conn.execute(select(Image.nasa_id).where(Image.nasa_id.in_(chunk)))
+            existing.update(row.nasa_id for row in rows)
+        return existing
+
+    def existing(self, nasa_ids):
+        """
+        Return the NASA IDs from ``nasa_ids`` already stored in Image.
+
+        Args:
+            nasa_ids (Iterable[str]): NASA identifiers to check.
+
+        Returns:
+            set[str]: NASA IDs already present in the database.
+        """
+        nasa_ids = list(dict.fromkeys(n for n in nasa_ids if n))
+        with self._lock, self.engine.connect() as conn:
+            if self._loaded:
+                self._catch_up(conn)
+            else:
+                self._load(conn)
+
+            if self._ids is not None:
+                return {n for n in nasa_ids if n in self._ids}
+
+            candidates = [n for n in nasa_ids if n in self._bloom]
+            return self._query_existing(conn, candidates)
+
+    def __contains__(self, nasa_id):
+        return bool(self.existing([nasa_id]))
+
+    def add(self, nasa_ids):
+        """Record NASA IDs just written to Image (no-op until loaded)."""
+        with self._lock:
+            if not self._loaded:
+                return
+            for nasa_id in nasa_ids:
+                if self._ids is not None:
+                    self._ids.add(nasa_id)
+                else:
+                    self._bloom.add(nasa_id)
+
+    def discard(self, nasa_ids):
+        """
+        Forget NASA IDs just deleted from Image.
+
+        Bloom filters cannot drop keys; deleted IDs there are filtered out
+        by the confirming query instead.
+        """
+        with self._lock:
+            if self._ids is not None:
+                self._ids.difference_update(nasa_ids)
+
+    def reload(self):
+        """Drop the in-memory state; the next lookup reloads from Image."""
+        with self._lock:
+            self._loaded = False
+            self._ids = None
+            self._bloom = None
+            self._watermark = 0
+
+
+def get_existence_index(db_url=DB_URL):
+    """
+    Return the process-wide NasaIdIndex for ``db_url``.
+
+    Args:
+        db_url (str): Database connection URL.
+
+    Returns:
+        NasaIdIndex: Shared index for that database.
+    """
+    engine = get_engine(db_url)
+    with _lock:
+        index = _indexes.get(engine)
+        if index is None:
+            index = _indexes[engine] = NasaIdIndex(engine)
+        return index
+
+
+def notify_inserted(engine, nasa_ids):
+    """Add freshly inserted NASA IDs to the index of ``engine``, if one is loaded."""
+    index = _indexes.get(engine)
+    if index is not None:
+        index.add(nasa_ids)
+
+
+def notify_deleted(engine, nasa_ids):
+    """Remove deleted NASA IDs from the index of ``engine``, if one is loaded."""
+    index = _indexes.get(engine)
+    if index is not None:
+        index.discard(nasa_ids)
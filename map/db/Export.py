@@ -0,0 +1,155 @@
+"""
+Columnar export of the catalog (Parquet or Arrow IPC).
+
+Usage:
+    python db/Export.py catalogo.parquet
+    python db/Export.py catalogo.arrow --format arrow
+    python db/Export.py catalogo.parquet --db-url sqlite:////path/to/metadata.db
+
+Without --db-url the configured catalog is exported: the shard set when
+DB_SHARD_DIR is set, otherwise metadata.db.
+
+Requires pyarrow (``pip install pyarrow``); the rest of the package works
+without it.
+"""
+
+import argparse
+import os
+import sys
+import time
+from itertools import islice
+
+from sqlalchemy import Date, Float, Integer, Time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from db.Crud import MetadataCRUD
+from db.Shards import get_metadata_crud
+from db.Tables import Catalog
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as pa_ipc
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+EXPORT_BATCH_SIZE = 50_000
+EXPORT_FORMATS = ("parquet", "arrow")
+
+
+def _arrow_type(column):
+    if isinstance(column.type, Integer):
+        return pa.int64()
+    if isinstance(column.type, Float):
+        return pa.float64()
+    if isinstance(column.type, Date):
+        return pa.date32()
+    if isinstance(column.type, Time):
+        return pa.time64("us")
+    return pa.string()
+
+
+def catalog_schema():
+    """Arrow schema of the Catalog table (same column names as Metadatos)."""
+    return pa.schema(
+        [pa.field(column.name, _arrow_type(column)) for column in Catalog.__table__.columns]
+    )
+
+
+def iter_record_batches(db_url=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Stream the catalog as Arrow record batches, in catalog order.
+
+    Rows come from iter_metadata() (the Catalog columns, in table order)
+    and each batch is built column by column from ``batch_size`` of them,
+    so memory use stays bounded.
+
+    Args:
+        db_url (str, optional): Single database to export; by default the
+            configured catalog (every shard when DB_SHARD_DIR is set).
+        batch_size (int): Rows per record batch.
+
+    Yields:
+        pyarrow.RecordBatch: Typed batch with the Catalog columns.
+    """
+    schema = catalog_schema()
+    crud = MetadataCRUD(db_url, use_cache=False) if db_url else get_metadata_crud()
+    try:
+        rows = crud.iter_metadata(batch_size)
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                break
+            columns = zip(*batch)
+            yield pa.record_batch(
+                [pa.array(values, type=field.type) for values, field in zip(columns, schema)],
+                schema=schema,
+            )
+    finally:
+        crud.close_session()
+
+
+def export_catalog(path, fmt="parquet", db_url=None, batch_size=EXPORT_BATCH_SIZE):
+    """
+    Write the catalog to a Parquet or Arrow IPC file.
+
+    Batches are written as they are read; a Parquet row group holds one
+    batch. An empty catalog still produces a file with the full schema.
+
+    Args:
+        path (str): Output file.
+        fmt (str): "parquet" (default) or "arrow" (Arrow IPC file format).
+        db_url (str, optional): Single database to export (default: the
+            configured catalog, see iter_record_batches()).
+        batch_size (int): Rows per record batch / row group.
+
+    Returns:
+        int: Number of rows written.
+
+    Raises:
+        ImportError: If pyarrow is not installed.
+        ValueError: If ``fmt`` is not supported.
+    """
+    if pa is None:
+        raise ImportError("pyarrow is required for the columnar export: pip install pyarrow")
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+
+    schema = catalog_schema()
+    if fmt == "parquet":
+        writer = pq.ParquetWriter(path, schema, compression="zstd")
+    else:
+        writer = pa_ipc.new_file(path, schema)
+
+    total = 0
+    try:
+        for batch in iter_record_batches(db_url, batch_size):
+            if fmt == "parquet":
+                writer.write_batch(batch, row_group_size=batch_size)
+            else:
+                writer.write_batch(batch)
+            total += batch.num_rows
+    finally:
+        writer.close()
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the catalog to Parquet or Arrow")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--format", choices=EXPORT_FORMATS, default="parquet")
+    parser.add_argument(
+        "--db-url", default=None, help="Single database to export (default: configured catalog)"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=EXPORT_BATCH_SIZE, help="Rows per batch"
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    total = export_catalog(args.path, args.format, args.db_url, args.batch_size)
+    print(f"Exported {total} rows to {args.path} in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,442 @@
+"""
+Download manifest: what the downloader has written, and where.
+
+Reruns, the prepare stage and cleanup read the DownloadManifest table
+instead of stat-ing files one by one, which over SMB/NFS costs a network
+round trip per file. Disk is only looked at one directory listing
+(``scandir``) per folder: to adopt files that predate the manifest, and in
+reconcile(), which re-checks the whole manifest against disk.
+
+Usage:
+    python db/maintenance.py reconcile-manifest
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+import os
+import sys
+import time
+
+from sqlalchemy import bindparam, delete, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from db.Crud import FILE_WORKERS, remove_file
+from db.Engine import SQLITE_MAX_VARIABLES, get_engine
+from db.Tables import DownloadManifest
+from map.routes import DB_URL
+
+MANIFEST_PENDING = "pending"
+MANIFEST_COMPLETE = "complete"
+MANIFEST_ERROR = "error"
+MANIFEST_MISSING = "missing"
+MANIFEST_STATUSES = (MANIFEST_PENDING, MANIFEST_COMPLETE, MANIFEST_ERROR, MANIFEST_MISSING)
+
+# Sidecars of unfinished downloads (aria2c control file, asyncio .part).
+PARTIAL_SUFFIXES = (".aria2", ".part")
+
+RECONCILE_BATCH_SIZE = 10_000
+
+_UPDATED_COLUMNS = (
+    "url",
+    "nasa_id",
+    "size",
+    "etag",
+    "last_modified",
+    "status",
+    "updated_at",
+    "verified_at",
+    "sha256",
+    "expected_size",
+)
+
+
+def list_folder(folder):
+    """
+    Regular files in ``folder`` with their sizes, from a single scandir.
+
+    Args:
+        folder (str): Directory to list.
+
+    Returns:
+        dict[str, int]: Size in bytes per file name; empty if the folder
+        does not exist or cannot be read.
+    """
+    try:
+        with os.scandir(folder) as entries:
+            return {entry.name: entry.stat().st_size for entry in entries if entry.is_file()}
+    except OSError:
+        return {}
+
+
+def _finished(name, listing):
+    """True if ``name`` is in the listing with no unfinished-download sidecar."""
+    return name in listing and not any(name + s in listing for s in PARTIAL_SUFFIXES)
+
+
+def _chunks(values):
+    for i in range(0, len(values), SQLITE_MAX_VARIABLES):
+        yield values[i : i + SQLITE_MAX_VARIABLES]
+
+
+def record_downloads(results, nasa_ids=None, db_url=DB_URL):
+    """
+    Insert or update manifest rows, one per file.
+
+    Rewritten rows lose their verification until record_verification()
+    checks the new file.
+
+    Args:
+        results (Iterable[dict]): Per-file state as returned by the download
+            backends: ``url``, ``path``, ``status`` and optionally
+            ``completed`` (bytes on disk), ``total`` (size announced by
+            the server; 0 or missing when unknown), ``etag`` and
+            ``last_modified``.
+            Backend states outside MANIFEST_STATUSES are stored as "error".
+        nasa_ids (dict[str, str], optional): NASA ID per URL.
+        db_url (str): Database connection URL.
+
+    Returns:
+        int: Number of rows written.
+    """
+    nasa_ids = nasa_ids or {}
+    now = int(time.time())
+    rows = [
+        {
+            "path": r["path"],
+            "url": r["url"],
+            "nasa_id": r.get("nasa_id") or nasa_ids.get(r["url"]),
+            "size": r.get("completed") if r["status"] == MANIFEST_COMPLETE else None,
+            "etag": r.get("etag"),
+            "last_modified": r.get("last_modified"),
+            "status": r["status"] if r["status"] in MANIFEST_STATUSES else MANIFEST_ERROR,
+            "updated_at": now,
+            "verified_at": None,
+            "sha256": None,
+            "expected_size": r.get("total") or None,
+        }
+        for r in results
+    ]
+    if not rows:
+        return 0
+
+    stmt = sqlite_insert(DownloadManifest.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["path"],
+        set_={name: stmt.excluded[name] for name in _UPDATED_COLUMNS},
+    )
+    with get_engine(db_url).begin() as conn:
+        conn.execute(stmt, rows)
+    return len(rows)
+
+
+def pending_downloads(entradas, nasa_ids=None, db_url=DB_URL):
+    """
+    Entries that still have to be downloaded.
+
+    Entries whose path is recorded as complete are skipped without touching
+    disk. Entries the manifest has never seen (files downloaded before it
+    existed) are checked with one listing per folder; finished files found
+    there are adopted into the manifest as complete.
+
+    Args:
+        entradas (list[tuple[str, str, str]]): (url, folder, filename) per file.
+        nasa_ids (dict[str, str], optional): NASA ID per URL, stored on
+            adopted rows.
+        db_url (str): Database connection URL.
+
+    Returns:
+        list[tuple[str, str, str]]: Entries to download, in input order and
+        without duplicate paths.
+    """
+    by_path = {}
+    for entrada in entradas:
+        by_path.setdefault(os.path.join(entrada[1], entrada[2]), entrada)
+
+    known = {}
+    with get_engine(db_url).connect() as conn:
+        for chunk in _chunks(list(by_path)):
+            known.update(
+                conn.execute(
+                    select(DownloadManifest.path, DownloadManifest.status).where(
+                        DownloadManifest.path.in_(chunk)
+                    )
+                ).all()
+            )
+
+    unseen = {}
+    done = set()
+    for path, (url, folder, filename) in by_path.items():
+        status = known.get(path)
+        if status == MANIFEST_COMPLETE:
+            done.add(path)
+        elif status is None:
+            unseen.setdefault(folder, []).append((url, path, filename))
+
+    adopted = []
+    for folder, files in unseen.items():
+        listing = list_folder(folder)
+        for url, path, filename in files:
+            if _finished(filename, listing):
+                adopted.append(
+                    {
+                        "url": url,
+                        "path": path,
+                        "status": MANIFEST_COMPLETE,
+                        "completed": listing[filename],
+                    }
+                )
+                done.add(path)
+    record_downloads(adopted, nasa_ids, db_url)
+
+    return [entrada for path, entrada in by_path.items() if path not in done]
+
+
+def scan_results(entradas):
+    """
+    Per-file state of a download that reports none (aria2c batch session).
+
+    Each folder is listed once; an entry is complete when its finished file
+    is there and an error otherwise.
+
+    Args:
+        entradas (list[tuple[str, str, str]]): (url, folder, filename) per file.
+
+    Returns:
+        list[dict]: Per-file state, in the shape of record_downloads().
+    """
+    listings = {}
+    results = []
+    for url, folder, filename in entradas:
+        if folder not in listings:
+            listings[folder] = list_folder(folder)
+        listing = listings[folder]
+        finished = _finished(filename, listing)
+        results.append(
+            {
+                "url": url,
+                "path": os.path.join(folder, filename),
+                "status": MANIFEST_COMPLETE if finished else MANIFEST_ERROR,
+                "completed": listing[filename] if finished else 0,
+            }
+        )
+    return results
+
+
+def lookup_urls(urls, db_url=DB_URL):
+    """
+    Manifest state per URL.
+
+    Args:
+        urls (Iterable[str]): Source URLs.
+        db_url (str): Database connection URL.
+
+    Returns:
+        dict[str, tuple[str, str, int, int]]: (path, status, size,
+        verified_at) per URL found in the manifest; URLs never recorded are
+        absent.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    found = {}
+    with get_engine(db_url).connect() as conn:
+        for chunk in _chunks(urls):
+            rows = conn.execute(
+                select(
+                    DownloadManifest.url,
+                    DownloadManifest.path,
+                    DownloadManifest.status,
+                    DownloadManifest.size,
+                    DownloadManifest.verified_at,
+                ).where(DownloadManifest.url.in_(chunk))
+            )
+            for url, path, status, size, verified_at in rows:
+                # A URL saved under several paths: prefer the complete one.
+                if url not in found or status == MANIFEST_COMPLETE:
+                    found[url] = (path, status, size, verified_at)
+    return found
+
+
+def unverified_downloads(urls, db_url=DB_URL):
+    """
+    Complete files of ``urls`` that have not passed verification yet.
+
+    Args:
+        urls (Iterable[str]): Source URLs.
+        db_url (str): Database connection URL.
+
+    Returns:
+        list[tuple[str, str, int, int]]: (url, path, recorded size, expected
+        size or None) per file.
+    """
+    urls = list(dict.fromkeys(u for u in urls if u))
+    pending = []
+    with get_engine(db_url).connect() as conn:
+        for chunk in _chunks(urls):
+            pending += conn.execute(
+                select(
+                    DownloadManifest.url,
+                    DownloadManifest.path,
+                    DownloadManifest.size,
+                    DownloadManifest.expected_size,
+                ).where(
+                    DownloadManifest.url.in_(chunk),
+                    DownloadManifest.status == MANIFEST_COMPLETE,
+                    DownloadManifest.verified_at.is_(None),
+                )
+            ).all()
+    return [tuple(row) for row in pending]
+
+
+def record_verification(reports, db_url=DB_URL):
+    """
+    Store integrity check results.
+
+    Files that passed get ``verified_at`` (and ``sha256``, if computed);
+    files that failed go back to "error" so the next run downloads them.
+
+    Args:
+        reports (Iterable[dict]): ``path``, ``ok``, ``size`` and ``sha256``
+            per file.
+        db_url (str): Database connection URL.
+
+    Returns:
+        tuple[int, int]: Number of files verified and failed.
+    """
+    now = int(time.time())
+    rows = [
+        {
+            "b_path": r["path"],
+            "status": MANIFEST_COMPLETE if r["ok"] else MANIFEST_ERROR,
+            "size": r["size"] if r["ok"] else None,
+            "verified_at": now if r["ok"] else None,
+            "sha256": r["sha256"] if r["ok"] else None,
+        }
+        for r in reports
+    ]
+    if rows:
+        with get_engine(db_url).begin() as conn:
+            conn.execute(
+                update(DownloadManifest)
+                .where(DownloadManifest.path == bindparam("b_path"))
+                .values(updated_at=now),
+                rows,
+            )
+    verified = sum(1 for r in rows if r["verified_at"] is not None)
+    return verified, len(rows) - verified
+
+
+def forget_downloads(nasa_ids, remove_files=True, db_url=DB_URL, max_workers=FILE_WORKERS):
+    """
+    Drop the manifest rows of some images, removing their files.
+
+    Files (and unfinished-download sidecars) are removed on a bounded
+    thread pool; paths come from the manifest, so storage is never walked.
+
+    Args:
+        nasa_ids (Iterable[str]): NASA identifiers to forget.
+        remove_files (bool): Also delete the files on disk.
+        db_url (str): Database connection URL.
+        max_workers (int): Threads used to remove files.
+
+    Returns:
+        tuple[int, int]: Number of manifest rows deleted and files removed.
+    """
+    nasa_ids = list(dict.fromkeys(n for n in nasa_ids if n))
+    paths = []
+    with get_engine(db_url).begin() as conn:
+        for chunk in _chunks(nasa_ids):
+            paths += conn.execute(
+                select(DownloadManifest.path).where(DownloadManifest.nasa_id.in_(chunk))
+            ).scalars()
+            conn.execute(
+                delete(DownloadManifest).where(DownloadManifest.nasa_id.in_(chunk))
+            )
+
+    removed = 0
+    if remove_files and paths:
+        targets = [p + suffix for p in paths for suffix in ("",) + PARTIAL_SUFFIXES]
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            removed = sum(executor.map(remove_file, targets))
+    return len(paths), removed
+
+
+def _folder_rows(conn, folder, batch_size):
+    """Manifest rows of the files directly inside ``folder`` (primary key range seek)."""
+    stmt = select(DownloadManifest.path, DownloadManifest.status, DownloadManifest.size)
+    prefix = os.path.join(folder, "")
+    if prefix:
+        # Every path starting with "<folder>/": [prefix, prefix with its last char + 1)
+        upper = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        stmt = stmt.where(DownloadManifest.path >= prefix, DownloadManifest.path < upper)
+    result = conn.execution_options(yield_per=batch_size).execute(stmt)
+    return (row for row in result if os.path.dirname(row.path) == folder)
+
+
+def reconcile(db_url=DB_URL, batch_size=RECONCILE_BATCH_SIZE):
+    """
+    Re-check the manifest against disk, one scandir per folder.
+
+    Complete rows whose file is gone become "missing"; rows whose finished
+    file is on disk become "complete" with the size found there. Changed
+    rows lose their verification.
+
+    Args:
+        db_url (str): Database connection URL.
+        batch_size (int): Manifest rows fetched per batch.
+
+    Returns:
+        dict[str, int]: Counts of ``checked`` rows, ``folders`` listed and
+        rows marked ``missing``, ``restored`` or ``resized``.
+    """
+    counts = {"checked": 0, "folders": 0, "missing": 0, "restored": 0, "resized": 0}
+    changes = []
+    now = int(time.time())
+
+    with get_engine(db_url).connect() as conn:
+        # Folders first: in path order the rows of one folder are not always
+        # contiguous ("a/b/x" < "a/b-c/y" < "a/b/z"), so group explicitly.
+        result = conn.execution_options(yield_per=batch_size).execute(
+            select(DownloadManifest.path)
+        )
+        folders = sorted({os.path.dirname(path) for path in result.scalars()})
+
+        for folder in folders:
+            listing = list_folder(folder)
+            counts["folders"] += 1
+            for path, status, size in _folder_rows(conn, folder, batch_size):
+                counts["checked"] += 1
+                name = os.path.basename(path)
+                if _finished(name, listing):
+                    if status != MANIFEST_COMPLETE:
+                        counts["restored"] += 1
+                    elif size != listing[name]:
+                        counts["resized"] += 1
+                    else:
+                        continue
+                    changes.append(
+                        {
+                            "b_path": path,
+                            "status": MANIFEST_COMPLETE,
+                            "size": listing[name],
+                            "verified_at": None,
+                        }
+                    )
+                elif status == MANIFEST_COMPLETE:
+                    counts["missing"] += 1
+                    changes.append(
+                        {
+                            "b_path": path,
+                            "status": MANIFEST_MISSING,
+                            "size": None,
+                            "verified_at": None,
+                        }
+                    )
+
+    if changes:
+        with get_engine(db_url).begin() as conn:
+            conn.execute(
+                update(DownloadManifest)
+                .where(DownloadManifest.path == bindparam("b_path"))
+                .values(updated_at=now),
+                changes,
+            )
+    return counts
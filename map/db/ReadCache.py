@@ -0,0 +1,108 @@
+from collections import OrderedDict
+import threading
+
+# Entries kept per database before the least recently used one is dropped.
+READ_CACHE_SIZE = 256
+
+_caches = {}
+_generations = {}
+_lock = threading.Lock()
+
+
+def bump_generation(engine):
+    """Invalidate every cached read for ``engine`` (call after a commit)."""
+    with _lock:
+        _generations[engine] = _generations.get(engine, 0) + 1
+
+
+class ReadCache:
+    """
+    LRU cache of MetadataCRUD read results for one database.
+
+    Entries belong to a generation made of two parts: the in-process write
+    counter bumped by MetadataCRUD after every commit, and SQLite's
+    ``PRAGMA data_version`` read on a dedicated connection, which changes
+    whenever any other connection (in this or another process) commits. The
+    cache is emptied as soon as either part moves, so a hit is never older
+    than the last committed write.
+
+    Args:
+        engine (sqlalchemy.engine.Engine): Engine whose reads are cached.
+        maxsize (int): Maximum number of cached results.
+    """
+
+    def __init__(self, engine, maxsize=READ_CACHE_SIZE):
+        self.engine = engine
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._generation = None
+        self._lock = threading.Lock()
+        self._watch = None
+
+    def _data_version(self):
+        if self.engine.dialect.name != "sqlite":
+            return 0
+        if self._watch is None:
+            self._watch = self.engine.raw_connection()
+        cursor = self._watch.cursor()
+        try:
+            cursor.execute("PRAGMA data_version")
+            return cursor.fetchone()[0]
+        finally:
+            cursor.close()
+
+    def _current_generation(self):
+        return _generations.get(self.engine, 0), self._data_version()
+
+    def get_or_load(self, key, loader):
+        """
+        Return the cached result for ``key``, calling ``loader`` on a miss.
+
+        Empty lists are not stored, so a read that failed and returned ``[]``
+        is retried on the next call.
+
+        Args:
+            key (Hashable): Method name and call arguments.
+            loader (Callable[[], object]): Runs the real query.
+
+        Returns:
+            object: Query result; lists are returned as copies.
+        """
+        with self._lock:
+            generation = self._current_generation()
+            if generation != self._generation:
+                self._entries.clear()
+                self._generation = generation
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                value = self._entries[key]
+                return list(value) if isinstance(value, list) else value
+            self.misses += 1
+
+        value = loader()
+
+        with self._lock:
+            if value != [] and self._current_generation() == generation:
+                self._generation = generation
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+        return list(value) if isinstance(value, list) else value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation = None
+
+
+def get_read_cache(engine):
+    """Return the process-wide ReadCache for ``engine``."""
+    with _lock:
+        cache = _caches.get(engine)
+        if cache is None:
+            cache = _caches[engine] = ReadCache(engine)
+        return cache
@@ -0,0 +1,184 @@
+"""
+Retry queue: failed downloads retried per URL with backoff.
+
+A URL that fails to download (or to pass verification) is queued with its
+metadata instead of failing the run; everything that succeeded stays in the
+catalog. A retry pass (``python run_batch_processor.py --reintentos``, and
+the start of every batch run) reruns download and ingest for the URLs that
+are due. Each failure doubles the wait, from RETRY_BASE_SECONDS up to
+RETRY_MAX_SECONDS; after RETRY_MAX_ATTEMPTS the URL is abandoned.
+"""
+
+import json
+import os
+import sys
+import time
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from db.Engine import SQLITE_MAX_VARIABLES, get_engine
+from db.Tables import RetryQueue
+from map.routes import DB_URL
+
+RETRY_QUEUED = "queued"
+RETRY_ABANDONED = "abandoned"
+
+RETRY_BASE_SECONDS = 10 * 60
+RETRY_MAX_SECONDS = 6 * 60 * 60
+RETRY_MAX_ATTEMPTS = 6
+
+_UPDATED_COLUMNS = (
+    "nasa_id",
+    "metadata_json",
+    "attempts",
+    "next_attempt_at",
+    "last_error",
+    "status",
+    "updated_at",
+)
+
+
+def _chunks(values):
+    for i in range(0, len(values), SQLITE_MAX_VARIABLES):
+        yield values[i : i + SQLITE_MAX_VARIABLES]
+
+
+def backoff_seconds(attempts):
+    """
+    Wait before the next attempt after ``attempts`` failures.
+
+    Args:
+        attempts (int): Failed attempts so far (1 or more).
+
+    Returns:
+        int: Seconds, doubling from RETRY_BASE_SECONDS up to RETRY_MAX_SECONDS.
+    """
+    return min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** (max(attempts, 1) - 1))
+
+
+def queue_failures(failures, db_url=DB_URL):
+    """
+    Queue failed URLs, or count one more attempt for those already queued.
+
+    Args:
+        failures (Iterable[tuple[dict, str]]): (metadata record, error) per
+            failed image; the record must have a ``URL``.
+        db_url (str): Database connection URL.
+
+    Returns:
+        tuple[int, int]: URLs queued for another attempt, and URLs abandoned
+        because they ran out of attempts.
+    """
+    failures = {metadata["URL"]: (metadata, error) for metadata, error in failures}
+    if not failures:
+        return 0, 0
+
+    engine = get_engine(db_url)
+    attempts = {}
+    with engine.connect() as conn:
+        for chunk in _chunks(list(failures)):
+            attempts.update(
+                conn.execute(
+                    select(RetryQueue.url, RetryQueue.attempts).where(RetryQueue.url.in_(chunk))
+                ).all()
+            )
+
+    now = int(time.time())
+    rows = []
+    for url, (metadata, error) in failures.items():
+        count = attempts.get(url, 0) + 1
+        rows.append(
+            {
+                "url": url,
+                "nasa_id": metadata.get("NASA_ID"),
+                "metadata_json": json.dumps(metadata, ensure_ascii=False, default=str),
+                "attempts": count,
+                "next_attempt_at": now + backoff_seconds(count),
+                "last_error": error,
+                "status": RETRY_QUEUED if count < RETRY_MAX_ATTEMPTS else RETRY_ABANDONED,
+                "updated_at": now,
+            }
+        )
+
+    stmt = sqlite_insert(RetryQueue.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["url"],
+        set_={name: stmt.excluded[name] for name in _UPDATED_COLUMNS},
+    )
+    with engine.begin() as conn:
+        conn.execute(stmt, rows)
+    abandoned = sum(1 for row in rows if row["status"] == RETRY_ABANDONED)
+    return len(rows) - abandoned, abandoned
+
+
+def clear_retries(urls, db_url=DB_URL):
+    """
+    Drop URLs that finally succeeded from the queue.
+
+    Args:
+        urls (Iterable[str]): URLs now downloaded, verified and ingested.
+        db_url (str): Database connection URL.
+
+    Returns:
+        int: Rows deleted.
+    """
+    urls = list(urls)
+    deleted = 0
+    with get_engine(db_url).begin() as conn:
+        for chunk in _chunks(urls):
+            deleted += conn.execute(delete(RetryQueue).where(RetryQueue.url.in_(chunk))).rowcount
+    return deleted
+
+
+def due_retries(limit=None, now=None, db_url=DB_URL):
+    """
+    Metadata records whose retry is due, oldest due first.
+
+    Args:
+        limit (int, optional): Maximum number of records.
+        now (int, optional): Unix time to compare against (default: now).
+        db_url (str): Database connection URL.
+
+    Returns:
+        list[dict]: Metadata records as they were queued.
+    """
+    now = int(time.time()) if now is None else now
+    query = (
+        select(RetryQueue.metadata_json)
+        .where(RetryQueue.status == RETRY_QUEUED, RetryQueue.next_attempt_at <= now)
+        .order_by(RetryQueue.next_attempt_at)
+        .limit(limit)
+    )
+    with get_engine(db_url).connect() as conn:
+        return [json.loads(row) for row in conn.execute(query).scalars()]
+
+
+def retry_stats(db_url=DB_URL):
+    """
+    Size of the queue.
+
+    Args:
+        db_url (str): Database connection URL.
+
+    Returns:
+        dict: ``queued`` and ``abandoned`` counts, and ``next_due`` (Unix
+        time of the next queued retry, or None).
+    """
+    with get_engine(db_url).connect() as conn:
+        counts = dict(
+            conn.execute(
+                select(RetryQueue.status, func.count()).group_by(RetryQueue.status)
+            ).all()
+        )
+        next_due = conn.execute(
+            select(func.min(RetryQueue.next_attempt_at)).where(
+                RetryQueue.status == RETRY_QUEUED
+            )
+        ).scalar()
+    return {
+        "queued": counts.get(RETRY_QUEUED, 0),
+        "abandoned": counts.get(RETRY_ABANDONED, 0),
+        "next_due": next_due,
+    }
@@ -0,0 +1,477 @@
+from sqlalchemy import create_engine, event, text
+from db.Conversions import date_to_int, storage_fields
+from db.Crud import FILE_WORKERS, MetadataCRUD
+from db.Engine import sqlite_url
+from db.ExistenceIndex import get_existence_index
+from db.Tables import Catalog, Image
+import heapq
+import os
+import sys
+import zlib
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from map.routes import DB_SHARD_DIR, DB_SHARD_SCHEME, DB_URL
+
+SHARD_SCHEMES = ("year", "mission")
+SHARD_PREFIX = "metadata_"
+UNDATED_SHARD = "undated"
+
+# SQLite's default SQLITE_MAX_ATTACHED; larger shard sets are read in groups.
+SQLITE_MAX_ATTACHED = 10
+
+# Each shard numbers its images from crc32(key) * SHARD_ID_SPAN, so image
+# IDs (and keyset cursors) stay unique across the whole shard set.
+SHARD_ID_SPAN = 100_000_000
+
+# Tables exposed as UNION ALL views on the federated connections.
+FEDERATED_TABLES = (Catalog.__table__, Image.__table__)
+
+
+def shard_key(record, scheme="year"):
+    """
+    Shard a prepared record belongs to.
+
+    Args:
+        record (dict): Record as passed to bulk_insert_metadata().
+        scheme (str): "year" (capture year) or "mission" (NASA ID prefix).
+
+    Returns:
+        str: Shard key, e.g. "2024", "undated" or "ISS073".
+    """
+    if scheme == "mission":
+        return storage_fields(record.get("nasa_id"), None)["mission"] or "unknown"
+    date_int = date_to_int(record.get("date"))
+    return str(date_int // 10000) if date_int else UNDATED_SHARD
+
+
+def shard_keys(shard_dir):
+    """
+    Keys of the shard files present in ``shard_dir``.
+
+    Returns:
+        list[str]: Sorted keys; for year shards "undated" comes last, which
+        is also the catalog order.
+    """
+    if not os.path.isdir(shard_dir):
+        return []
+    keys = [
+        name[len(SHARD_PREFIX) : -len(".db")]
+        for name in os.listdir(shard_dir)
+        if name.startswith(SHARD_PREFIX) and name.endswith(".db")
+    ]
+    return sorted(keys, key=lambda key: (key == UNDATED_SHARD, key))
+
+
+def shard_path(shard_dir, key):
+    return os.path.join(shard_dir, f"{SHARD_PREFIX}{key}.db")
+
+
+def _federated_engine(paths):
+    """In-memory engine with ``paths`` attached and UNION ALL views over them."""
+    engine = create_engine("sqlite://")
+
+    @event.listens_for(engine, "connect")
+    def _attach_shards(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for i, path in enumerate(paths):
+                cursor.execute(f"ATTACH DATABASE ? AS shard{i}", (path,))
+            for table in FEDERATED_TABLES:
+                columns = ", ".join(column.name for column in table.columns)
+                union = " UNION ALL ".join(
+                    f"SELECT {columns} FROM shard{i}.{table.name}"
+                    for i in range(len(paths))
+                )
+                cursor.execute(f"CREATE TEMP VIEW {table.name} AS {union}")
+            cursor.execute("PRAGMA query_only = ON")
+        finally:
+            cursor.close()
+
+    return engine
+
+
+class ShardedMetadataCRUD:
+    """
+    Catalog split into one SQLite file per capture year (or mission).
+
+    Writes go only to the shard of each record, so ingest, vacuum and
+    backups of past years never touch the current one. Catalog reads attach
+    the shards to an in-memory connection and query ``Catalog`` / ``Image``
+    views that UNION ALL the shard tables; SQLite merges the per-shard index
+    seeks, so keyset pages stay seeks. Beyond SQLITE_MAX_ATTACHED shards,
+    groups of shards are queried separately and merged in Python.
+
+    Spatial and typed-column filters run on each shard's own R*Tree and
+    indexes (year shards outside ``date_range`` are skipped). Full-text
+    search also runs per shard; bm25 scores are not comparable across
+    shards, so hits are ranked within each shard and shards are listed in
+    catalog order.
+
+    Methods:
+        shard_keys(): Existing shard keys, in catalog order for year shards.
+        shard(key): MetadataCRUD of one shard (created on first use).
+        bulk_insert_metadata(records): Insert records into their shards.
+        get_existing_nasa_ids(nasa_ids): NASA IDs stored in any shard.
+        get_metadata_page(after, before, limit): Keyset page across shards.
+        get_paginated_metadata(offset, limit): Offset page across shards.
+        iter_metadata(batch_size): Stream all records in catalog order.
+        get_all_metadata(): All records in catalog order.
+        query_bbox(...): Records inside a bounding box.
+        filter_metadata(...): Records by size and time of day.
+        storage_stats(group_by, formats): Storage aggregates over all shards.
+        get_path_by_size(file_format, file_size): Path of an image with a given size.
+        search_metadata(term, column, offset, limit): Full-text search, shard by shard.
+        count_search_results(term, column): Number of full-text search hits.
+        get_camera_name(image_id): Camera name of an image, from any shard.
+        get_image_id_by_nasa_id(nasa_id): Image ID of a NASA ID, from any shard.
+        update_image_path(nasa_id, path): Update one image's path in its shard.
+        delete_image(nasa_id): Delete one image and its file.
+        delete_images(nasa_ids, remove_files, max_workers): Batch delete.
+        update_paths(paths, move_files, max_workers): Batch path update.
+        rebuild_catalog(): Rebuild the Catalog table of every shard.
+        close_session(): Close every shard and federated session.
+
+    Args:
+        shard_dir (str): Directory holding the ``metadata_<key>.db`` files.
+        scheme (str): "year" or "mission".
+    """
+
+    page_key = staticmethod(MetadataCRUD.page_key)
+
+    def __init__(self, shard_dir=DB_SHARD_DIR, scheme=DB_SHARD_SCHEME):
+        if not shard_dir:
+            raise ValueError("No shard directory configured (DB_SHARD_DIR)")
+        if scheme not in SHARD_SCHEMES:
+            raise ValueError(f"Unknown shard scheme: {scheme}")
+        self.shard_dir = shard_dir
+        self.scheme = scheme
+        os.makedirs(shard_dir, exist_ok=True)
+        self._shards = {}
+        self._federation = None
+
+    def shard_path(self, key):
+        return shard_path(self.shard_dir, key)
+
+    def shard_keys(self):
+        """Keys of the shard files present, in catalog order (see shard_keys())."""
+        return shard_keys(self.shard_dir)
+
+    def shard(self, key):
+        """
+        MetadataCRUD of one shard, creating the shard file if needed.
+
+        Args:
+            key (str): Shard key from shard_key().
+
+        Returns:
+            MetadataCRUD: CRUD bound to that shard.
+        """
+        crud = self._shards.get(key)
+        if crud is None:
+            crud = self._shards[key] = MetadataCRUD(sqlite_url(self.shard_path(key)))
+            with crud.engine.begin() as conn:
+                conn.execute(
+                    text(
+                        "INSERT INTO sqlite_sequence (name, seq) SELECT 'Image', :base "
+                        "WHERE NOT EXISTS (SELECT 1 FROM sqlite_sequence WHERE name = 'Image')"
+                    ),
+                    {"base": zlib.crc32(key.encode("utf-8")) * SHARD_ID_SPAN},
+                )
+        return crud
+
+    def _federated(self):
+        """One read-only MetadataCRUD per group of attached shards."""
+        keys = tuple(self.shard_keys())
+        if self._federation is None or self._federation[0] != keys:
+            self._close_federation()
+            paths = [self.shard_path(key) for key in keys]
+            cruds = [
+                MetadataCRUD(
+                    engine=_federated_engine(paths[i : i + SQLITE_MAX_ATTACHED]),
+                    use_cache=False,
+                )
+                for i in range(0, len(paths), SQLITE_MAX_ATTACHED)
+            ]
+            self._federation = (keys, cruds)
+        return self._federation[1]
+
+    def _shards_for(self, date_range=None):
+        """Shard CRUDs that can hold rows in ``date_range`` (year shards only)."""
+        keys = self.shard_keys()
+        if date_range and self.scheme == "year":
+            first = date_to_int(date_range[0])
+            last = date_to_int(date_range[1])
+            keys = [
+                key
+                for key in keys
+                if key != UNDATED_SHARD
+                and (first is None or int(key) >= first // 10000)
+                and (last is None or int(key) <= last // 10000)
+            ]
+        return [self.shard(key) for key in keys]
+
+    def _merge(self, results):
+        return list(heapq.merge(*results, key=self.page_key))
+
+    def bulk_insert_metadata(self, records):
+        """
+        Insert a batch of prepared records into their shards.
+
+        NASA IDs already stored in any shard are skipped, so moving a
+        record's date does not duplicate it in another shard.
+
+        Args:
+            records (list[dict]): Prepared records (see MetadataCRUD).
+
+        Returns:
+            tuple[int, int]: Number of records written and skipped.
+        """
+        existing = self.get_existing_nasa_ids(r.get("nasa_id") for r in records)
+        groups = {}
+        for record in records:
+            if record.get("nasa_id") not in existing:
+                groups.setdefault(shard_key(record, self.scheme), []).append(record)
+
+        written = 0
+        for key, batch in groups.items():
+            written += self.shard(key).bulk_insert_metadata(batch)[0]
+        return written, len(records) - written
+
+    def get_existing_nasa_ids(self, nasa_ids):
+        nasa_ids = list(dict.fromkeys(n for n in nasa_ids if n))
+        if not nasa_ids:
+            return set()
+        existing = set()
+        for crud in self._federated():
+            existing |= crud.get_existing_nasa_ids(nasa_ids)
+        return existing
+
+    def get_metadata_page(self, after=None, before=None, limit=100):
+        """Keyset page across shards; same contract as MetadataCRUD."""
+        rows = self._merge(
+            crud.get_metadata_page(after=after, before=before, limit=limit)
+            for crud in self._federated()
+        )
+        return rows[-limit:] if before is not None else rows[:limit]
+
+    def get_paginated_metadata(self, offset=0, limit=100):
+        rows = self._merge(
+            crud.get_paginated_metadata(0, offset + limit) for crud in self._federated()
+        )
+        return rows[offset : offset + limit]
+
+    def iter_metadata(self, batch_size=1000):
+        return heapq.merge(
+            *(crud.iter_metadata(batch_size) for crud in self._federated()),
+            key=self.page_key,
+        )
+
+    def get_all_metadata(self):
+        return list(self.iter_metadata())
+
+    def query_bbox(
+        self, lat_min, lat_max, lon_min, lon_max, date_range=None, field="center"
+    ):
+        return self._merge(
+            crud.query_bbox(lat_min, lat_max, lon_min, lon_max, date_range, field)
+            for crud in self._shards_for(date_range)
+        )
+
+    def filter_metadata(self, min_width=None, min_height=None, time_range=None, limit=100):
+        rows = self._merge(
+            crud.filter_metadata(min_width, min_height, time_range, limit)
+            for crud in self._shards_for()
+        )
+        return rows[:limit] if limit is not None else rows
+
+    def storage_stats(self, group_by=(), formats=None):
+        """Storage aggregates over all shards; same contract as MetadataCRUD."""
+        group_by = tuple(group_by)
+        combined = {}
+        for crud in self._shards_for():
+            for row in crud.storage_stats(group_by, formats):
+                key = tuple(row[g] for g in group_by)
+                # Images with a known size, recovered from total / mean.
+                sized = row["total_bytes"] / row["mean_bytes"] if row["mean_bytes"] else 0
+                acc = combined.get(key)
+                if acc is None:
+                    combined[key] = dict(row, sized=sized)
+                    continue
+                acc["count"] += row["count"]
+                acc["sized"] += sized
+                if row["total_bytes"] is not None:
+                    acc["total_bytes"] = (acc["total_bytes"] or 0) + row["total_bytes"]
+                for name, pick in (("min_bytes", min), ("max_bytes", max)):
+                    values = [v for v in (acc[name], row[name]) if v is not None]
+                    acc[name] = pick(values) if values else None
+
+        rows = []
+        for key in sorted(combined, key=lambda k: [(v is not None, v) for v in k]):
+            row = combined[key]
+            sized = row.pop("sized")
+            row["mean_bytes"] = row["total_bytes"] / sized if sized else None
+            rows.append(row)
+        if not group_by and not rows:
+            # Like an ungrouped aggregate in SQL: one row of zero totals.
+            rows.append(
+                dict(count=0, total_bytes=None, min_bytes=None, max_bytes=None, mean_bytes=None)
+            )
+        return rows
+
+    def get_path_by_size(self, file_format, file_size):
+        for crud in self._shards_for():
+            path = crud.get_path_by_size(file_format, file_size)
+            if path is not None:
+                return path
+        return None
+
+    def search_metadata(self, term, column=None, offset=0, limit=100):
+        """
+        Full-text search over every shard; same arguments as MetadataCRUD.
+
+        Returns:
+            list[tuple]: Hits ranked by bm25 within each shard, shards in
+            catalog order; ``offset``/``limit`` apply to that sequence.
+        """
+        rows = []
+        for crud in self._shards_for():
+            if len(rows) >= limit:
+                break
+            if offset:
+                total = crud.count_search_results(term, column)
+                if offset >= total:
+                    offset -= total
+                    continue
+            rows += crud.search_metadata(term, column, offset, limit - len(rows))
+            offset = 0
+        return rows
+
+    def count_search_results(self, term, column=None):
+        return sum(crud.count_search_results(term, column) for crud in self._shards_for())
+
+    def get_camera_name(self, image_id):
+        # Image IDs are unique across shards (see SHARD_ID_SPAN).
+        for crud in self._shards_for():
+            camera = crud.get_camera_name(image_id)
+            if camera is not None:
+                return camera
+        return None
+
+    def get_image_id_by_nasa_id(self, nasa_id):
+        for crud in self._shards_for():
+            image_id = crud.get_image_id_by_nasa_id(nasa_id)
+            if image_id is not None:
+                return image_id
+        return None
+
+    def update_image_path(self, nasa_id, path):
+        updated = self.update_paths({nasa_id: path})
+        print(
+            f"Path updated for NASA ID: {nasa_id}"
+            if updated
+            else f"Image not found for NASA ID: {nasa_id}"
+        )
+
+    def delete_image(self, nasa_id):
+        deleted, _ = self.delete_images([nasa_id])
+        print(
+            f"Image deleted for NASA ID: {nasa_id}"
+            if deleted
+            else f"Image not found for NASA ID: {nasa_id}"
+        )
+
+    def delete_images(self, nasa_ids, remove_files=True, max_workers=FILE_WORKERS):
+        nasa_ids = list(nasa_ids)
+        deleted = removed = 0
+        for crud in self._shards_for():
+            d, r = crud.delete_images(nasa_ids, remove_files, max_workers)
+            deleted += d
+            removed += r
+        return deleted, removed
+
+    def update_paths(self, paths, move_files=False, max_workers=FILE_WORKERS):
+        return sum(
+            crud.update_paths(paths, move_files, max_workers)
+            for crud in self._shards_for()
+        )
+
+    def rebuild_catalog(self):
+        """Rebuild every shard's Catalog table; returns the total row count."""
+        return sum(crud.rebuild_catalog() for crud in self._shards_for())
+
+    def _close_federation(self):
+        if self._federation is not None:
+            for crud in self._federation[1]:
+                crud.close_session()
+                crud.engine.dispose()
+            self._federation = None
+
+    def close_session(self):
+        self._close_federation()
+        for crud in self._shards.values():
+            crud.close_session()
+        self._shards.clear()
+
+
+class ShardedNasaIdIndex:
+    """
+    NASA ID existence index over every shard.
+
+    Each shard keeps its process-wide NasaIdIndex (see db.ExistenceIndex),
+    which MetadataCRUD updates on its own inserts and deletes; shard files
+    created since the last lookup are picked up on the next one.
+
+    Args:
+        shard_dir (str): Directory holding the ``metadata_<key>.db`` files.
+    """
+
+    def __init__(self, shard_dir=DB_SHARD_DIR):
+        self.shard_dir = shard_dir
+
+    def existing(self, nasa_ids):
+        """
+        Return the NASA IDs from ``nasa_ids`` stored in any shard.
+
+        Args:
+            nasa_ids (Iterable[str]): NASA identifiers to check.
+
+        Returns:
+            set[str]: NASA IDs already present.
+        """
+        pending = list(dict.fromkeys(n for n in nasa_ids if n))
+        found = set()
+        for key in shard_keys(self.shard_dir):
+            if not pending:
+                break
+            index = get_existence_index(sqlite_url(shard_path(self.shard_dir, key)))
+            hits = index.existing(pending)
+            found |= hits
+            pending = [n for n in pending if n not in hits]
+        return found
+
+    def __contains__(self, nasa_id):
+        return bool(self.existing([nasa_id]))
+
+
+def get_metadata_crud(db_url=DB_URL):
+    """
+    CRUD of the catalog: the shard set when DB_SHARD_DIR is configured,
+    otherwise the single database at ``db_url``.
+
+    Every reader and writer of the catalog goes through here (or through
+    get_nasa_id_index()), so a sharded setup is seen the same way by ingest,
+    dedupe, cleanup, the TUI, counts and exports.
+    """
+    if DB_SHARD_DIR:
+        return ShardedMetadataCRUD()
+    return MetadataCRUD(db_url)
+
+
+def get_nasa_id_index(db_url=DB_URL):
+    """
+    NASA ID existence index of the catalog: over every shard when
+    DB_SHARD_DIR is configured, otherwise the shared index of ``db_url``.
+    """
+    if DB_SHARD_DIR:
+        return ShardedNasaIdIndex()
+    return get_existence_index(db_url)
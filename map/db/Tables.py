@@ -1,4 +1,17 @@
-from sqlalchemy import Column, Integer, String, Float, ForeignKey, Date, Time
+from sqlalchemy import (
+    DDL,
+    Column,
+    Date,
+    Float,
+    ForeignKey,
+    Index,
+    Integer,
+    String,
+    Text,
+    Time,
+    event,
+)
+from sqlalchemy.sql import column, table
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
@@ -16,6 +29,14 @@ class Image(Base):
         time (time): Capture time.
         resolution (str): Image resolution.
         path (str): File path of the image on disk.
+        width (int): Width in pixels, parsed from ``resolution``.
+        height (int): Height in pixels, parsed from ``resolution``.
+        date_int (int): Capture date as YYYYMMDD.
+        time_sec (int): Capture time as seconds since midnight.
+        mission (str): Mission prefix of ``nasa_id`` (e.g. "ISS073").
+        file_format (str): Lower-case file extension of ``path`` ("jpg", "tif").
+        file_size (int): File size in bytes, recorded at ingest.
+        file_missing (int): 1 when the backfill found no file at ``path``.
 
     Relationships:
         details (ImageDetails): Detailed information associated with the image.
@@ -24,6 +45,8 @@ class Image(Base):
     """
 
     __tablename__ = "Image"
+    # Same as metadata.sql; shards seed sqlite_sequence to keep IDs disjoint.
+    __table_args__ = {"sqlite_autoincrement": True}
 
     image_id = Column(Integer, primary_key=True, autoincrement=True)
     nasa_id = Column(String(100), nullable=False, unique=True)
@@ -31,6 +54,14 @@ class Image(Base):
     time = Column(Time, nullable=True)
     resolution = Column(String(50), nullable=True)
     path = Column(String(255), nullable=True)
+    width = Column(Integer, nullable=True)
+    height = Column(Integer, nullable=True)
+    date_int = Column(Integer, nullable=True)
+    time_sec = Column(Integer, nullable=True)
+    mission = Column(String(20), nullable=True)
+    file_format = Column(String(10), nullable=True)
+    file_size = Column(Integer, nullable=True)
+    file_missing = Column(Integer, nullable=True)
 
     details = relationship(
         "ImageDetails", back_populates="image", cascade="all, delete-orphan"
@@ -110,6 +141,7 @@ class CameraInformation(Base):
         tilt (str): Camera tilt.
         format (str): Image format used.
         camera_metadata (str): Additional camera metadata.
+        tilt_deg (float): Numeric tilt in degrees, when ``tilt`` has one.
 
     Relationships:
         image (Image): Image associated with this camera information.
@@ -123,13 +155,14 @@ class CameraInformation(Base):
     tilt = Column(String(50), nullable=True)
     format = Column(String(100), nullable=True)
     camera_metadata = Column(String(50), nullable=True)
+    tilt_deg = Column(Float, nullable=True)
 
     image = relationship("Image", back_populates="camera_info")
 
 
-class Metadatos(Base):
+class MetadataColumns:
     """
-    Combined view that aggregates all metadata related to an image.
+    Column set shared by the Metadatos view and the Catalog table.
 
     Attributes:
         ID (int): Unique identifier.
@@ -155,7 +188,6 @@ class Metadatos(Base):
         CAMARA_METADATOS (str): Additional camera information.
     """
 
-    __tablename__ = "Metadatos"  # Vista
     ID = Column(Integer, primary_key=True)
     IMAGEN = Column(String)
     NASA_ID = Column(String)
@@ -177,3 +209,447 @@ class Metadatos(Base):
     INCLINACION = Column(String)
     FORMATO = Column(String)
     CAMARA_METADATOS = Column(String)
+
+
+class Metadatos(MetadataColumns, Base):
+    """
+    Combined view that aggregates all metadata related to an image.
+
+    Joins Image, MapLocation, ImageDetails and CameraInformation on every
+    read; the application reads the Catalog table instead.
+    """
+
+    __tablename__ = "Metadatos"  # Vista
+
+
+class Catalog(MetadataColumns, Base):
+    """
+    Denormalized copy of the Metadatos view, one row per complete image.
+
+    Rows are kept in sync with the base tables by triggers, so reads never
+    join. Use MetadataCRUD.rebuild_catalog() (or ``python maintenance.py
+    rebuild-catalog``) to repopulate it on existing databases.
+    """
+
+    __tablename__ = "Catalog"
+
+
+def catalog_order(descending=False):
+    """
+    Catalog sort order: dated images first, then by date and id.
+
+    The expressions match idx_catalog_keyset so SQLite walks the index
+    instead of sorting the whole catalog.
+    """
+    keys = (Catalog.FECHA.is_(None), Catalog.FECHA, Catalog.ID)
+    return [k.desc() if descending else k.asc() for k in keys]
+
+
+class DownloadManifest(Base):
+    """
+    One row per file the downloader has written (or tried to write).
+
+    Reruns, the prepare stage and cleanup read this table instead of
+    stat-ing every file on the NAS; ``python maintenance.py
+    reconcile-manifest`` re-checks it against disk with one directory
+    listing per folder.
+
+    Attributes:
+        path (str): Final path of the file on disk.
+        url (str): Source URL.
+        nasa_id (str): NASA identifier of the image, when known.
+        size (int): File size in bytes.
+        etag (str): ``ETag`` response header, when the backend reports it.
+        last_modified (str): ``Last-Modified`` response header, likewise.
+        status (str): "pending", "complete", "error" or "missing" (gone from disk).
+        updated_at (int): Unix time of the last change.
+        verified_at (int): Unix time the file passed the integrity checks;
+            only verified files are written to the catalog.
+        sha256 (str): SHA-256 of the file, when verification computed it.
+        expected_size (int): Size announced by the server (Content-Length /
+            totalLength), when the backend reports it; verification checks
+            the file against it.
+    """
+
+    __tablename__ = "DownloadManifest"
+    __table_args__ = (
+        Index("idx_manifest_url", "url"),
+        Index("idx_manifest_nasa_id", "nasa_id"),
+    )
+
+    path = Column(String, primary_key=True)
+    url = Column(String, nullable=False)
+    nasa_id = Column(String(100), nullable=True)
+    size = Column(Integer, nullable=True)
+    etag = Column(String, nullable=True)
+    last_modified = Column(String, nullable=True)
+    status = Column(String(10), nullable=False)
+    updated_at = Column(Integer, nullable=True)
+    verified_at = Column(Integer, nullable=True)
+    sha256 = Column(String(64), nullable=True)
+    expected_size = Column(Integer, nullable=True)
+
+
+class RetryQueue(Base):
+    """
+    URLs whose download failed, waiting for a retry pass.
+
+    A failed URL no longer rolls back the whole run: it is queued here with
+    its metadata and retried with exponential backoff, while everything
+    else from the run stays in the catalog (see db/RetryQueue.py).
+
+    Attributes:
+        url (str): Image URL.
+        nasa_id (str): NASA identifier of the image.
+        metadata_json (str): Metadata record as JSON, to rerun download and ingest.
+        attempts (int): Failed attempts so far.
+        next_attempt_at (int): Unix time the URL is due again.
+        last_error (str): Reason of the last failure.
+        status (str): "queued" or "abandoned" (out of attempts).
+        updated_at (int): Unix time of the last change.
+    """
+
+    __tablename__ = "RetryQueue"
+    __table_args__ = (Index("idx_retry_due", "status", "next_attempt_at"),)
+
+    url = Column(String, primary_key=True)
+    nasa_id = Column(String(100), nullable=True)
+    metadata_json = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    next_attempt_at = Column(Integer, nullable=False)
+    last_error = Column(String, nullable=True)
+    status = Column(String(10), nullable=False)
+    updated_at = Column(Integer, nullable=True)
+
+
+# Schema objects that cannot be declared on the models above (expression
+# indexes, virtual tables, triggers). They run after every create_all call so
+# existing databases pick them up too, hence every statement is idempotent.
+SCHEMA_EXTRAS = [
+    # Keyset pagination order: dated images first, then by date and id.
+    "CREATE INDEX IF NOT EXISTS idx_image_keyset "
+    "ON Image(date IS NULL, date, image_id)",
+    # Range filters on the typed columns.
+    "CREATE INDEX IF NOT EXISTS idx_image_size ON Image(width, height)",
+    "CREATE INDEX IF NOT EXISTS idx_image_time_sec ON Image(time_sec)",
+    "CREATE INDEX IF NOT EXISTS idx_camera_tilt_deg ON CameraInformation(tilt_deg)",
+    # Covering indexes for the storage aggregates (MetadataCRUD.storage_stats);
+    # idx_image_date_size also serves date_int range filters.
+    "DROP INDEX IF EXISTS idx_image_date_int",
+    "CREATE INDEX IF NOT EXISTS idx_image_date_size ON Image(date_int, file_size)",
+    "CREATE INDEX IF NOT EXISTS idx_image_format_size "
+    "ON Image(file_format, file_size)",
+    "CREATE INDEX IF NOT EXISTS idx_image_mission_size "
+    "ON Image(mission, file_format, file_size)",
+    "CREATE INDEX IF NOT EXISTS idx_camera_camera ON CameraInformation(camera)",
+]
+
+
+# Typed columns added after the first release. create_all() does not alter
+# existing tables, so add_missing_columns() adds them before it runs; the
+# values are filled by ingest and by ``python maintenance.py backfill-typed``
+# (which also stats files for rows ingested before file_size was recorded,
+# and flags file_missing where there is no file so the next run skips them).
+# The migration is additive: the original string columns stay, since the
+# catalog, exports and full-text search still read them.
+TYPED_COLUMNS = {
+    "Image": (
+        ("width", "INTEGER"),
+        ("height", "INTEGER"),
+        ("date_int", "INTEGER"),
+        ("time_sec", "INTEGER"),
+        ("mission", "VARCHAR(20)"),
+        ("file_format", "VARCHAR(10)"),
+        ("file_size", "INTEGER"),
+        ("file_missing", "INTEGER"),
+    ),
+    "CameraInformation": (("tilt_deg", "REAL"),),
+    "DownloadManifest": (
+        ("verified_at", "INTEGER"),
+        ("sha256", "VARCHAR(64)"),
+        ("expected_size", "INTEGER"),
+    ),
+}
+
+
+def add_missing_columns(connection):
+    """
+    Add any TYPED_COLUMNS missing from existing tables.
+
+    Args:
+        connection (sqlalchemy.engine.Connection): Connection inside a transaction.
+
+    Returns:
+        list[str]: ``table.column`` names that were added.
+    """
+    added = []
+    for table_name, columns in TYPED_COLUMNS.items():
+        existing = {
+            row[1]
+            for row in connection.exec_driver_sql(f'PRAGMA table_info("{table_name}")')
+        }
+        if not existing:
+            continue
+        for name, sql_type in columns:
+            if name not in existing:
+                connection.exec_driver_sql(
+                    f'ALTER TABLE "{table_name}" ADD COLUMN {name} {sql_type}'
+                )
+                added.append(f"{table_name}.{name}")
+    return added
+
+
+# While a row exists in BulkLoad (only ever inside the loader's own
+# transaction, so other connections never see it) the per-row insert triggers
+# below stand down; the loader refreshes the derived tables once per batch
+# with refresh_derived_sql() instead.
+BULK_LOAD_TABLE = "BulkLoad"
+BULK_LOAD_GUARD = f"WHEN NOT EXISTS (SELECT 1 FROM {BULK_LOAD_TABLE})"
+
+SCHEMA_EXTRAS.append(f"CREATE TABLE IF NOT EXISTS {BULK_LOAD_TABLE} (active INTEGER)")
+
+
+# R*Tree indexes over MapLocation points, one per coordinate pair. Points are
+# stored as degenerate boxes and kept in sync by triggers.
+SPATIAL_INDEXES = {
+    "center": ("MapLocationCenterRTree", "center_lat", "center_lon"),
+    "nadir": ("MapLocationNadirRTree", "nadir_lat", "nadir_lon"),
+}
+
+
+def _spatial_insert_sql(rtree, lat, lon, where):
+    return (
+        f"INSERT INTO {rtree} (image_id, min_lat, max_lat, min_lon, max_lon) "
+        f"SELECT image_id, {lat}, {lat}, {lon}, {lon} FROM MapLocation "
+        f"WHERE {lat} IS NOT NULL AND {lon} IS NOT NULL AND {where}"
+    )
+
+
+def _spatial_index_ddl(rtree, lat, lon):
+    insert_new = (
+        f"INSERT INTO {rtree} (image_id, min_lat, max_lat, min_lon, max_lon) "
+        f"SELECT NEW.image_id, NEW.{lat}, NEW.{lat}, NEW.{lon}, NEW.{lon} "
+        f"WHERE NEW.{lat} IS NOT NULL AND NEW.{lon} IS NOT NULL;"
+    )
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {rtree} "
+        "USING rtree(image_id, min_lat, max_lat, min_lon, max_lon)",
+        f"CREATE TRIGGER IF NOT EXISTS {rtree}_ai AFTER INSERT ON MapLocation "
+        f"{BULK_LOAD_GUARD} BEGIN {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {rtree}_au "
+        f"AFTER UPDATE OF {lat}, {lon} ON MapLocation BEGIN "
+        f"DELETE FROM {rtree} WHERE image_id = OLD.image_id; {insert_new} END",
+        f"CREATE TRIGGER IF NOT EXISTS {rtree}_ad AFTER DELETE ON MapLocation "
+        f"BEGIN DELETE FROM {rtree} WHERE image_id = OLD.image_id; END",
+        # Backfill databases created before the index existed.
+        _spatial_insert_sql(rtree, lat, lon, f"NOT EXISTS (SELECT 1 FROM {rtree})"),
+    ]
+
+
+def spatial_index_table(field):
+    """Lightweight table construct for the R*Tree of ``field`` (center/nadir)."""
+    return table(
+        SPATIAL_INDEXES[field][0],
+        column("image_id"),
+        column("min_lat"),
+        column("max_lat"),
+        column("min_lon"),
+        column("max_lon"),
+    )
+
+
+for _rtree, _lat, _lon in SPATIAL_INDEXES.values():
+    SCHEMA_EXTRAS.extend(_spatial_index_ddl(_rtree, _lat, _lon))
+
+
+# FTS5 index over the searchable text fields, keyed by rowid = image_id.
+# Documents are rebuilt from the base tables whenever one of them changes.
+SEARCH_INDEX = "MetadataSearch"
+SEARCH_COLUMNS = ("nasa_id", "features", "camera", "format")
+
+
+def _search_document_sql(where):
+    return (
+        f"INSERT INTO {SEARCH_INDEX} (rowid, nasa_id, features, camera, format) "
+        "SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format "
+        "FROM Image AS i "
+        "LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id "
+        "LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id "
+        f"WHERE {where}"
+    )
+
+
+def _search_refresh_trigger(name, when, row):
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX}_{name} {when} BEGIN "
+        f"DELETE FROM {SEARCH_INDEX} WHERE rowid = {row}.image_id; "
+        f"{_search_document_sql(f'i.image_id = {row}.image_id')}; END"
+    )
+
+
+def _search_index_ddl():
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_INDEX} USING fts5("
+        f"{', '.join(SEARCH_COLUMNS)}, tokenize = 'unicode61 remove_diacritics 2')",
+        _search_refresh_trigger(
+            "image_ai", f"AFTER INSERT ON Image {BULK_LOAD_GUARD}", "NEW"
+        ),
+        _search_refresh_trigger("image_au", "AFTER UPDATE OF nasa_id ON Image", "NEW"),
+        f"CREATE TRIGGER IF NOT EXISTS {SEARCH_INDEX}_image_ad "
+        f"AFTER DELETE ON Image BEGIN "
+        f"DELETE FROM {SEARCH_INDEX} WHERE rowid = OLD.image_id; END",
+        _search_refresh_trigger(
+            "details_ai", f"AFTER INSERT ON ImageDetails {BULK_LOAD_GUARD}", "NEW"
+        ),
+        _search_refresh_trigger(
+            "details_au", "AFTER UPDATE OF features ON ImageDetails", "NEW"
+        ),
+        _search_refresh_trigger("details_ad", "AFTER DELETE ON ImageDetails", "OLD"),
+        _search_refresh_trigger(
+            "camera_ai", f"AFTER INSERT ON CameraInformation {BULK_LOAD_GUARD}", "NEW"
+        ),
+        _search_refresh_trigger(
+            "camera_au", "AFTER UPDATE OF camera, format ON CameraInformation", "NEW"
+        ),
+        _search_refresh_trigger(
+            "camera_ad", "AFTER DELETE ON CameraInformation", "OLD"
+        ),
+        # Backfill databases created before the index existed.
+        _search_document_sql(f"NOT EXISTS (SELECT 1 FROM {SEARCH_INDEX})"),
+    ]
+
+
+def search_index_table():
+    """Lightweight table construct for the FTS5 search index."""
+    return table(SEARCH_INDEX, column("rowid"), column("rank"))
+
+
+SCHEMA_EXTRAS.extend(_search_index_ddl())
+
+
+# Catalog columns and the base-table expression each one is copied from;
+# same projection and INNER JOINs as the Metadatos view.
+CATALOG_SOURCE = (
+    ("ID", "i.image_id"),
+    ("IMAGEN", "i.path"),
+    ("NASA_ID", "i.nasa_id"),
+    ("FECHA", "i.date"),
+    ("HORA", "i.time"),
+    ("RESOLUCION", "i.resolution"),
+    ("NADIR_LAT", "ml.nadir_lat"),
+    ("NADIR_LON", "ml.nadir_lon"),
+    ("CENTER_LAT", "ml.center_lat"),
+    ("CENTER_LON", "ml.center_lon"),
+    ("NADIR_CENTER", "ml.nadir_center"),
+    ("ALTITUD", "ml.altitude"),
+    ("LUGAR", "im.features"),
+    ("ELEVACION_SOL", "im.sun_elevation"),
+    ("AZIMUT_SOL", "im.sun_azimuth"),
+    ("COBERTURA_NUBOSA", "im.cloud_cover"),
+    ("CAMARA", "ci.camera"),
+    ("LONGITUD_FOCAL", "ci.focal_length"),
+    ("INCLINACION", "ci.tilt"),
+    ("FORMATO", "ci.format"),
+    ("CAMARA_METADATOS", "ci.camera_metadata"),
+)
+
+CATALOG_SOURCE_TABLES = {
+    "Image": "i",
+    "MapLocation": "ml",
+    "ImageDetails": "im",
+    "CameraInformation": "ci",
+}
+
+
+def _catalog_source_columns(source):
+    """Columns of ``source`` copied into Catalog (others never touch it)."""
+    prefix = f"{CATALOG_SOURCE_TABLES[source]}."
+    columns = [e[len(prefix) :] for _, e in CATALOG_SOURCE if e.startswith(prefix)]
+    return ", ".join(dict.fromkeys(["image_id"] + columns))
+
+
+def catalog_insert_sql(where):
+    """INSERT ... SELECT that materializes the Catalog rows matching ``where``."""
+    return (
+        f"INSERT OR REPLACE INTO Catalog ({', '.join(c for c, _ in CATALOG_SOURCE)}) "
+        f"SELECT {', '.join(e for _, e in CATALOG_SOURCE)} "
+        "FROM Image AS i "
+        "INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id "
+        "INNER JOIN ImageDetails AS im ON i.image_id = im.image_id "
+        "INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id "
+        f"WHERE {where}"
+    )
+
+
+def _catalog_refresh_trigger(name, when, old, new):
+    return (
+        f"CREATE TRIGGER IF NOT EXISTS Catalog_{name} {when} BEGIN "
+        f"DELETE FROM Catalog WHERE ID = {old}.image_id; "
+        f"{catalog_insert_sql(f'i.image_id = {new}.image_id')}; END"
+    )
+
+
+def _catalog_ddl():
+    statements = []
+    for source in CATALOG_SOURCE_TABLES:
+        statements += [
+            _catalog_refresh_trigger(
+                f"{source}_ai",
+                f"AFTER INSERT ON {source} {BULK_LOAD_GUARD}",
+                "NEW",
+                "NEW",
+            ),
+            _catalog_refresh_trigger(
+                f"{source}_au",
+                f"AFTER UPDATE OF {_catalog_source_columns(source)} ON {source}",
+                "OLD",
+                "NEW",
+            ),
+            _catalog_refresh_trigger(
+                f"{source}_ad", f"AFTER DELETE ON {source}", "OLD", "OLD"
+            ),
+        ]
+    return statements + [
+        # Catalog order (see catalog_order) and the common filters.
+        "CREATE INDEX IF NOT EXISTS idx_catalog_keyset "
+        "ON Catalog(FECHA IS NULL, FECHA, ID)",
+        "CREATE INDEX IF NOT EXISTS idx_catalog_camera ON Catalog(CAMARA, FECHA, ID)",
+        "CREATE INDEX IF NOT EXISTS idx_catalog_center "
+        "ON Catalog(CENTER_LAT, CENTER_LON)",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_catalog_nasa_id ON Catalog(NASA_ID)",
+        # Backfill databases created before the catalog existed.
+        catalog_insert_sql("NOT EXISTS (SELECT 1 FROM Catalog)"),
+    ]
+
+
+SCHEMA_EXTRAS.extend(_catalog_ddl())
+
+
+def refresh_derived_sql(image_ids):
+    """
+    Statements that rebuild the R*Trees, search documents and Catalog rows
+    of ``image_ids`` in one pass each (used by bulk loads).
+
+    Args:
+        image_ids (Iterable[int]): Image IDs to refresh.
+
+    Returns:
+        list[str]: SQL statements, to run inside the loading transaction.
+    """
+    ids = ", ".join(str(int(image_id)) for image_id in image_ids)
+    statements = []
+    for rtree, lat, lon in SPATIAL_INDEXES.values():
+        statements += [
+            f"DELETE FROM {rtree} WHERE image_id IN ({ids})",
+            _spatial_insert_sql(rtree, lat, lon, f"image_id IN ({ids})"),
+        ]
+    return statements + [
+        f"DELETE FROM {SEARCH_INDEX} WHERE rowid IN ({ids})",
+        _search_document_sql(f"i.image_id IN ({ids})"),
+        f"DELETE FROM Catalog WHERE ID IN ({ids})",
+        catalog_insert_sql(f"i.image_id IN ({ids})"),
+    ]
+
+
+for _statement in SCHEMA_EXTRAS:
+    event.listen(Base.metadata, "after_create", DDL(_statement))
@@ -0,0 +1,256 @@
+"""
+Database maintenance commands.
+
+Usage:
+    python db/maintenance.py rebuild-catalog
+    python db/maintenance.py rebuild-catalog --db-url sqlite:////path/to/metadata.db
+    python db/maintenance.py backfill-typed --workers 4
+    python db/maintenance.py shard --shard-dir /path/to/shards [--scheme mission]
+    python db/maintenance.py reconcile-manifest
+"""
+
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+from sqlalchemy import select, text
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+from db.Conversions import parse_number, storage_fields, typed_image_fields
+from db.Crud import MetadataCRUD
+from db.Engine import dispose_engines, get_engine
+from db.Manifest import reconcile
+from db.Shards import SHARD_SCHEMES, ShardedMetadataCRUD
+from db.Tables import CameraInformation, Image, ImageDetails, MapLocation
+from map.routes import DB_SHARD_DIR, DB_SHARD_SCHEME, DB_URL
+
+BACKFILL_CHUNK_SIZE = 50_000
+SHARD_BATCH_SIZE = 10_000
+
+_PENDING_IMAGES = text(
+    "SELECT image_id, nasa_id, resolution, date, time, path, "
+    "file_size IS NULL AND file_missing IS NULL FROM Image "
+    "WHERE image_id BETWEEN :first AND :last AND ("
+    "(width IS NULL AND resolution IS NOT NULL) "
+    "OR (date_int IS NULL AND date IS NOT NULL) "
+    "OR (time_sec IS NULL AND time IS NOT NULL) "
+    "OR mission IS NULL "
+    "OR (file_size IS NULL AND path IS NOT NULL AND file_missing IS NULL))"
+)
+_PENDING_CAMERAS = text(
+    "SELECT image_id, tilt FROM CameraInformation "
+    "WHERE image_id BETWEEN :first AND :last "
+    "AND tilt_deg IS NULL AND tilt IS NOT NULL"
+)
+_SHARD_RECORDS = (
+    select(
+        Image.nasa_id,
+        Image.date,
+        Image.time,
+        Image.resolution,
+        Image.path,
+        Image.file_size,
+        ImageDetails.features,
+        ImageDetails.sun_elevation,
+        ImageDetails.sun_azimuth,
+        ImageDetails.cloud_cover,
+        MapLocation.nadir_lat,
+        MapLocation.nadir_lon,
+        MapLocation.center_lat,
+        MapLocation.center_lon,
+        MapLocation.nadir_center,
+        MapLocation.altitude,
+        CameraInformation.camera,
+        CameraInformation.focal_length,
+        CameraInformation.tilt,
+        CameraInformation.format,
+        CameraInformation.camera_metadata,
+    )
+    .outerjoin(ImageDetails, ImageDetails.image_id == Image.image_id)
+    .outerjoin(MapLocation, MapLocation.image_id == Image.image_id)
+    .outerjoin(CameraInformation, CameraInformation.image_id == Image.image_id)
+    .order_by(Image.image_id)
+)
+_UPDATE_IMAGE = text(
+    "UPDATE Image SET width = :width, height = :height, "
+    "date_int = :date_int, time_sec = :time_sec, mission = :mission, "
+    "file_format = :file_format, file_size = COALESCE(file_size, :file_size), "
+    "file_missing = COALESCE(file_missing, :file_missing) "
+    "WHERE image_id = :image_id"
+)
+_UPDATE_CAMERA = text(
+    "UPDATE CameraInformation SET tilt_deg = :tilt_deg WHERE image_id = :image_id"
+)
+
+
+def rebuild_catalog(db_url):
+    """Repopulate the Catalog table and report how long it took."""
+    crud = MetadataCRUD(db_url)
+    try:
+        start = time.perf_counter()
+        total = crud.rebuild_catalog()
+        print(f"Catalog rebuilt: {total} rows in {time.perf_counter() - start:.2f}s")
+    finally:
+        crud.close_session()
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path) if path else None
+    except OSError:
+        return None
+
+
+def _typed_values(db_url, first, last):
+    """Worker: parse the typed columns for one image_id range (read only)."""
+    with get_engine(db_url).connect() as conn:
+        bounds = {"first": first, "last": last}
+        images = []
+        for image_id, nasa_id, resolution, date, time_, path, unsized in conn.execute(
+            _PENDING_IMAGES, bounds
+        ):
+            # Only stat files with no recorded size that are not already flagged
+            size = _file_size(path) if unsized else None
+            images.append(
+                {
+                    "image_id": image_id,
+                    **typed_image_fields(resolution, date, time_),
+                    **storage_fields(nasa_id, path, size),
+                    "file_missing": 1 if unsized and path and size is None else None,
+                }
+            )
+        cameras = [
+            {"image_id": image_id, "tilt_deg": parse_number(tilt)}
+            for image_id, tilt in conn.execute(_PENDING_CAMERAS, bounds)
+        ]
+    return images, [c for c in cameras if c["tilt_deg"] is not None]
+
+
+def backfill_typed(db_url, workers=None, chunk_size=BACKFILL_CHUNK_SIZE):
+    """
+    Fill width/height, date_int, time_sec, the storage columns (mission,
+    file_format, file_size) and tilt_deg on existing rows.
+
+    File sizes are read with os.stat on the stored path, only for rows with
+    no recorded size; a known size is never overwritten. Missing files keep
+    a NULL size and are flagged with file_missing, so later runs do not stat
+    them again (a new path clears the flag).
+
+    Parsing runs on a process pool, one image_id range per task; the parent
+    process writes each range back in a single transaction (SQLite has one
+    writer at a time anyway).
+    """
+    with get_engine(db_url).connect() as conn:
+        first, last = conn.execute(
+            text("SELECT MIN(image_id), MAX(image_id) FROM Image")
+        ).one()
+    if first is None:
+        print("Backfill: no images")
+        return
+
+    starts = list(range(first, last + 1, chunk_size))
+    ends = [min(start + chunk_size - 1, last) for start in starts]
+
+    # Pooled connections must not be inherited by forked workers.
+    dispose_engines()
+
+    start_time = time.perf_counter()
+    image_total = camera_total = 0
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = pool.map(_typed_values, repeat(db_url), starts, ends)
+        for (images, cameras), end in zip(results, ends):
+            with get_engine(db_url).begin() as conn:
+                if images:
+                    conn.execute(_UPDATE_IMAGE, images)
+                if cameras:
+                    conn.execute(_UPDATE_CAMERA, cameras)
+            image_total += len(images)
+            camera_total += len(cameras)
+            print(f"Backfill: up to image_id {end}/{last}")
+
+    print(
+        f"Backfill done: {image_total} images, {camera_total} camera rows "
+        f"in {time.perf_counter() - start_time:.2f}s"
+    )
+
+
+def shard_database(db_url, shard_dir=DB_SHARD_DIR, scheme=DB_SHARD_SCHEME):
+    """
+    Copy a single-file database into year (or mission) shards.
+
+    Records are streamed in SHARD_BATCH_SIZE batches and written with the
+    shards' bulk insert, so rerunning after an interruption only copies
+    what is missing. The source database is left untouched; point
+    DB_SHARD_DIR at ``shard_dir`` once the copy is complete.
+    """
+    sharded = ShardedMetadataCRUD(shard_dir, scheme)
+    start = time.perf_counter()
+    written = skipped = 0
+    try:
+        with get_engine(db_url).connect() as conn:
+            result = conn.execution_options(yield_per=SHARD_BATCH_SIZE).execute(
+                _SHARD_RECORDS
+            )
+            for rows in result.partitions():
+                batch_written, batch_skipped = sharded.bulk_insert_metadata(
+                    [dict(row._mapping) for row in rows]
+                )
+                written += batch_written
+                skipped += batch_skipped
+                print(f"Shard: {written} written, {skipped} skipped")
+        print(
+            f"Sharded into {len(sharded.shard_keys())} files in {shard_dir} "
+            f"in {time.perf_counter() - start:.2f}s"
+        )
+    finally:
+        sharded.close_session()
+
+
+def reconcile_manifest(db_url):
+    """Re-check the download manifest against disk and report the changes."""
+    start = time.perf_counter()
+    counts = reconcile(db_url)
+    print(
+        f"Manifest reconciled: {counts['checked']} files in {counts['folders']} folders, "
+        f"{counts['missing']} missing, {counts['restored']} restored, "
+        f"{counts['resized']} resized in {time.perf_counter() - start:.2f}s"
+    )
+
+
+COMMANDS = {
+    "rebuild-catalog": rebuild_catalog,
+    "backfill-typed": backfill_typed,
+    "shard": shard_database,
+    "reconcile-manifest": reconcile_manifest,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Database maintenance commands")
+    parser.add_argument("command", choices=sorted(COMMANDS))
+    parser.add_argument("--db-url", default=DB_URL, help="Database connection URL")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (backfill-typed)"
+    )
+    parser.add_argument(
+        "--shard-dir", default=DB_SHARD_DIR, help="Shard directory (shard)"
+    )
+    parser.add_argument(
+        "--scheme", choices=SHARD_SCHEMES, default=DB_SHARD_SCHEME, help="Shard key (shard)"
+    )
+    args = parser.parse_args()
+    if args.command == "backfill-typed":
+        backfill_typed(args.db_url, workers=args.workers)
+    elif args.command == "shard":
+        if not args.shard_dir:
+            parser.error("shard needs --shard-dir or DB_SHARD_DIR")
+        shard_database(args.db_url, args.shard_dir, args.scheme)
+    else:
+        COMMANDS[args.command](args.db_url)
+
+
+if __name__ == "__main__":
+    main()
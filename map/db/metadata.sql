@@ -3,6 +3,13 @@ DROP TABLE IF EXISTS MapLocation;
 DROP TABLE IF EXISTS ImageDetails;
 DROP TABLE IF EXISTS Image;
 DROP VIEW IF EXISTS Metadatos;
+DROP TABLE IF EXISTS MapLocationCenterRTree;
+DROP TABLE IF EXISTS MapLocationNadirRTree;
+DROP TABLE IF EXISTS MetadataSearch;
+DROP TABLE IF EXISTS Catalog;
+DROP TABLE IF EXISTS BulkLoad;
+DROP TABLE IF EXISTS DownloadManifest;
+DROP TABLE IF EXISTS RetryQueue;
 
 CREATE TABLE Image (
     image_id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -10,7 +17,15 @@ CREATE TABLE Image (
     date DATE,
     time TIME,
     resolution VARCHAR(50),
-    path VARCHAR(255)
+    path VARCHAR(255),
+    width INTEGER,
+    height INTEGER,
+    date_int INTEGER,
+    time_sec INTEGER,
+    mission VARCHAR(20),
+    file_format VARCHAR(10),
+    file_size INTEGER,
+    file_missing INTEGER
 );
 
 CREATE TABLE ImageDetails (
@@ -42,6 +57,7 @@ CREATE TABLE CameraInformation (
     tilt VARCHAR(50),
     format VARCHAR(100),
     camera_metadata VARCHAR(50),
+    tilt_deg REAL,
     FOREIGN KEY (image_id) REFERENCES Image(image_id)
     ON DELETE CASCADE
 );
@@ -49,6 +65,202 @@ CREATE TABLE CameraInformation (
 CREATE INDEX idx_image_details ON ImageDetails(image_id);
 CREATE INDEX idx_map_location ON MapLocation(image_id);
 CREATE INDEX idx_camera_info ON CameraInformation(image_id);
+CREATE INDEX idx_image_keyset ON Image(date IS NULL, date, image_id);
+CREATE INDEX idx_image_size ON Image(width, height);
+CREATE INDEX idx_image_time_sec ON Image(time_sec);
+CREATE INDEX idx_camera_tilt_deg ON CameraInformation(tilt_deg);
+CREATE INDEX idx_image_date_size ON Image(date_int, file_size);
+CREATE INDEX idx_image_format_size ON Image(file_format, file_size);
+CREATE INDEX idx_image_mission_size ON Image(mission, file_format, file_size);
+CREATE INDEX idx_camera_camera ON CameraInformation(camera);
+
+-- Files written by the downloader; reruns, prepare and cleanup read it
+-- instead of stat-ing the NAS (see db/Manifest.py)
+CREATE TABLE DownloadManifest (
+    path VARCHAR PRIMARY KEY,
+    url VARCHAR NOT NULL,
+    nasa_id VARCHAR(100),
+    size INTEGER,
+    etag VARCHAR,
+    last_modified VARCHAR,
+    status VARCHAR(10) NOT NULL,
+    updated_at INTEGER,
+    verified_at INTEGER,
+    sha256 VARCHAR(64),
+    expected_size INTEGER
+);
+
+CREATE INDEX idx_manifest_url ON DownloadManifest(url);
+CREATE INDEX idx_manifest_nasa_id ON DownloadManifest(nasa_id);
+
+-- Failed downloads waiting for a retry pass with backoff (see db/RetryQueue.py)
+CREATE TABLE RetryQueue (
+    url VARCHAR PRIMARY KEY,
+    nasa_id VARCHAR(100),
+    metadata_json TEXT NOT NULL,
+    attempts INTEGER NOT NULL,
+    next_attempt_at INTEGER NOT NULL,
+    last_error VARCHAR,
+    status VARCHAR(10) NOT NULL,
+    updated_at INTEGER
+);
+
+CREATE INDEX idx_retry_due ON RetryQueue(status, next_attempt_at);
+
+-- Holds a row only inside a bulk-load transaction; the insert triggers below
+-- skip their work and the loader refreshes the derived tables per batch.
+CREATE TABLE BulkLoad (active INTEGER);
+
+-- R*Tree spatial indexes over MapLocation points (kept in sync by triggers)
+CREATE VIRTUAL TABLE MapLocationCenterRTree
+USING rtree(image_id, min_lat, max_lat, min_lon, max_lon);
+
+CREATE TRIGGER MapLocationCenterRTree_ai AFTER INSERT ON MapLocation
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    INSERT INTO MapLocationCenterRTree (image_id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.image_id, NEW.center_lat, NEW.center_lat, NEW.center_lon, NEW.center_lon
+    WHERE NEW.center_lat IS NOT NULL AND NEW.center_lon IS NOT NULL;
+END;
+
+CREATE TRIGGER MapLocationCenterRTree_au AFTER UPDATE OF center_lat, center_lon ON MapLocation
+BEGIN
+    DELETE FROM MapLocationCenterRTree WHERE image_id = OLD.image_id;
+    INSERT INTO MapLocationCenterRTree (image_id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.image_id, NEW.center_lat, NEW.center_lat, NEW.center_lon, NEW.center_lon
+    WHERE NEW.center_lat IS NOT NULL AND NEW.center_lon IS NOT NULL;
+END;
+
+CREATE TRIGGER MapLocationCenterRTree_ad AFTER DELETE ON MapLocation
+BEGIN
+    DELETE FROM MapLocationCenterRTree WHERE image_id = OLD.image_id;
+END;
+
+CREATE VIRTUAL TABLE MapLocationNadirRTree
+USING rtree(image_id, min_lat, max_lat, min_lon, max_lon);
+
+CREATE TRIGGER MapLocationNadirRTree_ai AFTER INSERT ON MapLocation
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    INSERT INTO MapLocationNadirRTree (image_id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.image_id, NEW.nadir_lat, NEW.nadir_lat, NEW.nadir_lon, NEW.nadir_lon
+    WHERE NEW.nadir_lat IS NOT NULL AND NEW.nadir_lon IS NOT NULL;
+END;
+
+CREATE TRIGGER MapLocationNadirRTree_au AFTER UPDATE OF nadir_lat, nadir_lon ON MapLocation
+BEGIN
+    DELETE FROM MapLocationNadirRTree WHERE image_id = OLD.image_id;
+    INSERT INTO MapLocationNadirRTree (image_id, min_lat, max_lat, min_lon, max_lon)
+    SELECT NEW.image_id, NEW.nadir_lat, NEW.nadir_lat, NEW.nadir_lon, NEW.nadir_lon
+    WHERE NEW.nadir_lat IS NOT NULL AND NEW.nadir_lon IS NOT NULL;
+END;
+
+CREATE TRIGGER MapLocationNadirRTree_ad AFTER DELETE ON MapLocation
+BEGIN
+    DELETE FROM MapLocationNadirRTree WHERE image_id = OLD.image_id;
+END;
+
+-- FTS5 full-text index over NASA ID, place, camera and format (rowid = image_id)
+CREATE VIRTUAL TABLE MetadataSearch USING fts5(
+    nasa_id, features, camera, format,
+    tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER MetadataSearch_image_ai AFTER INSERT ON Image
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_image_au AFTER UPDATE OF nasa_id ON Image
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_image_ad AFTER DELETE ON Image
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = OLD.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_details_ai AFTER INSERT ON ImageDetails
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_details_au AFTER UPDATE OF features ON ImageDetails
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_details_ad AFTER DELETE ON ImageDetails
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = OLD.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_camera_ai AFTER INSERT ON CameraInformation
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_camera_au AFTER UPDATE OF camera, format ON CameraInformation
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = NEW.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER MetadataSearch_camera_ad AFTER DELETE ON CameraInformation
+BEGIN
+    DELETE FROM MetadataSearch WHERE rowid = OLD.image_id;
+    INSERT INTO MetadataSearch (rowid, nasa_id, features, camera, format)
+    SELECT i.image_id, i.nasa_id, d.features, c.camera, c.format
+    FROM Image AS i
+    LEFT JOIN ImageDetails AS d ON d.image_id = i.image_id
+    LEFT JOIN CameraInformation AS c ON c.image_id = i.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
 
 CREATE VIEW Metadatos AS
 SELECT 
@@ -82,6 +294,272 @@ INNER JOIN
 INNER JOIN 
     CameraInformation AS ci ON i.image_id = ci.image_id;
 
+-- Denormalized copy of Metadatos, kept in sync by triggers (reads never join)
+CREATE TABLE Catalog (
+    ID INTEGER PRIMARY KEY,
+    IMAGEN VARCHAR,
+    NASA_ID VARCHAR,
+    FECHA DATE,
+    HORA TIME,
+    RESOLUCION VARCHAR,
+    NADIR_LAT FLOAT,
+    NADIR_LON FLOAT,
+    CENTER_LAT FLOAT,
+    CENTER_LON FLOAT,
+    NADIR_CENTER VARCHAR,
+    ALTITUD FLOAT,
+    LUGAR VARCHAR,
+    ELEVACION_SOL FLOAT,
+    AZIMUT_SOL FLOAT,
+    COBERTURA_NUBOSA FLOAT,
+    CAMARA VARCHAR,
+    LONGITUD_FOCAL FLOAT,
+    INCLINACION VARCHAR,
+    FORMATO VARCHAR,
+    CAMARA_METADATOS VARCHAR
+);
+
+CREATE INDEX idx_catalog_keyset ON Catalog(FECHA IS NULL, FECHA, ID);
+CREATE INDEX idx_catalog_camera ON Catalog(CAMARA, FECHA, ID);
+CREATE INDEX idx_catalog_center ON Catalog(CENTER_LAT, CENTER_LON);
+CREATE UNIQUE INDEX idx_catalog_nasa_id ON Catalog(NASA_ID);
+
+CREATE TRIGGER Catalog_Image_ai AFTER INSERT ON Image
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM Catalog WHERE ID = NEW.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_Image_au
+AFTER UPDATE OF image_id, path, nasa_id, date, time, resolution ON Image
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_Image_ad AFTER DELETE ON Image
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
+
+CREATE TRIGGER Catalog_MapLocation_ai AFTER INSERT ON MapLocation
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM Catalog WHERE ID = NEW.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_MapLocation_au
+AFTER UPDATE OF image_id, nadir_lat, nadir_lon, center_lat, center_lon, nadir_center, altitude ON MapLocation
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_MapLocation_ad AFTER DELETE ON MapLocation
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
+
+CREATE TRIGGER Catalog_ImageDetails_ai AFTER INSERT ON ImageDetails
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM Catalog WHERE ID = NEW.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_ImageDetails_au
+AFTER UPDATE OF image_id, features, sun_elevation, sun_azimuth, cloud_cover ON ImageDetails
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_ImageDetails_ad AFTER DELETE ON ImageDetails
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
+
+CREATE TRIGGER Catalog_CameraInformation_ai AFTER INSERT ON CameraInformation
+WHEN NOT EXISTS (SELECT 1 FROM BulkLoad)
+BEGIN
+    DELETE FROM Catalog WHERE ID = NEW.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_CameraInformation_au
+AFTER UPDATE OF image_id, camera, focal_length, tilt, format, camera_metadata ON CameraInformation
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = NEW.image_id;
+END;
+
+CREATE TRIGGER Catalog_CameraInformation_ad AFTER DELETE ON CameraInformation
+BEGIN
+    DELETE FROM Catalog WHERE ID = OLD.image_id;
+    INSERT OR REPLACE INTO Catalog (
+        ID, IMAGEN, NASA_ID, FECHA, HORA, RESOLUCION, NADIR_LAT,
+        NADIR_LON, CENTER_LAT, CENTER_LON, NADIR_CENTER, ALTITUD, LUGAR, ELEVACION_SOL,
+        AZIMUT_SOL, COBERTURA_NUBOSA, CAMARA, LONGITUD_FOCAL, INCLINACION, FORMATO, CAMARA_METADATOS
+    )
+    SELECT
+        i.image_id, i.path, i.nasa_id, i.date, i.time, i.resolution, ml.nadir_lat,
+        ml.nadir_lon, ml.center_lat, ml.center_lon, ml.nadir_center, ml.altitude, im.features, im.sun_elevation,
+        im.sun_azimuth, im.cloud_cover, ci.camera, ci.focal_length, ci.tilt, ci.format, ci.camera_metadata
+    FROM Image AS i
+    INNER JOIN MapLocation AS ml ON i.image_id = ml.image_id
+    INNER JOIN ImageDetails AS im ON i.image_id = im.image_id
+    INNER JOIN CameraInformation AS ci ON i.image_id = ci.image_id
+    WHERE i.image_id = OLD.image_id;
+END;
+
     
 -- ORDER BY i.image_id ASC;
 
@@ -1,6 +1,13 @@
 import os
 from dotenv import load_dotenv
 
+
+def _optional_float(name):
+    """Float value of env var ``name``, or None when it is unset or empty."""
+    value = os.getenv(name)
+    return float(value) if value else None
+
+
 # Load environment configuration
 PROJECT_ROOT = os.path.abspath(os.path.dirname(os.path.dirname(__file__)))
 ENV_FILE = os.path.join(PROJECT_ROOT, ".env")
@@ -19,6 +26,52 @@ IMAGE_PROCESSOR_PATH = os.path.join(BASE_DIR, "scripts", "imageProcessor.py")
 # SQLAlchemy-compatible URL
 DB_URL = f"sqlite:///{DB_PATH}"
 
+# Optional catalog sharding: one SQLite file per capture year ("year") or
+# mission ("mission") in DB_SHARD_DIR. Unset keeps the single metadata.db.
+DB_SHARD_DIR = os.getenv("DB_SHARD_DIR")
+DB_SHARD_SCHEME = os.getenv("DB_SHARD_SCHEME", "year")
+
+# Download backend: "aria2c" (one aria2c session per run), "aria2-rpc"
+# (persistent aria2c daemon driven over JSON-RPC) or "asyncio" (pure Python,
+# needs aiohttp)
+DOWNLOAD_BACKEND = os.getenv("DOWNLOAD_BACKEND", "aria2c")
+
+# Optional local staging: downloads land in DOWNLOAD_STAGING_DIR (local SSD)
+# and a parallel mover transfers finished files to the NAS. Staging disk use
+# is capped at DOWNLOAD_STAGING_MAX_GB.
+DOWNLOAD_STAGING_DIR = os.getenv("DOWNLOAD_STAGING_DIR")
+DOWNLOAD_STAGING_MAX_GB = float(os.getenv("DOWNLOAD_STAGING_MAX_GB", "50"))
+
+# Downloaded files are checked (size, JPEG markers, TIFF structure) before
+# they reach the database; set to 1 to also record their SHA-256.
+DOWNLOAD_VERIFY_SHA256 = os.getenv("DOWNLOAD_VERIFY_SHA256", "0") == "1"
+
+# Set to 1 to adjust concurrent downloads and split during a run from the
+# measured throughput, error/timeout rate and write latency (AIMD); by
+# default they stay fixed.
+DOWNLOAD_ADAPTIVE = os.getenv("DOWNLOAD_ADAPTIVE", "0") == "1"
+
+# Format selection at plan time (GeoTIFF vs JPEG). GeoTIFFs are only chosen
+# for images that pass the optional rules (cloud cover at most
+# GEOTIFF_MAX_CLOUD_COVER %, sun elevation at least GEOTIFF_MIN_SUN_ELEVATION
+# degrees, so night passes can stay JPEG) and while the planned total stays
+# under DOWNLOAD_BUDGET_GB. DOWNLOAD_PLAN_HEAD=1 asks the server for sizes
+# the API does not give.
+DOWNLOAD_BUDGET_GB = _optional_float("DOWNLOAD_BUDGET_GB")
+GEOTIFF_MAX_CLOUD_COVER = _optional_float("GEOTIFF_MAX_CLOUD_COVER")
+GEOTIFF_MIN_SUN_ELEVATION = _optional_float("GEOTIFF_MIN_SUN_ELEVATION")
+DOWNLOAD_PLAN_HEAD = os.getenv("DOWNLOAD_PLAN_HEAD", "0") == "1"
+
+# Workflow mode: 1 streams images through download, verification,
+# preparation and database write in small batches instead of running each
+# phase over the whole run; rows reach the catalog while downloads continue.
+WORKFLOW_PIPELINE = os.getenv("WORKFLOW_PIPELINE", "0") == "1"
+
+# A failed batch run keeps everything it completed and queues the failed
+# URLs for retry; set to 1 to roll back the whole run instead (delete its
+# records and files).
+ISS_ROLLBACK_ON_FAILURE = os.getenv("ISS_ROLLBACK_ON_FAILURE", "0") == "1"
+
 # NAS configuration - read from .env or use defaults
 NAS_MOUNT = os.getenv("NAS_MOUNT", "/mnt/nas_local")
 NAS_PATH = os.getenv("NAS_PATH", os.path.join(NAS_MOUNT, "DATOS API ISS"))
@@ -0,0 +1,484 @@
+# ==========================================
+# DESCARGAS CON DAEMON ARIA2C VÍA JSON-RPC
+# ==========================================
+"""
+Backend de descarga con un único aria2c persistente (--enable-rpc).
+
+Las URLs se envían con aria2.addUri (dir=/out= por entrada) y el progreso
+sale del estado que reporta aria2 por RPC: bytes exactos, velocidad y estado
+por archivo, sin parsear la salida de consola.
+
+Con un ControladorAIMD (concurrency.py) las URLs se encolan por ventanas:
+el daemon solo tiene RPC_VENTANA_POR_CONEXION * conexiones descargas
+pendientes, y las nuevas se añaden con el split vigente, de modo que los
+ajustes del controlador se aplican durante la ejecución.
+
+Prueba local (servidor HTTP local + aria2c local):
+
+    python aria2_rpc.py --selftest
+"""
+
+import argparse
+import atexit
+import functools
+import http.server
+import itertools
+import json
+import os
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+
+#  IMPORTAR LOG_CUSTOM
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from log import log_custom
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
+
+# Segundos entre consultas de estado al daemon
+RPC_POLL_INTERVAL = 1.0
+# Llamadas por system.multicall al encolar URLs
+RPC_ADD_CHUNK = 500
+# Resultados terminados leídos por consulta (aria2.tellStopped)
+RPC_STOPPED_CHUNK = 1000
+RPC_STARTUP_TIMEOUT = 10
+# Con controlador: descargas pendientes en el daemon por conexión
+RPC_VENTANA_POR_CONEXION = 2
+# errorCode de aria2 que indican congestión: 2 = timeout, 6 = error de red
+RPC_TIMEOUT_CODES = {"2"}
+RPC_NETWORK_CODES = {"6"}
+
+STATUS_KEYS = [
+    "gid",
+    "status",
+    "totalLength",
+    "completedLength",
+    "downloadSpeed",
+    "errorCode",
+    "errorMessage",
+]
+
+
+class Aria2RPCError(Exception):
+    """Error devuelto por aria2 en una llamada JSON-RPC."""
+
+
+class Aria2RPC:
+    """
+    Cliente JSON-RPC mínimo (HTTP POST a /jsonrpc) para aria2c.
+
+    Args:
+        url (str): Endpoint, p. ej. "http://127.0.0.1:6800/jsonrpc".
+        secret (str, optional): Valor de --rpc-secret.
+        timeout (float): Timeout HTTP por llamada.
+    """
+
+    def __init__(self, url, secret=None, timeout=30):
+        self.url = url
+        self.secret = secret
+        self.timeout = timeout
+        self._ids = itertools.count(1)
+
+    def _params(self, params):
+        return [f"token:{self.secret}", *params] if self.secret else list(params)
+
+    def _request(self, method, params):
+        payload = {
+            "jsonrpc": "2.0",
+            "id": next(self._ids),
+            "method": method,
+            "params": params,
+        }
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(payload).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = json.load(response)
+        except urllib.error.HTTPError as e:
+            # aria2 responde los errores RPC con HTTP 400 y el error en el cuerpo
+            body = json.load(e)
+        if "error" in body:
+            raise Aria2RPCError(body["error"].get("message", str(body["error"])))
+        return body["result"]
+
+    def call(self, method, *params):
+        """Llamar a un método aria2.* (el token se añade automáticamente)."""
+        return self._request(method, self._params(params))
+
+    def multicall(self, calls):
+        """
+        Varias llamadas en una sola petición (system.multicall).
+
+        Args:
+            calls (list[tuple[str, list]]): Pares (método, parámetros).
+
+        Returns:
+            list: Resultado de cada llamada, o Aria2RPCError si falló.
+        """
+        if not calls:
+            return []
+        results = self._request(
+            "system.multicall",
+            [[{"methodName": m, "params": self._params(p)} for m, p in calls]],
+        )
+        return [
+            r[0] if isinstance(r, list) else Aria2RPCError(r.get("message", str(r)))
+            for r in results
+        ]
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class Aria2Daemon:
+    """
+    Proceso aria2c persistente con RPC solo en localhost.
+
+    Args:
+        options (list[str]): Opciones globales de aria2c (--split, --timeout...).
+        executable (str): Binario de aria2c.
+    """
+
+    def __init__(self, options=(), executable="aria2c"):
+        self.options = list(options)
+        self.executable = executable
+        self.process = None
+        self.rpc = None
+
+    @property
+    def running(self):
+        return self.process is not None and self.process.poll() is None
+
+    def start(self):
+        if self.running:
+            return self
+        port = _free_port()
+        secret = secrets.token_hex(16)
+        command = [
+            self.executable,
+            "--enable-rpc",
+            "--rpc-listen-all=false",
+            f"--rpc-listen-port={port}",
+            f"--rpc-secret={secret}",
+            "--rpc-max-request-size=64M",
+            "--console-log-level=warn",
+            *self.options,
+        ]
+        self.process = subprocess.Popen(
+            command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+        self.rpc = Aria2RPC(f"http://127.0.0.1:{port}/jsonrpc", secret)
+
+        deadline = time.time() + RPC_STARTUP_TIMEOUT
+        while True:
+            try:
+                version = self.rpc.call("aria2.getVersion")["version"]
+                break
+            except (OSError, Aria2RPCError):
+                if not self.running or time.time() > deadline:
+                    self.shutdown()
+                    raise RuntimeError("No se pudo iniciar aria2c con --enable-rpc")
+                time.sleep(0.1)
+
+        log_custom(
+            section="Descarga RPC",
+            message=f"Daemon aria2c {version} escuchando en 127.0.0.1:{port}",
+            level="INFO",
+            file=LOG_FILE,
+        )
+        return self
+
+    def shutdown(self):
+        if self.process is None:
+            return
+        try:
+            if self.running:
+                self.rpc.call("aria2.shutdown")
+            self.process.wait(timeout=5)
+        except (OSError, Aria2RPCError, subprocess.TimeoutExpired):
+            self.process.kill()
+            self.process.wait()
+        self.process = None
+
+
+_daemon = None
+_daemon_lock = threading.Lock()
+
+
+def get_daemon(options=()):
+    """Daemon aria2c compartido por el proceso (se inicia al primer uso)."""
+    global _daemon
+    with _daemon_lock:
+        if _daemon is None:
+            _daemon = Aria2Daemon(options)
+            atexit.register(_daemon.shutdown)
+        if not _daemon.running:
+            _daemon.options = list(options) or _daemon.options
+            _daemon.start()
+        return _daemon
+
+
+def _formato_mb(num_bytes):
+    return f"{num_bytes / 1024 / 1024:.1f} MB"
+
+
+def _encolar(rpc, entradas, pendientes, terminados, opciones_uri):
+    """Añadir entradas al daemon (addUri en bloques de RPC_ADD_CHUNK)."""
+    for i in range(0, len(entradas), RPC_ADD_CHUNK):
+        chunk = entradas[i : i + RPC_ADD_CHUNK]
+        gids = rpc.multicall(
+            [
+                ("aria2.addUri", [[url], {**opciones_uri, "dir": folder, "out": filename}])
+                for url, folder, filename in chunk
+            ]
+        )
+        for (url, folder, filename), gid in zip(chunk, gids):
+            estado = {
+                "url": url,
+                "path": os.path.join(folder, filename),
+                "status": "waiting",
+                "total": 0,
+                "completed": 0,
+                "speed": 0,
+                "error": None,
+            }
+            if isinstance(gid, Aria2RPCError):
+                estado.update(status="error", error=str(gid))
+                terminados.append(estado)
+            else:
+                pendientes[gid] = estado
+
+
+def _opciones_controlador(controlador):
+    return {
+        "split": str(controlador.split),
+        "max-connection-per-server": str(min(16, controlador.split)),
+    }
+
+
+def descargar_con_rpc(
+    entradas, conexiones=32, opciones=(), intervalo=RPC_POLL_INTERVAL, controlador=None
+):
+    """
+    DESCARGAR ENTRADAS CON EL DAEMON ARIA2C
+
+    Cada consulta de estado es un solo system.multicall (tellActive +
+    tellStopped); los resultados terminados se retiran del daemon con
+    removeDownloadResult, así cada archivo se cuenta exactamente una vez.
+
+    Args:
+        entradas (list[tuple[str, str, str]]): (url, carpeta, nombre) por archivo.
+        conexiones (int): Descargas simultáneas (max-concurrent-downloads).
+        opciones (list[str]): Opciones globales al iniciar el daemon.
+        intervalo (float): Segundos entre consultas de estado.
+        controlador (ControladorAIMD, optional): Ajusta descargas simultáneas
+            y split durante la ejecución (empieza en sus valores).
+
+    Returns:
+        list[dict]: Estado final por archivo: url, path, status ("complete",
+        "error", "removed"), total, completed y error.
+    """
+    if not entradas:
+        return []
+
+    daemon = get_daemon(opciones)
+    rpc = daemon.rpc
+    if controlador is not None:
+        conexiones = controlador.conexiones
+    rpc.call("aria2.changeGlobalOption", {"max-concurrent-downloads": str(conexiones)})
+
+    pendientes = {}
+    terminados = []
+    cola = list(entradas)
+
+    def rellenar():
+        # Sin controlador se encola todo de una vez
+        if controlador is None:
+            hueco, opciones_uri = len(cola), {}
+        else:
+            hueco = controlador.conexiones * RPC_VENTANA_POR_CONEXION - len(pendientes)
+            opciones_uri = _opciones_controlador(controlador)
+        if hueco > 0 and cola:
+            _encolar(rpc, cola[:hueco], pendientes, terminados, opciones_uri)
+            del cola[:hueco]
+
+    rellenar()
+    total_archivos = len(entradas)
+    completados = sum(1 for e in terminados if e["status"] == "complete")
+    last_logged_progress = 0
+
+    log_custom(
+        section="Descarga RPC",
+        message=f"{len(pendientes)} descargas encoladas en el daemon (-j {conexiones})",
+        level="INFO",
+        file=LOG_FILE,
+    )
+
+    while pendientes or cola:
+        time.sleep(intervalo)
+        activos, detenidos = rpc.multicall(
+            [
+                ("aria2.tellActive", [STATUS_KEYS]),
+                ("aria2.tellStopped", [0, RPC_STOPPED_CHUNK, STATUS_KEYS]),
+            ]
+        )
+        if isinstance(activos, Aria2RPCError) or isinstance(detenidos, Aria2RPCError):
+            if not daemon.running:
+                raise RuntimeError("El daemon aria2c terminó durante la descarga")
+            continue
+
+        recibidos = 0
+        for status in activos:
+            estado = pendientes.get(status["gid"])
+            if estado is not None:
+                recibidos += int(status["completedLength"]) - estado["completed"]
+                estado.update(
+                    status=status["status"],
+                    total=int(status["totalLength"]),
+                    completed=int(status["completedLength"]),
+                    speed=int(status["downloadSpeed"]),
+                )
+
+        retirados = []
+        fallos_red = timeouts = 0
+        for status in detenidos:
+            estado = pendientes.pop(status["gid"], None)
+            if estado is None:
+                continue  # Resultado de otra ejecución que comparte el daemon
+            retirados.append(status["gid"])
+            recibidos += int(status["completedLength"]) - estado["completed"]
+            timeouts += status.get("errorCode") in RPC_TIMEOUT_CODES
+            fallos_red += status.get("errorCode") in RPC_NETWORK_CODES
+            estado.update(
+                status=status["status"],
+                total=int(status["totalLength"]),
+                completed=int(status["completedLength"]),
+                speed=0,
+            )
+            terminados.append(estado)
+            if status["status"] == "complete":
+                completados += 1
+            else:
+                estado["error"] = status.get("errorMessage") or status.get("errorCode")
+                log_custom(
+                    section="Descarga RPC",
+                    message=f"Error descargando {estado['url']}: {estado['error']}",
+                    level="ERROR",
+                    file=LOG_FILE,
+                )
+        rpc.multicall([("aria2.removeDownloadResult", [gid]) for gid in retirados])
+
+        if controlador is not None:
+            # Un 404 no es congestión: solo cuentan timeouts y errores de red
+            controlador.registrar(
+                bytes_=max(recibidos, 0),
+                completados=len(retirados) - fallos_red - timeouts,
+                errores=fallos_red,
+                timeouts=timeouts,
+            )
+            if controlador.tick():
+                rpc.call(
+                    "aria2.changeGlobalOption",
+                    {"max-concurrent-downloads": str(controlador.conexiones)},
+                )
+            rellenar()
+
+        #  PROGRESO REAL: archivos terminados, bytes y velocidad agregada
+        finalizados = len(terminados)
+        progress = int(finalizados / total_archivos * 100)
+        print(f"PROGRESS: {progress}", flush=True)
+
+        if progress - last_logged_progress >= 20 or not (pendientes or cola):
+            descargado = sum(e["completed"] for e in terminados) + sum(
+                e["completed"] for e in pendientes.values()
+            )
+            velocidad = sum(e["speed"] for e in pendientes.values())
+            log_custom(
+                section="Descarga RPC",
+                message=(
+                    f"Progreso: {progress}% ({completados}/{total_archivos} completos, "
+                    f"{finalizados - completados} con error) - {_formato_mb(descargado)} "
+                    f"descargados - {_formato_mb(velocidad)}/s"
+                ),
+                level="INFO",
+                file=LOG_FILE,
+            )
+            last_logged_progress = progress
+
+    return terminados
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def _selftest(total=20, size=2 * 1024 * 1024):
+    """Descargar archivos de un servidor HTTP local con el daemon aria2c local."""
+    origen = tempfile.mkdtemp(prefix="aria2_src_")
+    destino = tempfile.mkdtemp(prefix="aria2_dst_")
+    for i in range(total):
+        with open(os.path.join(origen, f"ISS000-E-{i:05d}.JPG"), "wb") as f:
+            f.write(os.urandom(size))
+
+    server = http.server.ThreadingHTTPServer(
+        ("127.0.0.1", 0), functools.partial(_QuietHandler, directory=origen)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    entradas = [
+        (
+            f"{base_url}/ISS000-E-{i:05d}.JPG",
+            os.path.join(destino, str(i % 3)),
+            f"ISS000-E-{i:05d}.JPG",
+        )
+        for i in range(total)
+    ]
+    entradas.append((f"{base_url}/no-existe.JPG", destino, "no-existe.JPG"))
+
+    try:
+        start = time.perf_counter()
+        resultados = descargar_con_rpc(entradas, conexiones=8, intervalo=0.2)
+        elapsed = time.perf_counter() - start
+        completos = [r for r in resultados if r["status"] == "complete"]
+        correctos = all(
+            os.path.getsize(r["path"]) == size == r["completed"] for r in completos
+        )
+        print(
+            f"{len(completos)}/{total} completos, "
+            f"{len(resultados) - len(completos)} con error (esperado 1), "
+            f"tamaños correctos: {correctos}, {elapsed:.2f}s"
+        )
+    finally:
+        server.shutdown()
+        if _daemon is not None:
+            _daemon.shutdown()
+        shutil.rmtree(origen, ignore_errors=True)
+        shutil.rmtree(destino, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Daemon aria2c vía JSON-RPC")
+    parser.add_argument(
+        "--selftest", action="store_true", help="Probar contra un servidor HTTP local"
+    )
+    args = parser.parse_args()
+    if args.selftest:
+        _selftest()
+    else:
+        parser.print_help()
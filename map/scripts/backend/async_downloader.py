@@ -0,0 +1,307 @@
+# ==========================================
+# DESCARGAS CON ASYNCIO (SIN BINARIOS EXTERNOS)
+# ==========================================
+"""
+Backend de descarga en Python puro: asyncio + aiohttp.
+
+- Concurrencia global (-j) y por host acotadas
+- Reanudación de archivos .part con HTTP Range
+- Escritura en disco por bloques grandes, fuera del event loop
+- Verificación de Content-Length antes de mover el .part al nombre final
+- Reintentos con backoff exponencial y jitter
+- Concurrencia ajustable en marcha por un ControladorAIMD (concurrency.py)
+
+Se activa con DOWNLOAD_BACKEND=asyncio (requiere ``pip install aiohttp``).
+"""
+
+import asyncio
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+#  IMPORTAR LOG_CUSTOM
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from log import log_custom
+from concurrency import AIMD_MAX_CONEXIONES
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
+
+# Bytes acumulados antes de cada escritura en disco
+ASYNC_CHUNK_SIZE = 8 * 1024 * 1024
+# Conexiones simultáneas al mismo host
+ASYNC_MAX_PER_HOST = 16
+ASYNC_MAX_TRIES = 5
+# Backoff: espera aleatoria en [0, min(MAX, BASE * 2^intento)] segundos
+ASYNC_BACKOFF_BASE = 1.0
+ASYNC_BACKOFF_MAX = 30.0
+# Sin datos durante este tiempo se aborta el intento (como --timeout de aria2c)
+ASYNC_READ_TIMEOUT = 45
+ASYNC_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+# Respuestas que merece la pena reintentar
+RETRYABLE_STATUS = {408, 425, 429, 500, 502, 503, 504}
+
+
+class DescargaIncompleta(Exception):
+    """Respuesta cortada o de tamaño distinto al anunciado (se reintenta)."""
+
+
+class DescargaFallida(Exception):
+    """Error definitivo (p. ej. HTTP 404): no se reintenta."""
+
+
+class LimiteAjustable:
+    """Semáforo asyncio cuyo límite puede cambiar con descargas en curso."""
+
+    def __init__(self, limite):
+        self.limite = limite
+        self._activos = 0
+        self._cond = asyncio.Condition()
+
+    async def __aenter__(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._activos < self.limite)
+            self._activos += 1
+
+    async def __aexit__(self, *exc):
+        async with self._cond:
+            self._activos -= 1
+            self._cond.notify_all()
+
+    async def ajustar(self, limite):
+        """Nuevo límite; al bajarlo, las descargas en curso terminan igualmente."""
+        async with self._cond:
+            self.limite = limite
+            self._cond.notify_all()
+
+
+def _total_desde_respuesta(response, offset):
+    """Tamaño final esperado según Content-Range / Content-Length."""
+    content_range = response.headers.get("Content-Range")
+    if response.status == 206 and content_range and "/" in content_range:
+        total = content_range.rsplit("/", 1)[1]
+        return int(total) if total.isdigit() else None
+    if response.content_length is not None:
+        return offset + response.content_length
+    return None
+
+
+async def _descargar_intento(session, url, path, chunk_size, controlador=None):
+    """
+    Un intento: reanuda el .part si existe; devuelve tamaño final, tamaño
+    anunciado (o None), ETag y Last-Modified.
+    """
+    part = path + ".part"
+    offset = os.path.getsize(part) if os.path.exists(part) else 0
+    headers = {"Range": f"bytes={offset}-"} if offset else {}
+
+    async with session.get(url, headers=headers) as response:
+        if response.status == 416 and offset:
+            # El .part no encaja con el recurso remoto: empezar de cero
+            os.remove(part)
+            raise DescargaIncompleta("Range no satisfacible, reiniciando")
+        if response.status in RETRYABLE_STATUS:
+            raise DescargaIncompleta(f"HTTP {response.status}")
+        if response.status not in (200, 206):
+            raise DescargaFallida(f"HTTP {response.status}")
+        if response.status == 200:
+            offset = 0  # El servidor ignoró el Range
+
+        total = _total_desde_respuesta(response, offset)
+        validadores = (response.headers.get("ETag"), response.headers.get("Last-Modified"))
+        with open(part, "ab" if offset else "wb") as f:
+            buffer = bytearray()
+            try:
+                async for data in response.content.iter_chunked(1024 * 1024):
+                    buffer += data
+                    if controlador is not None:
+                        controlador.registrar(bytes_=len(data))
+                    if len(buffer) >= chunk_size:
+                        await asyncio.to_thread(f.write, buffer)
+                        buffer = bytearray()
+            finally:
+                # También si la conexión se corta: el siguiente intento reanuda desde aquí
+                if buffer:
+                    await asyncio.to_thread(f.write, buffer)
+
+    size = os.path.getsize(part)
+    if total is not None and size != total:
+        raise DescargaIncompleta(f"{size} de {total} bytes")
+    os.replace(part, path)
+    return (size, total, *validadores)
+
+
+async def _descargar_archivo(session, entrada, semaforo, hosts, config, progreso):
+    url, folder, filename = entrada
+    path = os.path.join(folder, filename)
+    estado = {
+        "url": url,
+        "path": path,
+        "status": "error",
+        "completed": 0,
+        "total": None,
+        "etag": None,
+        "last_modified": None,
+        "error": None,
+    }
+    host = urlsplit(url).hostname
+    if host not in hosts:
+        hosts[host] = asyncio.Semaphore(config["por_host"])
+
+    # Primero el cupo del host: una tarea en espera de su host no ocupa cupo global
+    controlador = config["controlador"]
+    async with hosts[host], semaforo:
+        for intento in range(1, config["max_tries"] + 1):
+            try:
+                (
+                    estado["completed"],
+                    estado["total"],
+                    estado["etag"],
+                    estado["last_modified"],
+                ) = await _descargar_intento(
+                    session, url, path, config["chunk_size"], controlador
+                )
+                estado["status"] = "complete"
+                if controlador is not None:
+                    controlador.registrar(completados=1)
+                break
+            except DescargaFallida as e:
+                estado["error"] = str(e)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError, DescargaIncompleta) as e:
+                estado["error"] = str(e) or type(e).__name__
+                if controlador is not None:
+                    # Cada intento fallido es una señal de congestión
+                    es_timeout = isinstance(e, asyncio.TimeoutError)
+                    controlador.registrar(timeouts=int(es_timeout), errores=int(not es_timeout))
+                if intento == config["max_tries"]:
+                    break
+                espera = random.uniform(
+                    0, min(ASYNC_BACKOFF_MAX, ASYNC_BACKOFF_BASE * 2**intento)
+                )
+                await asyncio.sleep(espera)
+
+    if estado["status"] == "complete":
+        estado["error"] = None
+    else:
+        log_custom(
+            section="Descarga Async",
+            message=f"Error descargando {url}: {estado['error']}",
+            level="ERROR",
+            file=LOG_FILE,
+        )
+    progreso(estado)
+    return estado
+
+
+async def _descargar_todo(entradas, conexiones, por_host, config):
+    total_archivos = len(entradas)
+    start = time.perf_counter()
+    terminados = {"n": 0, "ok": 0, "bytes": 0, "logged": 0}
+
+    def progreso(estado):
+        terminados["n"] += 1
+        terminados["ok"] += estado["status"] == "complete"
+        terminados["bytes"] += estado["completed"]
+        progress = int(terminados["n"] / total_archivos * 100)
+        print(f"PROGRESS: {progress}", flush=True)
+        if progress - terminados["logged"] >= 20 or terminados["n"] == total_archivos:
+            elapsed = time.perf_counter() - start
+            velocidad = terminados["bytes"] / elapsed / 1024 / 1024 if elapsed else 0
+            log_custom(
+                section="Descarga Async",
+                message=(
+                    f"Progreso: {progress}% ({terminados['ok']}/{total_archivos} completos) - "
+                    f"{terminados['bytes'] / 1024 / 1024:.1f} MB - {velocidad:.1f} MB/s"
+                ),
+                level="INFO",
+                file=LOG_FILE,
+            )
+            terminados["logged"] = progress
+
+    controlador = config["controlador"]
+    if controlador is not None:
+        conexiones = controlador.conexiones
+    # Con controlador el límite real es el semáforo, que puede subir en marcha
+    limite_pool = AIMD_MAX_CONEXIONES if controlador is not None else conexiones
+    connector = aiohttp.TCPConnector(limit=limite_pool, limit_per_host=por_host)
+    timeout = aiohttp.ClientTimeout(total=None, sock_connect=30, sock_read=ASYNC_READ_TIMEOUT)
+    semaforo = LimiteAjustable(conexiones)
+    hosts = {}
+    # Una creación por carpeta, no por archivo
+    for folder in {folder for _, folder, _ in entradas}:
+        os.makedirs(folder, exist_ok=True)
+
+    async def ajustar_concurrencia():
+        while True:
+            await asyncio.sleep(controlador.intervalo)
+            if await asyncio.to_thread(controlador.evaluar):
+                await semaforo.ajustar(controlador.conexiones)
+
+    ajuste = asyncio.create_task(ajustar_concurrencia()) if controlador else None
+    try:
+        async with aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            headers={"User-Agent": ASYNC_USER_AGENT},
+            auto_decompress=False,
+        ) as session:
+            return await asyncio.gather(
+                *(
+                    _descargar_archivo(session, entrada, semaforo, hosts, config, progreso)
+                    for entrada in entradas
+                )
+            )
+    finally:
+        if ajuste is not None:
+            ajuste.cancel()
+
+
+def descargar_async(
+    entradas,
+    conexiones=32,
+    por_host=ASYNC_MAX_PER_HOST,
+    chunk_size=ASYNC_CHUNK_SIZE,
+    max_tries=ASYNC_MAX_TRIES,
+    controlador=None,
+):
+    """
+    DESCARGAR ENTRADAS CON ASYNCIO
+
+    Args:
+        entradas (list[tuple[str, str, str]]): (url, carpeta, nombre) por archivo.
+        conexiones (int): Descargas simultáneas en total.
+        por_host (int): Descargas simultáneas por host.
+        chunk_size (int): Bytes por escritura en disco.
+        max_tries (int): Intentos por archivo.
+        controlador (ControladorAIMD, optional): Ajusta las descargas
+            simultáneas durante la ejecución (empieza en sus ``conexiones``).
+
+    Returns:
+        list[dict]: Estado final por archivo: url, path, status ("complete" o
+        "error"), completed (tamaño final en bytes), total (Content-Length
+        anunciado, o None), etag, last_modified
+        (cabeceras de la respuesta, para el manifiesto de descargas) y error.
+
+    Raises:
+        ImportError: Si aiohttp no está instalado.
+    """
+    if aiohttp is None:
+        raise ImportError("DOWNLOAD_BACKEND=asyncio requiere aiohttp: pip install aiohttp")
+    if not entradas:
+        return []
+    config = {
+        "por_host": por_host,
+        "chunk_size": chunk_size,
+        "max_tries": max_tries,
+        "controlador": controlador,
+    }
+    return asyncio.run(_descargar_todo(entradas, conexiones, por_host, config))
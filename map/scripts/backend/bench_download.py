@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE DESCARGA
+Compara el backend asyncio con aria2c (sesión por lote) contra un servidor
+HTTP local con soporte de Range que sirve archivos del tamaño de un GeoTIFF.
+
+Uso:
+    python bench_download.py                          # 4 archivos de 300 MB
+    python bench_download.py --files 8 --size-mb 200 --conexiones 8
+"""
+
+import argparse
+import contextlib
+import functools
+import http.server
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+
+from async_downloader import descargar_async
+
+
+class RangeHandler(http.server.SimpleHTTPRequestHandler):
+    """SimpleHTTPRequestHandler con respuestas 206 a ``Range: bytes=N-``."""
+
+    def log_message(self, *args):
+        pass
+
+    def send_head(self):
+        header = self.headers.get("Range")
+        path = self.translate_path(self.path)
+        if not header or not header.startswith("bytes=") or not os.path.isfile(path):
+            return super().send_head()
+
+        size = os.path.getsize(path)
+        start = int(header[len("bytes=") :].split("-", 1)[0] or 0)
+        if start >= size:
+            self.send_error(416)
+            return None
+        f = open(path, "rb")
+        f.seek(start)
+        self.send_response(206)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+        self.send_header("Content-Length", str(size - start))
+        self.end_headers()
+        return f
+
+    def copyfile(self, source, outputfile):
+        shutil.copyfileobj(source, outputfile, 4 * 1024 * 1024)
+
+
+def preparar_origen(folder, files, size):
+    bloque = os.urandom(4 * 1024 * 1024)
+    nombres = []
+    for i in range(files):
+        nombre = f"ISS000-E-{i:05d}.tif"
+        with open(os.path.join(folder, nombre), "wb") as f:
+            for _ in range(size // len(bloque)):
+                f.write(bloque)
+            f.write(bloque[: size % len(bloque)])
+        nombres.append(nombre)
+    return nombres
+
+
+def descargar_aria2c(entradas, conexiones, folder):
+    """Misma sesión que imageProcessor: -i con dir=/out= por entrada"""
+    lista = os.path.join(folder, "urls.txt")
+    with open(lista, "w") as f:
+        for url, destino, nombre in entradas:
+            f.write(f"{url}\n  dir={destino}\n  out={nombre}\n")
+    command = [
+        "aria2c",
+        "-i",
+        lista,
+        "-j",
+        str(conexiones),
+        "--max-connection-per-server=16",
+        "--min-split-size=1M",
+        "--split=32",
+        "--file-allocation=none",
+        "--disk-cache=32M",
+        "--console-log-level=warn",
+        "--summary-interval=0",
+    ]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL)
+
+
+def _silencioso(func, *args):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return func(*args)
+
+
+def medir(nombre, func, total_bytes):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    rate = total_bytes / elapsed / 1024 / 1024 if elapsed > 0 else 0
+    print(f"{nombre:<28} {total_bytes / 1024 / 1024:>8.0f} MB en {elapsed:7.2f}s -> {rate:8.1f} MB/s")
+    return rate
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--files", type=int, default=4)
+    parser.add_argument("--size-mb", type=int, default=300)
+    parser.add_argument("--conexiones", type=int, default=32)
+    args = parser.parse_args()
+
+    size = args.size_mb * 1024 * 1024
+    total_bytes = size * args.files
+
+    with tempfile.TemporaryDirectory() as tmp:
+        origen = os.path.join(tmp, "origen")
+        os.makedirs(origen)
+        nombres = preparar_origen(origen, args.files, size)
+
+        server = http.server.ThreadingHTTPServer(
+            ("127.0.0.1", 0), functools.partial(RangeHandler, directory=origen)
+        )
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+        def entradas(destino):
+            return [(f"{base_url}/{n}", destino, n) for n in nombres]
+
+        def verificar(destino):
+            ok = all(
+                os.path.getsize(os.path.join(destino, n)) == size for n in nombres
+            )
+            print(f"{'':<28} tamaños correctos: {ok}")
+
+        try:
+            destino = os.path.join(tmp, "asyncio")
+            rate_async = medir(
+                "asyncio (aiohttp)",
+                lambda: _silencioso(descargar_async, entradas(destino), args.conexiones),
+                total_bytes,
+            )
+            verificar(destino)
+
+            # Reanudación: .part a medias de cada archivo
+            destino = os.path.join(tmp, "asyncio_resume")
+            os.makedirs(destino)
+            for n in nombres:
+                with open(os.path.join(origen, n), "rb") as src, open(
+                    os.path.join(destino, n + ".part"), "wb"
+                ) as dst:
+                    dst.write(src.read(size // 2))
+            medir(
+                "asyncio reanudando .part",
+                lambda: _silencioso(descargar_async, entradas(destino), args.conexiones),
+                total_bytes // 2,
+            )
+            verificar(destino)
+
+            if shutil.which("aria2c"):
+                destino = os.path.join(tmp, "aria2c")
+                rate_aria = medir(
+                    "aria2c (sesión por lote)",
+                    lambda: descargar_aria2c(entradas(destino), args.conexiones, tmp),
+                    total_bytes,
+                )
+                verificar(destino)
+                print(f"asyncio vs aria2c: x{rate_async / rate_aria:.2f}")
+            else:
+                print("aria2c no está instalado: comparación omitida")
+        finally:
+            server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
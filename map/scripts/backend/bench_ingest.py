@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+BENCHMARK DE INGESTA SQLITE
+Compara la ruta por registro (create_* + commit por tabla) con
+MetadataCRUD.bulk_insert_metadata sobre registros sintéticos.
+
+Uso:
+    python bench_ingest.py                      # 100k registros, legacy sobre 5k
+    python bench_ingest.py --records 20000 --legacy-records 2000 --batch-size 1000
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+from datetime import date, time as dtime, timedelta
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+sys.path.append(
+    os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+)
+from db.Crud import MetadataCRUD
+from db.Engine import dispose_engines
+
+
+def generar_registros(total, seed=42):
+    """Generar registros preparados con la misma forma que _prepare_data_from_organized_files"""
+    rnd = random.Random(seed)
+    base_date = date(2000, 1, 1)
+    records = []
+    for i in range(total):
+        mission = f"ISS{(i // 10000) % 80:03d}"
+        records.append(
+            {
+                "nasa_id": f"{mission}-E-{i:07d}",
+                "date": base_date + timedelta(days=rnd.randint(0, 9000)),
+                "time": dtime(rnd.randint(0, 23), rnd.randint(0, 59), rnd.randint(0, 59)),
+                "resolution": "8256 x 5504 pixels",
+                "path": f"/mnt/nas/DATOS API ISS/2024/{mission}/Nikon_D5/{mission}-E-{i:07d}.JPG",
+                "features": "PANAMA CITY",
+                "sun_elevation": rnd.uniform(-90, 90),
+                "sun_azimuth": rnd.uniform(0, 360),
+                "cloud_cover": rnd.uniform(0, 100),
+                "nadir_lat": rnd.uniform(-51.6, 51.6),
+                "nadir_lon": rnd.uniform(-180, 180),
+                "center_lat": rnd.uniform(-51.6, 51.6),
+                "center_lon": rnd.uniform(-180, 180),
+                "nadir_center": "Oblique",
+                "altitude": rnd.uniform(400, 430),
+                "camera": "Nikon D5 Digital Still Camera",
+                "focal_length": 400.0,
+                "tilt": "NV",
+                "format": "Digital: Digital",
+                "camera_metadata": None,
+                "url": None,
+                "file_size": rnd.randint(2_000_000, 40_000_000),
+            }
+        )
+    return records
+
+
+def ingesta_legacy(crud, records):
+    """Ruta previa: comprobación de existencia y cuatro commits por imagen"""
+    from db.Tables import Image
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        for item in records:
+            if crud.session.query(
+                crud.session.query(Image).filter_by(nasa_id=item["nasa_id"]).exists()
+            ).scalar():
+                continue
+            image = crud.create_image(
+                nasa_id=item["nasa_id"],
+                date=item["date"],
+                time=item["time"],
+                resolution=item["resolution"],
+                path=item["path"],
+            )
+            crud.create_image_details(
+                image_id=image.image_id,
+                features=item["features"],
+                sun_elevation=item["sun_elevation"],
+                sun_azimuth=item["sun_azimuth"],
+                cloud_cover=item["cloud_cover"],
+            )
+            crud.create_map_location(
+                image_id=image.image_id,
+                nadir_lat=item["nadir_lat"],
+                nadir_lon=item["nadir_lon"],
+                center_lat=item["center_lat"],
+                center_lon=item["center_lon"],
+                nadir_center=item["nadir_center"],
+                altitude=item["altitude"],
+            )
+            crud.create_camera_information(
+                image_id=image.image_id,
+                camera=item["camera"],
+                focal_length=item["focal_length"],
+                tilt=item["tilt"],
+                format=item["format"],
+                camera_metadata=item["camera_metadata"],
+            )
+
+
+def ingesta_bulk(crud, records, batch_size):
+    written = skipped = 0
+    for i in range(0, len(records), batch_size):
+        w, s = crud.bulk_insert_metadata(records[i : i + batch_size])
+        written += w
+        skipped += s
+    return written, skipped
+
+
+def medir(nombre, func, total):
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    rate = total / elapsed if elapsed > 0 else 0
+    print(f"{nombre:<28} {total:>8} registros en {elapsed:8.2f}s -> {rate:10.0f} reg/s")
+    return rate, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument(
+        "--legacy-records",
+        type=int,
+        default=5_000,
+        help="Muestra para la ruta legacy (4 commits por registro)",
+    )
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    records = generar_registros(args.records)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy_db = MetadataCRUD(f"sqlite:///{os.path.join(tmp, 'legacy.db')}")
+        sample = records[: args.legacy_records]
+        legacy_rate, _ = medir(
+            "Legacy (por registro)", lambda: ingesta_legacy(legacy_db, sample), len(sample)
+        )
+        legacy_db.close_session()
+
+        bulk_db = MetadataCRUD(f"sqlite:///{os.path.join(tmp, 'bulk.db')}")
+        bulk_rate, (written, _) = medir(
+            f"Bulk (lotes de {args.batch_size})",
+            lambda: ingesta_bulk(bulk_db, records, args.batch_size),
+            len(records),
+        )
+
+        # Segunda pasada: todo existe, solo se mide la deduplicación
+        rerun_rate, (_, skipped) = medir(
+            "Bulk re-ejecución (dedupe)",
+            lambda: ingesta_bulk(bulk_db, records, args.batch_size),
+            len(records),
+        )
+        bulk_db.close_session()
+        dispose_engines()
+
+    print(f"Escritos: {written}, omitidos en re-ejecución: {skipped}")
+    if legacy_rate:
+        print(f"Aceleración bulk vs legacy: x{bulk_rate / legacy_rate:.1f}")
+
+
+if __name__ == "__main__":
+    main()
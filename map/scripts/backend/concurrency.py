@@ -0,0 +1,184 @@
+# ==========================================
+# CONTROL ADAPTATIVO DE CONCURRENCIA (AIMD)
+# ==========================================
+"""
+Ajuste de las descargas simultáneas y del split durante una ejecución.
+
+Cada AIMD_INTERVALO segundos el controlador mira lo ocurrido en el
+intervalo: throughput, tasa de errores/timeouts de red y latencia de
+escritura en la carpeta de destino (write + fsync de una sonda pequeña).
+
+- Congestión (errores, timeouts o latencia por encima del umbral):
+  reducción multiplicativa de conexiones y split (x AIMD_FACTOR)
+- Sin congestión y el último aumento mejoró el throughput: aumento aditivo
+- Sin congestión pero sin mejora: se mantiene; cada AIMD_SONDEO
+  intervalos estables se vuelve a probar un aumento
+
+Cada decisión se registra en el log con sus métricas para poder ajustar
+los límites.
+"""
+
+import os
+import sys
+import threading
+import time
+
+#  IMPORTAR LOG_CUSTOM
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from log import log_custom
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
+
+AIMD_INTERVALO = 5.0
+AIMD_MIN_CONEXIONES = 4
+AIMD_MAX_CONEXIONES = 64
+AIMD_MIN_SPLIT = 2
+AIMD_MAX_SPLIT = 32
+AIMD_INCREMENTO = 2
+AIMD_FACTOR = 0.5
+# Umbrales de congestión por intervalo
+AIMD_ERROR_MAX = 0.05
+AIMD_LATENCIA_MAX = 0.5
+# Mejora mínima de throughput para seguir aumentando
+AIMD_MEJORA_MIN = 0.05
+# Intervalos estables antes de volver a probar un aumento
+AIMD_SONDEO = 6
+
+SONDA_BYTES = 64 * 1024
+SONDA_NOMBRE = ".latency_probe"
+
+
+def medir_latencia_escritura(folder):
+    """
+    Segundos en escribir y sincronizar una sonda de SONDA_BYTES en ``folder``.
+
+    Returns:
+        float | None: Latencia, o None si no se pudo escribir.
+    """
+    path = os.path.join(folder, SONDA_NOMBRE)
+    try:
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            f.write(b"\0" * SONDA_BYTES)
+            f.flush()
+            os.fsync(f.fileno())
+        latencia = time.perf_counter() - start
+        os.remove(path)
+        return latencia
+    except OSError:
+        return None
+
+
+class ControladorAIMD:
+    """
+    Controlador AIMD de conexiones simultáneas y split.
+
+    Los backends informan con registrar() (desde cualquier hilo) y llaman a
+    tick() en su bucle; tick() evalúa cuando ha pasado el intervalo y
+    devuelve True si cambió ``conexiones`` o ``split``.
+
+    Args:
+        conexiones (int): Descargas simultáneas iniciales.
+        split (int): Conexiones por archivo iniciales (aria2c --split).
+        carpeta_sonda (str, optional): Carpeta donde medir la latencia de
+            escritura; sin ella no se mide.
+        intervalo (float): Segundos entre evaluaciones.
+    """
+
+    def __init__(self, conexiones, split, carpeta_sonda=None, intervalo=AIMD_INTERVALO):
+        self.conexiones = self._acotar(conexiones, AIMD_MIN_CONEXIONES, AIMD_MAX_CONEXIONES)
+        self.split = self._acotar(split, AIMD_MIN_SPLIT, AIMD_MAX_SPLIT)
+        self.carpeta_sonda = carpeta_sonda
+        self.intervalo = intervalo
+        self._lock = threading.Lock()
+        self._bytes = self._completados = self._errores = self._timeouts = 0
+        self._inicio = time.monotonic()
+        self._throughput_previo = None
+        self._ultimo_fue_aumento = False
+        self._estables = 0
+
+    @staticmethod
+    def _acotar(valor, minimo, maximo):
+        return max(minimo, min(maximo, int(valor)))
+
+    def registrar(self, bytes_=0, completados=0, errores=0, timeouts=0):
+        """Sumar bytes recibidos, archivos terminados y fallos de red (reintentos incluidos)."""
+        with self._lock:
+            self._bytes += bytes_
+            self._completados += completados
+            self._errores += errores
+            self._timeouts += timeouts
+
+    def tick(self):
+        """Evaluar si ya pasó el intervalo. Devuelve True si cambió algún ajuste."""
+        if time.monotonic() - self._inicio < self.intervalo:
+            return False
+        return self.evaluar()
+
+    def evaluar(self):
+        """Cerrar el intervalo actual y decidir. Devuelve True si cambió algún ajuste."""
+        with self._lock:
+            ahora = time.monotonic()
+            elapsed = max(ahora - self._inicio, 1e-6)
+            recibidos, completados = self._bytes, self._completados
+            errores, timeouts = self._errores, self._timeouts
+            self._bytes = self._completados = self._errores = self._timeouts = 0
+            self._inicio = ahora
+
+        throughput = recibidos / elapsed
+        fallos = errores + timeouts
+        tasa_error = fallos / (completados + fallos) if fallos else 0.0
+        latencia = (
+            medir_latencia_escritura(self.carpeta_sonda) if self.carpeta_sonda else None
+        )
+
+        anterior = (self.conexiones, self.split)
+        if tasa_error > AIMD_ERROR_MAX or (latencia or 0) > AIMD_LATENCIA_MAX:
+            motivo = "congestión"
+            self.conexiones = self._acotar(
+                self.conexiones * AIMD_FACTOR, AIMD_MIN_CONEXIONES, AIMD_MAX_CONEXIONES
+            )
+            self.split = self._acotar(self.split * AIMD_FACTOR, AIMD_MIN_SPLIT, AIMD_MAX_SPLIT)
+            self._ultimo_fue_aumento = False
+            self._estables = 0
+        elif recibidos == 0:
+            motivo = "sin datos"
+        elif (
+            self._throughput_previo is None
+            or (not self._ultimo_fue_aumento and self._estables >= AIMD_SONDEO)
+            or (
+                self._ultimo_fue_aumento
+                and throughput > self._throughput_previo * (1 + AIMD_MEJORA_MIN)
+            )
+        ):
+            motivo = "aumento"
+            self.conexiones = self._acotar(
+                self.conexiones + AIMD_INCREMENTO, AIMD_MIN_CONEXIONES, AIMD_MAX_CONEXIONES
+            )
+            self.split = self._acotar(
+                self.split + AIMD_INCREMENTO, AIMD_MIN_SPLIT, AIMD_MAX_SPLIT
+            )
+            self._ultimo_fue_aumento = True
+            self._estables = 0
+        else:
+            motivo = "estable"
+            self._ultimo_fue_aumento = False
+            self._estables += 1
+        if recibidos:
+            self._throughput_previo = throughput
+
+        cambio = (self.conexiones, self.split) != anterior
+        latencia_txt = f"{latencia * 1000:.0f} ms" if latencia is not None else "n/d"
+        log_custom(
+            section="Control Concurrencia",
+            message=(
+                f"{motivo}: conexiones {anterior[0]}->{self.conexiones}, "
+                f"split {anterior[1]}->{self.split} | {throughput / 1024 / 1024:.1f} MB/s, "
+                f"{completados} completos, {errores} errores, {timeouts} timeouts "
+                f"({tasa_error:.0%}), latencia escritura {latencia_txt}"
+            ),
+            level="INFO",
+            file=LOG_FILE,
+        )
+        return cambio
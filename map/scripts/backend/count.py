@@ -1,49 +1,90 @@
-import pathlib
-import os
+"""
+Resumen del almacenamiento de imágenes (conteos y tamaños).
+
+Lee los tamaños registrados en la base de datos durante la ingesta en lugar
+de recorrer el NAS, así que el resultado es inmediato aunque haya millones de
+archivos (con DB_SHARD_DIR, de todos los shards). Las filas antiguas sin
+tamaño se completan con:
 
+    python db/maintenance.py backfill-typed
+"""
 
-def get_size(file_path):
-    return os.path.getsize(file_path)
+import argparse
+import os
+import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from db.Shards import get_metadata_crud
 
-def get_mean(sizes):
-    return sum(sizes) / len(sizes) if sizes else 0
+JPG_FORMATS = ("jpg", "jpeg")
+TIFF_FORMATS = ("tif", "tiff")
 
 
 def size_to_mb(size):
-    return size / 1024 / 1024
-
-
-images_path = pathlib.Path(__file__).parent / "API-NASA"
-
-jpg_count = 0
-tiff_count = 0
-image_files = []  # Lista de tuplas (archivo, tamaño)
-
-for file in images_path.rglob("*"):
-    if file.is_file():  # Solo archivos
-        if file.suffix == ".JPG":
-            jpg_count += 1
-            size = get_size(file)
-            image_files.append((file, size))
-        elif file.suffix.lower() == ".tif":
-            tiff_count += 1
-            size = get_size(file)
-            image_files.append((file, size))
-
-print(f"JPG: {jpg_count}")
-print(f"TIFF: {tiff_count}")
-print(f"Total: {jpg_count + tiff_count}")
-
-if image_files:
-    sizes = [size for _, size in image_files]
-    print(f"Media: {size_to_mb(get_mean(sizes)):.2f} MB")
-
-    # Encontrar archivo más grande y más pequeño
-    max_file = max(image_files, key=lambda x: x[1])
-    min_file = min(image_files, key=lambda x: x[1])
-
-    print(f"Max: {size_to_mb(max_file[1]):.2f} MB - {max_file[0]}")
-    print(f"Min: {size_to_mb(min_file[1]):.2f} MB - {min_file[0]}")
-else:
-    print("No se encontraron imágenes")
+    return (size or 0) / 1024 / 1024
+
+
+def print_breakdown(crud, group):
+    print(f"\nPor {group}:")
+    for row in crud.storage_stats(group_by=(group,)):
+        print(
+            f"  {row[group] or '-'}: {row['count']} imágenes, "
+            f"{size_to_mb(row['total_bytes']) / 1024:.2f} GB, "
+            f"media {size_to_mb(row['mean_bytes']):.2f} MB"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Resumen del almacenamiento")
+    parser.add_argument(
+        "--by",
+        nargs="*",
+        default=[],
+        choices=["year", "mission", "camera", "format"],
+        help="Desglose adicional por año, misión, cámara o formato",
+    )
+    args = parser.parse_args()
+
+    # Con DB_SHARD_DIR se suman todos los shards
+    crud = get_metadata_crud()
+    try:
+        by_format = {
+            row["format"]: row
+            for row in crud.storage_stats(
+                group_by=("format",), formats=JPG_FORMATS + TIFF_FORMATS
+            )
+        }
+        jpg_count = sum(by_format[f]["count"] for f in JPG_FORMATS if f in by_format)
+        tiff_count = sum(by_format[f]["count"] for f in TIFF_FORMATS if f in by_format)
+
+        print(f"JPG: {jpg_count}")
+        print(f"TIFF: {tiff_count}")
+        print(f"Total: {jpg_count + tiff_count}")
+
+        # Sin filas (p. ej. shards aún sin crear) los totales son cero
+        overall = next(
+            iter(crud.storage_stats(formats=JPG_FORMATS + TIFF_FORMATS)),
+            {"mean_bytes": None},
+        )
+        sized = [row for row in by_format.values() if row["max_bytes"] is not None]
+        if sized:
+            print(f"Media: {size_to_mb(overall['mean_bytes']):.2f} MB")
+
+            # Archivo más grande y más pequeño (búsqueda por índice formato/tamaño)
+            max_row = max(sized, key=lambda row: row["max_bytes"])
+            min_row = min(sized, key=lambda row: row["min_bytes"])
+            max_path = crud.get_path_by_size(max_row["format"], max_row["max_bytes"])
+            min_path = crud.get_path_by_size(min_row["format"], min_row["min_bytes"])
+            print(f"Max: {size_to_mb(max_row['max_bytes']):.2f} MB - {max_path}")
+            print(f"Min: {size_to_mb(min_row['min_bytes']):.2f} MB - {min_path}")
+        else:
+            print("No se encontraron imágenes")
+
+        for group in args.by:
+            print_breakdown(crud, group)
+    finally:
+        crud.close_session()
+
+
+if __name__ == "__main__":
+    main()
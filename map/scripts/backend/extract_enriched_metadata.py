@@ -17,6 +17,7 @@ PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..
 #  IMPORTAR DEPENDENCIAS PARA LOGGING
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
 from log import log_custom
+from format_policy import planificar_formatos
 
 #  LOG FILE
 LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
@@ -458,15 +459,20 @@ def extract_metadata_enriquecido(results):
             else:
                 camera_final = camera_desc
 
-            #  DETERMINAR URL FINAL (GeoTIFF vs JPG)
-            if extra_data.get("HAS_GEOTIFF") and extra_data.get("GEOTIFF_URL"):
-                url_final = extra_data["GEOTIFF_URL"]
-            else:
-                url_final = (
-                    f"https://eol.jsc.nasa.gov/DatabaseImages/{directory}/{filename}"
-                    if filename and directory
-                    else None
-                )
+            #  URLS CANDIDATAS (GeoTIFF y JPG): planificar_formatos elige
+            #  una por imagen al final, con reglas y presupuesto de bytes
+            url_jpg = (
+                f"https://eol.jsc.nasa.gov/DatabaseImages/{directory}/{filename}"
+                if filename and directory
+                else None
+            )
+            url_geotiff = (
+                extra_data["GEOTIFF_URL"]
+                if extra_data.get("HAS_GEOTIFF") and extra_data.get("GEOTIFF_URL")
+                else None
+            )
+            filesize = find_by_suffix(photo, ".filesize")
+            bytes_jpg = int(filesize) if str(filesize or "").strip().isdigit() else None
 
             #  USAR FECHA DE CAPTURA SI ESTÁ DISPONIBLE
             date_final = extra_data.get("FECHA_CAPTURA") or formatted_date
@@ -477,7 +483,10 @@ def extract_metadata_enriquecido(results):
                 "FECHA": date_final,  #  FECHA REAL DE CAPTURA
                 "HORA": formatted_hour,
                 "RESOLUCION": resolution_text,
-                "URL": url_final,  #  URL INTELIGENTE (GeoTIFF o JPG)
+                "URL": url_geotiff or url_jpg,  #  URL INTELIGENTE (GeoTIFF o JPG)
+                "URL_JPG": url_jpg,
+                "URL_GEOTIFF": url_geotiff,
+                "BYTES_JPG": bytes_jpg,  #  images.filesize DE LA API
                 "NADIR_LAT": find_by_suffix(photo, ".nlat"),
                 "NADIR_LON": find_by_suffix(photo, ".nlon"),
                 "CENTER_LAT": find_by_suffix(photo, ".lat"),
@@ -553,4 +562,8 @@ def extract_metadata_enriquecido(results):
         file=LOG_FILE,
     )
 
+    #  PLAN DE DESCARGA: formato por imagen y bytes previstos antes de empezar
+    if metadata_enriquecidos:
+        planificar_formatos(metadata_enriquecidos)
+
     return metadata_enriquecidos
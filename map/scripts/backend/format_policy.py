@@ -0,0 +1,203 @@
+# ==========================================
+# POLÍTICA DE FORMATO: GEOTIFF O JPEG POR IMAGEN
+# ==========================================
+"""
+Elección del formato de descarga al planificar, antes de descargar nada.
+
+Por imagen hay hasta dos URLs: el JPEG de DatabaseImages y el GeoTIFF de
+GetGeotiff.pl. El tamaño del JPEG sale de ``images.filesize`` de la API; el
+del GeoTIFF se estima con ancho x alto (RGB de 8 bits sin comprimir). Con
+DOWNLOAD_PLAN_HEAD=1 los tamaños que faltan se piden con HEAD.
+
+- Reglas por imagen: GeoTIFF solo con cobertura nubosa <= GEOTIFF_MAX_CLOUD_COVER
+  y elevación solar >= GEOTIFF_MIN_SUN_ELEVATION (las pasadas nocturnas se
+  quedan en JPEG); sin valor para la regla, JPEG
+- Presupuesto (DOWNLOAD_BUDGET_GB): se parte de todo en JPEG y se pasan a
+  GeoTIFF las imágenes admitidas de menor coste extra mientras quepan
+- Sin presupuesto: GeoTIFF para toda imagen admitida (comportamiento previo)
+
+El plan deja en cada metadata la URL elegida y BYTES_PREVISTOS, y registra
+los bytes previstos de la ejecución; las imágenes de tamaño desconocido se
+cuentan aparte y no entran en ese total.
+"""
+
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from map.routes import (
+    DOWNLOAD_BUDGET_GB,
+    DOWNLOAD_PLAN_HEAD,
+    GEOTIFF_MAX_CLOUD_COVER,
+    GEOTIFF_MIN_SUN_ELEVATION,
+)
+from db.Conversions import parse_number, parse_resolution
+
+#  IMPORTAR LOG_CUSTOM
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from log import log_custom
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
+
+# Estimación de GeoTIFF: RGB de 8 bits sin comprimir
+GEOTIFF_BYTES_POR_PIXEL = 3
+PLAN_HEAD_TIMEOUT = 8
+PLAN_HEAD_WORKERS = 8
+PLAN_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+
+
+def _tamano_head(url):
+    """Content-Length de un HEAD (con redirecciones), o None."""
+    try:
+        response = requests.head(
+            url,
+            allow_redirects=True,
+            timeout=PLAN_HEAD_TIMEOUT,
+            headers={"User-Agent": PLAN_USER_AGENT},
+        )
+        length = response.headers.get("Content-Length")
+        if response.ok and length and length.isdigit() and int(length) > 0:
+            return int(length)
+    except requests.RequestException:
+        pass
+    return None
+
+
+def _estimar_geotiff(metadata):
+    width, height = parse_resolution(metadata.get("RESOLUCION"))
+    if not width or not height:
+        return None
+    return width * height * GEOTIFF_BYTES_POR_PIXEL
+
+
+def _admite_geotiff(metadata, max_nubes, min_elevacion):
+    """Reglas por imagen; un valor que falta no cumple la regla."""
+    if max_nubes is not None:
+        nubes = parse_number(metadata.get("COBERTURA_NUBOSA"))
+        if nubes is None or nubes > max_nubes:
+            return False
+    if min_elevacion is not None:
+        elevacion = parse_number(metadata.get("ELEVACION_SOL"))
+        if elevacion is None or elevacion < min_elevacion:
+            return False
+    return True
+
+
+def _formato_gb(num_bytes):
+    return f"{num_bytes / 1024**3:.2f} GB"
+
+
+def planificar_formatos(
+    metadata_list,
+    presupuesto_gb=DOWNLOAD_BUDGET_GB,
+    max_nubes=GEOTIFF_MAX_CLOUD_COVER,
+    min_elevacion=GEOTIFF_MIN_SUN_ELEVATION,
+    head=DOWNLOAD_PLAN_HEAD,
+):
+    """
+    ELEGIR GEOTIFF O JPEG POR IMAGEN Y FIJAR SU URL
+
+    Cada metadata lleva URL_JPG, URL_GEOTIFF (o None) y BYTES_JPG; se le
+    asignan URL (la elegida) y BYTES_PREVISTOS (None si no se conoce).
+
+    Args:
+        metadata_list (list[dict]): Metadata de extract_metadata_enriquecido.
+        presupuesto_gb (float, optional): Bytes totales permitidos, en GB.
+        max_nubes (float, optional): Cobertura nubosa máxima (%) para GeoTIFF.
+        min_elevacion (float, optional): Elevación solar mínima para GeoTIFF.
+        head (bool): Pedir con HEAD los tamaños desconocidos.
+
+    Returns:
+        dict: Resumen del plan: geotiff, jpeg, bytes (previstos, solo de las
+        imágenes de tamaño conocido), sin_tamano (imágenes de tamaño
+        desconocido, fuera de ``bytes``) y presupuesto (bytes o None).
+    """
+    tam_jpg = {}
+    tam_tif = {}
+    admitidas = []
+    for i, metadata in enumerate(metadata_list):
+        tam_jpg[i] = metadata.get("BYTES_JPG")
+        if metadata.get("URL_GEOTIFF") and (
+            not metadata.get("URL_JPG") or _admite_geotiff(metadata, max_nubes, min_elevacion)
+        ):
+            admitidas.append(i)
+            tam_tif[i] = _estimar_geotiff(metadata)
+
+    #  HEAD OPCIONAL: solo para los tamaños que faltan y pueden decidir el plan
+    if head:
+        consultas = [
+            (tam_jpg, i, metadata_list[i]["URL_JPG"])
+            for i in tam_jpg
+            if tam_jpg[i] is None and metadata_list[i].get("URL_JPG")
+        ] + [(tam_tif, i, metadata_list[i]["URL_GEOTIFF"]) for i in admitidas]
+        with ThreadPoolExecutor(max_workers=PLAN_HEAD_WORKERS) as executor:
+            tamanos = list(executor.map(lambda c: _tamano_head(c[2]), consultas))
+        for (destino, i, _), tamano in zip(consultas, tamanos):
+            if tamano is not None:
+                destino[i] = tamano
+
+    #  BASE: JPEG siempre que exista; GeoTIFF solo si es la única URL
+    presupuesto = int(presupuesto_gb * 1024**3) if presupuesto_gb is not None else None
+    geotiff = {i for i in admitidas if not metadata_list[i].get("URL_JPG")}
+
+    #  MEJORAS A GEOTIFF: todas sin presupuesto; con él, las de menor coste extra
+    candidatas = [i for i in admitidas if i not in geotiff]
+    if presupuesto is None:
+        geotiff.update(candidatas)
+    else:
+        total = sum(tam_jpg[i] or 0 for i in tam_jpg if i not in geotiff) + sum(
+            tam_tif[i] or 0 for i in geotiff
+        )
+        # Sin tamaño de GeoTIFF no se puede cuadrar con el presupuesto
+        costes = sorted(
+            ((tam_tif[i] - (tam_jpg[i] or 0), i) for i in candidatas if tam_tif[i] is not None)
+        )
+        for extra, i in costes:
+            if total + extra > presupuesto:
+                break
+            geotiff.add(i)
+            total += extra
+
+    #  TOTAL DEL PLAN: solo tamaños conocidos; los desconocidos se cuentan aparte
+    total = sin_tamano = 0
+    for i, metadata in enumerate(metadata_list):
+        if i in geotiff:
+            metadata["URL"], previstos = metadata["URL_GEOTIFF"], tam_tif.get(i)
+        else:
+            metadata["URL"], previstos = metadata.get("URL_JPG"), tam_jpg[i]
+        metadata["BYTES_PREVISTOS"] = previstos
+        if previstos is not None:
+            total += previstos
+        elif metadata["URL"] is not None:
+            sin_tamano += 1
+
+    resumen = {
+        "geotiff": len(geotiff),
+        "jpeg": sum(1 for m in metadata_list if m["URL"]) - len(geotiff),
+        "bytes": total,
+        "sin_tamano": sin_tamano,
+        "presupuesto": presupuesto,
+    }
+    presupuesto_txt = _formato_gb(presupuesto) if presupuesto is not None else "sin límite"
+    log_custom(
+        section="Plan Descarga",
+        message=(
+            f"Plan: {resumen['geotiff']} GeoTIFF, {resumen['jpeg']} JPEG - "
+            f"{_formato_gb(total)} previstos (presupuesto {presupuesto_txt}); "
+            f"{sin_tamano} imágenes sin tamaño conocido, no incluidas en el total"
+        ),
+        level="INFO",
+        file=LOG_FILE,
+    )
+    if presupuesto is not None and total > presupuesto:
+        log_custom(
+            section="Plan Descarga",
+            message=f"Los JPEG solos ya superan el presupuesto: {_formato_gb(total)} > {presupuesto_txt}",
+            level="WARNING",
+            file=LOG_FILE,
+        )
+    return resumen
@@ -2,8 +2,9 @@
 # DESCARGA DIRECTA AL NAS CON ARIA2C OPTIMIZADO
 # ==========================================
 
+import contextlib
 import os
-import re
+import queue
 import shutil
 import sys
 import subprocess
@@ -15,16 +16,65 @@ import threading
 from typing import List, Dict, Optional
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
-from map.routes import NAS_PATH, NAS_MOUNT
+from map.routes import (
+    DOWNLOAD_ADAPTIVE,
+    DOWNLOAD_BACKEND,
+    DOWNLOAD_STAGING_DIR,
+    DOWNLOAD_STAGING_MAX_GB,
+    DOWNLOAD_VERIFY_SHA256,
+    NAS_PATH,
+    NAS_MOUNT,
+    WORKFLOW_PIPELINE,
+)
+from db.Conversions import parse_number
+from db.Engine import get_engine, sqlite_url
+from db.Manifest import (
+    MANIFEST_COMPLETE,
+    MANIFEST_PENDING,
+    lookup_urls,
+    pending_downloads,
+    record_downloads,
+    record_verification,
+    scan_results,
+    unverified_downloads,
+)
+from db.RetryQueue import clear_retries, queue_failures
 
 #  IMPORTAR LOG_CUSTOM
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
 from log import log_custom
+from aria2_rpc import descargar_con_rpc
+from async_downloader import descargar_async
+from staging import ProgresoEscalado, StagingMover
+from integrity import crear_pool_verificacion, verificar_archivos
+from concurrency import ControladorAIMD
+from path_planner import PlanificadorRutas, carpeta_destino
 
 #  LOG COHERENTE EN RUTA CORRECTA
 PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
 LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
 
+# Con staging se descarga por tandas de conexiones * este factor: entre tanda
+# y tanda se comprueba el límite de espacio en staging
+STAGING_TANDA_POR_CONEXION = 4
+
+# Con DOWNLOAD_ADAPTIVE y el backend aria2c (sesión -i) se lanza una sesión
+# por tanda de conexiones * este factor, para que el controlador AIMD mida y
+# ajuste -j/--split entre tandas y no solo al final de la ejecución
+AIMD_TANDA_POR_CONEXION = 4
+
+# Rondas extra de descarga para los files que no pasan la verificación
+VERIFY_REINTENTOS = 1
+
+# Pipeline (WORKFLOW_PIPELINE): metadata por tanda y tandas en espera entre
+# etapas; la cola acotada frena la descarga si la BD o la preparación no dan abasto
+PIPELINE_TANDA = 128
+PIPELINE_COLA = 2
+
+# Conexiones por file de aria2c (--split) al empezar; con DOWNLOAD_ADAPTIVE
+# el controlador AIMD lo ajusta junto con las descargas simultáneas
+ARIA2_SPLIT = 32
+
 
 def verificar_destination_descarga():
     """
@@ -56,27 +106,183 @@ def verificar_destination_descarga():
     return base_path, nas_available, mode
 
 
-def determinar_folder_destination_inteligente(metadata: Dict, base_path: str) -> str:
+def determinar_folder_destination_inteligente(
+    metadata: Dict, base_path: str, crear: bool = True
+) -> str:
     """
     DETERMINAR CARPETA FINAL: NAS o Local según disponibilidad
+    Con crear=False solo calcula la ruta (sin tocar el disco); para muchos
+    registros usar un PlanificadorRutas (una creación por carpeta)
     """
-    year = _get_year_from_metadata(metadata)
-    mission = _get_mission_from_metadata(metadata)
-    camera = metadata.get("CAMARA") or "Sin_Camera"
-
     #  ESTRUCTURA: {base_path}/{year}/{mission}/{camera}/
-    folder_destination = os.path.join(base_path, str(year), mission, camera)
+    folder_destination = carpeta_destino(metadata, base_path)
 
     # Crear directory si no existe
-    os.makedirs(folder_destination, exist_ok=True)
+    if crear:
+        os.makedirs(folder_destination, exist_ok=True)
 
     return folder_destination
 
 
-def download_imagees_aria2c_optimized(metadata, conexiones=32):
+def _opciones_aria2c(is_nas: bool, split: int = ARIA2_SPLIT) -> List[str]:
+    """OPCIONES GLOBALES DE ARIA2C (sesión por lote o daemon RPC)"""
+    #  ARIA2C OPTIMIZADO PARA NAS/LOCAL
+    opciones = [
+        f"--max-connection-per-server={min(16, split)}",
+        "--min-split-size=1M",  # Chunks más pequeños para mejor paralelización
+        f"--split={split}",  # Más splits por file
+        "--summary-interval=1",  # Progreso cada segundo
+        "--continue=true",
+        "--timeout=45",
+        "--retry-wait=2",
+        "--max-tries=5",
+        "--console-log-level=info",
+        "--optimize-concurrent-downloads=true",  #  Optimización aria2c
+        "--stream-piece-selector=geom",  # Mejor para downloads grandes
+        "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+    ]
+
+    #  CONFIGURACIÓN ESPECÍFICA PARA NAS
+    if is_nas:
+        opciones.extend(
+            [
+                "--file-allocation=falloc",  # Mejor para NAS
+                "--disk-cache=64M",  # Cache para NAS
+            ]
+        )
+    else:
+        opciones.extend(
+            [
+                "--file-allocation=none",  # Más rápido para local
+                "--disk-cache=32M",
+            ]
+        )
+    return opciones
+
+
+def _descargar_sesion_aria2c(
+    entradas, folders, base_path, conexiones, is_nas, split=ARIA2_SPLIT
+) -> int:
+    """
+    UNA SESIÓN ARIA2C PARA TODAS LAS CARPETAS (-i con dir=/out= por entrada)
+    Devuelve el número de descargas completadas detectadas en la salida
+    """
+    total_urls_nuevas = len(entradas)
+    total_downloaded = 0
+
+    # Crear file temporal de URLs con opciones por entrada (único por hilo:
+    # en pipeline pueden coincidir dos sesiones)
+    temp_file = os.path.join(
+        base_path, f"urls_batch_{threading.get_ident()}_{time.time_ns()}.txt"
+    )
+
+    with open(temp_file, "w") as f:
+        for url, folder_destination, filename in entradas:
+            f.write(f"{url}\n  dir={folder_destination}\n  out={filename}\n")
+
+    command = ["aria2c", "-i", temp_file, "-j", str(conexiones)]
+    command.extend(_opciones_aria2c(is_nas, split))
+
+    log_custom(
+        section="Descarga Directa",
+        message=f"Descargando {total_urls_nuevas} imágenes a {len(folders)} folders en una sesión aria2c (-j {conexiones}, split {split})",
+        level="INFO",
+        file=LOG_FILE,
+    )
+
+    try:
+        process = subprocess.Popen(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            universal_newlines=True,
+        )
+
+        last_logged_progress = 0
+
+        for line in iter(process.stdout.readline, ""):
+            line = line.strip()
+            if not line:
+                continue
+
+            #  DETECTAR DESCARGAS COMPLETADAS
+            if "Download complete:" in line or ("[#" in line and "100%" in line):
+                total_downloaded += 1
+
+                #  CALCULAR Y ENVIAR PROGRESO REAL
+                progress = min(int((total_downloaded / total_urls_nuevas) * 100), 100)
+                print(f"PROGRESS: {progress}", flush=True)
+
+                # Log progreso cada 20%
+                if progress - last_logged_progress >= 20:
+                    log_custom(
+                        section="Descarga Directa",
+                        message=f"Progreso: {progress}% ({total_downloaded}/{total_urls_nuevas})",
+                        level="INFO",
+                        file=LOG_FILE,
+                    )
+                    last_logged_progress = progress
+
+            #  DETECTAR ERRORES CRÍTICOS
+            elif "ERROR" in line and not any(
+                ignorable in line for ignorable in ["SSL", "certificate", "retry"]
+            ):
+                log_custom(
+                    section="Descarga Directa",
+                    message=f"Error aria2c: {line}",
+                    level="ERROR",
+                    file=LOG_FILE,
+                )
+
+            #  VELOCIDAD (log ocasional)
+            elif "DL:" in line and "MB/s" in line and total_downloaded % 50 == 0:
+                log_custom(
+                    section="Descarga Directa",
+                    message=f"Velocidad: {line}",
+                    level="INFO",
+                    file=LOG_FILE,
+                )
+
+        # Esperar proceso
+        process.wait()
+
+        if process.returncode == 0:
+            log_custom(
+                section="Descarga Directa",
+                message=f"Sesión aria2c completada exitosamente: {total_urls_nuevas} imágenes en {len(folders)} folders",
+                level="INFO",
+                file=LOG_FILE,
+            )
+        else:
+            log_custom(
+                section="Descarga Directa",
+                message=f"Error en la sesión aria2c - código: {process.returncode}",
+                level="ERROR",
+                file=LOG_FILE,
+            )
+
+    except Exception as e:
+        log_custom(
+            section="Descarga Directa",
+            message=f"Error ejecutando aria2c: {str(e)}",
+            level="ERROR",
+            file=LOG_FILE,
+        )
+
+    finally:
+        # Limpiar file temporal
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+    return total_downloaded
+
+
+def download_imagees_aria2c_optimized(metadata, conexiones=32, planificador=None):
     """
      DESCARGA DIRECTA CON ARIA2C OPTIMIZADO AL DESTINO FINAL
     Sin transferencias posteriores - Descarga directa donde debe estar
+    Las rutas salen de ``planificador`` (PlanificadorRutas de la ejecución)
     """
     if not metadata:
         log_custom(
@@ -97,51 +303,22 @@ def download_imagees_aria2c_optimized(metadata, conexiones=32):
         file=LOG_FILE,
     )
 
-    #  AGRUPAR POR CARPETA DE DESTINO FINAL
-    grupos_por_folder = {}
-    total_urls_nuevas = 0
-
-    for metadata in metadata:
-        url = metadata.get("URL")
-        if not url:
-            continue
+    #  UNA SOLA LISTA DE ENTRADAS: cada URL con su carpeta (dir=) y nombre (out=)
+    if planificador is None:
+        planificador = PlanificadorRutas(base_path)
+    entradas, nasa_por_url = planificador.entradas(metadata)
 
-        # Determinar folder final directamente
-        folder_destination = determinar_folder_destination_inteligente(
-            metadata, base_path
-        )
-
-        if folder_destination not in grupos_por_folder:
-            grupos_por_folder[folder_destination] = []
+    #  MANIFIESTO DE DESCARGAS: lo completado se salta sin tocar el NAS;
+    #  lo que el manifiesto no conoce se comprueba con un scandir por folder
+    todas_las_entradas = entradas
+    entradas = pending_downloads(entradas, nasa_por_url)
+    folders = {folder for _, folder, _ in entradas}
 
-        # Normalizar filename: eliminar query string y manejar GeoTIFFs
-        url_path = url.split("?", 1)[0]
-        raw_basename = os.path.basename(url_path)
-        name, ext = os.path.splitext(raw_basename)
-
-        # Si la URL apunta a GetGeotiff.pl o no tiene extensión clara, usar NASA_ID.tif cuando sea posible
-        nasa_id = metadata.get("NASA_ID") or metadata.get("NASA_ID".upper()) or None
-        is_geotiff_url = "geotiff" in url.lower() or "getgeotiff.pl" in url.lower()
-
-        if is_geotiff_url and nasa_id:
-            filename = f"{nasa_id}.tif"
-        else:
-            # Si no hay extensión, intentar añadir .jpg por defecto
-            if ext == "":
-                filename = raw_basename + ".jpg"
-            else:
-                filename = raw_basename
-
-        filepath = os.path.join(folder_destination, filename)
-
-        # Solo download si no existe
-        if not os.path.exists(filepath):
-            grupos_por_folder[folder_destination].append(url)
-            total_urls_nuevas += 1
+    total_urls_nuevas = len(entradas)
 
     log_custom(
         section="Descarga Directa",
-        message=f"Archivos nuevos: {total_urls_nuevas} en {len(grupos_por_folder)} folders - Destino: {mode}",
+        message=f"Archivos nuevos: {total_urls_nuevas} en {len(folders)} folders - Destino: {mode}",
         level="INFO",
         file=LOG_FILE,
     )
@@ -153,227 +330,409 @@ def download_imagees_aria2c_optimized(metadata, conexiones=32):
             level="INFO",
             file=LOG_FILE,
         )
+        _verificar_descargas(todas_las_entradas, base_path, conexiones, is_nas, nasa_por_url)
         return
 
-    #  DESCARGA OPTIMIZADA CON ARIA2C
-    total_downloaded = 0
-    urls_procesadas = 0
+    #  DESCARGA OPTIMIZADA CON ARIA2C: todas las carpetas a la vez,
+    #  con un único presupuesto global de -j descargas simultáneas
     start_time = time.time()
 
-    for folder_destination, urls in grupos_por_folder.items():
-        if not urls:
-            continue
+    # Registrar antes de download: si el proceso muere a medias, la limpieza
+    # encuentra los files parciales en el manifiesto
+    record_downloads(
+        (
+            {"url": url, "path": os.path.join(folder, filename), "status": MANIFEST_PENDING}
+            for url, folder, filename in entradas
+        ),
+        nasa_por_url,
+    )
+
+    resultados = _descargar(entradas, base_path, conexiones, is_nas, planificador=planificador)
+    record_downloads(resultados, nasa_por_url)
+
+    #  VERIFICACIÓN DE INTEGRIDAD: solo los files verificados llegan a la BD
+    _verificar_descargas(todas_las_entradas, base_path, conexiones, is_nas, nasa_por_url)
+    total_downloaded = sum(1 for r in resultados if r["status"] == MANIFEST_COMPLETE)
+
+    #  RESUMEN FINAL
+    download_time = time.time() - start_time
+    rate = total_downloaded / download_time if download_time > 0 else 0
+
+    log_custom(
+        section="Descarga Directa",
+        message=f"DESCARGA COMPLETADA - {mode}: {total_downloaded}/{total_urls_nuevas} imágenes en {download_time:.1f}s ({rate:.1f} img/s)",
+        level="INFO",
+        file=LOG_FILE,
+    )
+
+    # Asegurar 100% al final
+    print("PROGRESS: 100", flush=True)
+
+
+def _descargar(
+    entradas, base_path, conexiones, is_nas, controlador=None, planificador=None
+) -> List[Dict]:
+    """DESCARGAR AL DESTINO: directo o pasando por staging local"""
+    #  CONCURRENCIA ADAPTATIVA: la latencia se mide donde escriben las descargas
+    if controlador is None and DOWNLOAD_ADAPTIVE:
+        controlador = ControladorAIMD(
+            conexiones, ARIA2_SPLIT, carpeta_sonda=DOWNLOAD_STAGING_DIR or base_path
+        )
+    if DOWNLOAD_STAGING_DIR:
+        #  STAGING LOCAL: el NAS solo recibe files completos
+        return _descargar_con_staging(entradas, base_path, conexiones, controlador)
+    folders = {folder for _, folder, _ in entradas}
+    if planificador is not None:
+        planificador.crear_carpetas(folders)
+    else:
+        for folder in folders:
+            os.makedirs(folder, exist_ok=True)
+    return _descargar_entradas(entradas, base_path, conexiones, is_nas, controlador)
+
+
+def _verificar_descargas(
+    entradas, base_path, conexiones, is_nas, nasa_por_url, pool=None
+) -> int:
+    """
+     VERIFICAR LOS FILES COMPLETOS AÚN SIN VERIFICAR (pool de procesos)
+    Los que fallan se borran y se vuelven a download (VERIFY_REINTENTOS
+    rondas); los verificados quedan marcados en el manifiesto.
+    ``pool``: pool de verificación de la ejecución (si no, uno por llamada).
+    Devuelve cuántos siguen fallando al final.
+    """
+    # El tamaño anunciado por el servidor sale del manifiesto (expected_size):
+    # lo informan RPC y asyncio; sin él (sesión aria2c, archivos adoptados) es None
+    entrada_por_path = {
+        os.path.join(folder, name): (url, folder, name) for url, folder, name in entradas
+    }
+    urls = list(nasa_por_url)
+    fallidos = []
+
+    for ronda in range(VERIFY_REINTENTOS + 1):
+        candidatos = unverified_downloads(urls)
+        if not candidatos:
+            break
+
+        informes = verificar_archivos(
+            [(path, esperado) for _, path, _, esperado in candidatos],
+            calcular_sha256=DOWNLOAD_VERIFY_SHA256,
+            pool=pool,
+        )
+        verificados, _ = record_verification(informes)
+        fallidos = [i for i in informes if not i["ok"]]
 
         log_custom(
-            section="Descarga Directa",
-            message=f"Descargando {len(urls)} imágenes a: {folder_destination}",
+            section="Verificación",
+            message=f"Verificados {verificados}/{len(informes)} files (ronda {ronda + 1})",
             level="INFO",
             file=LOG_FILE,
         )
+        for informe in fallidos[:10]:
+            log_custom(
+                section="Verificación",
+                message=f"Archivo inválido {informe['path']}: {informe['error']}",
+                level="WARNING",
+                file=LOG_FILE,
+            )
+
+        # Borrar los inválidos: aria2c no debe "continuar" sobre ellos
+        for informe in fallidos:
+            if os.path.exists(informe["path"]):
+                os.remove(informe["path"])
 
-        # Crear file temporal de URLs
-        temp_file = os.path.join(
-            folder_destination, f"urls_batch_{int(time.time())}.txt"
-        )
-
-        with open(temp_file, "w") as f:
-            for url in urls:
-                f.write(url + "\n")
-
-        #  ARIA2C OPTIMIZADO PARA NAS/LOCAL
-        command = [
-            "aria2c",
-            "-i",
-            temp_file,
-            "-d",
-            folder_destination,  #  DESCARGA DIRECTA AL DESTINO FINAL
-            "-j",
-            str(conexiones),  # Más conexiones para NAS
-            "--max-connection-per-server=16",
-            "--min-split-size=1M",  # Chunks más pequeños para mejor paralelización
-            "--split=32",  # Más splits por file
-            "--summary-interval=1",  # Progreso cada segundo
-            "--continue=true",
-            "--timeout=45",
-            "--retry-wait=2",
-            "--max-tries=5",
-            "--console-log-level=info",
-            "--optimize-concurrent-downloads=true",  #  Optimización aria2c
-            "--stream-piece-selector=geom",  # Mejor para downloads grandes
-            "--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
+        reencolar = [
+            entrada_por_path[i["path"]] for i in fallidos if i["path"] in entrada_por_path
         ]
+        if not reencolar or ronda == VERIFY_REINTENTOS:
+            break
+        log_custom(
+            section="Verificación",
+            message=f"Reencolando {len(reencolar)} files inválidos",
+            level="INFO",
+            file=LOG_FILE,
+        )
+        nuevos = _descargar(reencolar, base_path, conexiones, is_nas)
+        record_downloads(nuevos, nasa_por_url)
 
-        #  CONFIGURACIÓN ESPECÍFICA PARA NAS
-        if is_nas:
-            command.extend(
-                [
-                    "--file-allocation=failurec",  # Mejor para NAS
-                    "--disk-cache=64M",  # Cache para NAS
-                ]
-            )
-        else:
-            command.extend(
-                [
-                    "--file-allocation=none",  # Más rápido para local
-                    "--disk-cache=32M",
-                ]
-            )
+    return len(fallidos)
 
-        try:
-            process = subprocess.Popen(
-                command,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                universal_newlines=True,
-            )
 
-            folder_downloaded = 0
-            last_logged_progress = 0
+def _actualizar_cola_reintentos(metadata_list) -> int:
+    """
+     COLA DE REINTENTOS POR URL (tras descarga y verificación)
+    Las URLs que no terminaron completas y verificadas se encolan con su
+    metadata y backoff. Las correctas siguen en la cola hasta que su registro
+    llega a la BD (_confirmar_ingesta).
+    Devuelve cuántas quedaron en la cola.
+    """
+    con_url = [m for m in metadata_list if m.get("URL")]
+    manifiesto = lookup_urls(m["URL"] for m in con_url)
+    fallidos = []
+    for metadata in con_url:
+        registro = manifiesto.get(metadata["URL"])
+        if registro is None:
+            fallidos.append((metadata, "sin registro en el manifiesto"))
+        elif registro[1] != MANIFEST_COMPLETE:
+            fallidos.append((metadata, f"descarga en estado {registro[1]}"))
+        elif registro[3] is None:
+            fallidos.append((metadata, "no pasó la verificación de integridad"))
+
+    if not fallidos:
+        return 0
+    encoladas, abandonadas = queue_failures(fallidos)
+    log_custom(
+        section="Cola Reintentos",
+        message=f"{encoladas} URLs en cola de reintentos, {abandonadas} abandonadas (sin intentos)",
+        level="WARNING",
+        file=LOG_FILE,
+    )
+    return encoladas
+
 
-            for line in iter(process.stdout.readline, ""):
-                line = line.strip()
-                if not line:
-                    continue
+def _confirmar_ingesta(registros, no_escritos, metadata_por_url) -> int:
+    """
+     COLA DE REINTENTOS TRAS LA ESCRITURA EN BD
+    Las URLs cuyo registro ya está en el catálogo (escrito o duplicado) salen
+    de la cola; las de lotes que fallaron al escribir se encolan con su metadata.
+    Devuelve cuántas salieron de la cola.
+    """
+    fallidas = {r.get("url") for r in no_escritos}
+    recuperadas = clear_retries(
+        r["url"] for r in registros if r.get("url") and r["url"] not in fallidas
+    )
+    fallos = [
+        (metadata_por_url[url], "error escribiendo en BD")
+        for url in fallidas
+        if url in metadata_por_url
+    ]
+    encoladas = abandonadas = 0
+    if fallos:
+        encoladas, abandonadas = queue_failures(fallos)
+    if fallos or recuperadas:
+        log_custom(
+            section="Cola Reintentos",
+            message=f"{recuperadas} recuperadas tras escribir en BD, {encoladas} en cola por error de escritura, {abandonadas} abandonadas",
+            level="WARNING" if fallos else "INFO",
+            file=LOG_FILE,
+        )
+    return recuperadas
 
-                #  DETECTAR DESCARGAS COMPLETADAS
-                if "Download complete:" in line or ("[#" in line and "100%" in line):
-                    folder_downloaded += 1
-                    total_downloaded += 1
-                    urls_procesadas += 1
-
-                    #  CALCULAR Y ENVIAR PROGRESO REAL
-                    if total_urls_nuevas > 0:
-                        progress = int((urls_procesadas / total_urls_nuevas) * 100)
-                        print(f"PROGRESS: {progress}", flush=True)
-
-                        # Log progreso cada 20% o al complete folder
-                        if (progress - last_logged_progress >= 20) or (
-                            folder_downloaded == len(urls)
-                        ):
-                            log_custom(
-                                section="Descarga Directa",
-                                message=f"Progreso: {progress}% ({total_downloaded}/{total_urls_nuevas}) - Carpeta: {folder_downloaded}/{len(urls)}",
-                                level="INFO",
-                                file=LOG_FILE,
-                            )
-                            last_logged_progress = progress
-
-                #  DETECTAR ERRORES CRÍTICOS
-                elif "ERROR" in line and not any(
-                    ignorable in line for ignorable in ["SSL", "certificate", "retry"]
-                ):
-                    log_custom(
-                        section="Descarga Directa",
-                        message=f"Error aria2c: {line}",
-                        level="ERROR",
-                        file=LOG_FILE,
-                    )
 
-                #  VELOCIDAD (log ocasional)
-                elif "DL:" in line and "MB/s" in line and folder_downloaded % 50 == 0:
-                    log_custom(
-                        section="Descarga Directa",
-                        message=f"Velocidad: {line}",
-                        level="INFO",
-                        file=LOG_FILE,
-                    )
+def _descargar_entradas(
+    entradas, base_path, conexiones, is_nas, controlador=None
+) -> List[Dict]:
+    """
+    DESCARGAR CON EL BACKEND CONFIGURADO (DOWNLOAD_BACKEND)
+    Devuelve el estado final por file (url, path, status, completed...)
+    Con controlador AIMD, conexiones y split salen de él
+    """
+    if DOWNLOAD_BACKEND == "aria2-rpc":
+        #  DAEMON ARIA2C PERSISTENTE: bytes, velocidad y estado exactos vía RPC
+        return descargar_con_rpc(
+            entradas, conexiones, _opciones_aria2c(is_nas), controlador=controlador
+        )
+    if DOWNLOAD_BACKEND == "asyncio":
+        #  PYTHON PURO (aiohttp): sin binario externo, reanuda los .part
+        return descargar_async(entradas, conexiones, controlador=controlador)
+
+    if controlador is None:
+        folders = {folder for _, folder, _ in entradas}
+        _descargar_sesion_aria2c(
+            entradas, folders, base_path, conexiones, is_nas, ARIA2_SPLIT
+        )
+        #  aria2c no informa por file: un listado por folder
+        return scan_results(entradas)
+
+    #  CON CONTROLADOR AIMD: una sesión por tanda, -j/--split fijados antes de cada una
+    resultados = []
+    inicio = 0
+    while inicio < len(entradas):
+        conexiones, split = controlador.conexiones, controlador.split
+        lote = entradas[inicio : inicio + max(conexiones * AIMD_TANDA_POR_CONEXION, 1)]
+        folders = {folder for _, folder, _ in lote}
+        # Progreso de la tanda reescalado al total de la llamada
+        with contextlib.redirect_stdout(
+            ProgresoEscalado(
+                sys.stdout, inicio * 100 / len(entradas), len(lote) / len(entradas)
+            )
+        ):
+            _descargar_sesion_aria2c(lote, folders, base_path, conexiones, is_nas, split)
+        inicio += len(lote)
+        lote_resultados = scan_results(lote)
+        # La sesión no distingue fallos de red de un 404: solo cuentan
+        # throughput y latencia, y el ajuste vale para la siguiente tanda
+        completos = [r for r in lote_resultados if r["status"] == MANIFEST_COMPLETE]
+        controlador.registrar(
+            bytes_=sum(r["completed"] for r in completos), completados=len(completos)
+        )
+        controlador.evaluar()
+        resultados.extend(lote_resultados)
+    return resultados
 
-            # Esperar proceso
-            process.wait()
 
-            # Limpiar file temporal
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
+def _descargar_con_staging(entradas, base_path, conexiones, controlador=None) -> List[Dict]:
+    """
+     DESCARGA EN STAGING LOCAL + TRASLADO EN PARALELO AL DESTINO
+    Por tandas: mientras se descarga una tanda, el mover lleva la anterior
+    al NAS (rename atómico). Antes de cada tanda se espera a que haya sitio
+    en staging (DOWNLOAD_STAGING_MAX_GB), estimado con el tamaño medio.
+    Con controlador AIMD el tamaño de tanda sigue a sus conexiones.
+    """
+    mover = StagingMover(int(DOWNLOAD_STAGING_MAX_GB * 1024**3))
+    resultados = []
+    traslados = []
+    bytes_descargados = archivos_descargados = 0
 
-            if process.returncode == 0:
-                log_custom(
-                    section="Descarga Directa",
-                    message=f"Carpeta completed exitosamente: {len(urls)} imágenes en {folder_destination}",
-                    level="INFO",
-                    file=LOG_FILE,
+    log_custom(
+        section="Staging",
+        message=f"Descargando en staging {DOWNLOAD_STAGING_DIR} (máx. {DOWNLOAD_STAGING_MAX_GB:g} GB) por tandas de {conexiones * STAGING_TANDA_POR_CONEXION}",
+        level="INFO",
+        file=LOG_FILE,
+    )
+
+    inicio = 0
+    carpetas_staging = set()
+    try:
+        while inicio < len(entradas):
+            if controlador is not None:
+                conexiones = controlador.conexiones
+            tanda = max(conexiones * STAGING_TANDA_POR_CONEXION, 1)
+            lote = entradas[inicio : inicio + tanda]
+
+            # Misma estructura {year}/{mission}/{camera} dentro de staging
+            destino_final = {}
+            en_staging = []
+            for url, folder, filename in lote:
+                folder_staging = os.path.join(
+                    DOWNLOAD_STAGING_DIR, os.path.relpath(folder, base_path)
                 )
-            else:
-                log_custom(
-                    section="Descarga Directa",
-                    message=f"Error in folder {folder_destination} - código: {process.returncode}",
-                    level="ERROR",
-                    file=LOG_FILE,
+                en_staging.append((url, folder_staging, filename))
+                destino_final[os.path.join(folder_staging, filename)] = os.path.join(
+                    folder, filename
                 )
+            for folder_staging in {folder for _, folder, _ in en_staging} - carpetas_staging:
+                os.makedirs(folder_staging, exist_ok=True)
+                carpetas_staging.add(folder_staging)
 
-        except Exception as e:
-            log_custom(
-                section="Descarga Directa",
-                message=f"Error ejecutando aria2c: {str(e)}",
-                level="ERROR",
-                file=LOG_FILE,
-            )
+            if archivos_descargados:
+                mover.wait_for_room(bytes_descargados / archivos_descargados * len(lote))
 
-            # Limpiar temporal en caso de error
-            if os.path.exists(temp_file):
-                os.remove(temp_file)
-
-    #  RESUMEN FINAL
-    download_time = time.time() - start_time
-    rate = total_downloaded / download_time if download_time > 0 else 0
+            # Progreso de la tanda reescalado al total de la ejecución
+            with contextlib.redirect_stdout(
+                ProgresoEscalado(
+                    sys.stdout, inicio * 100 / len(entradas), len(lote) / len(entradas)
+                )
+            ):
+                lote_resultados = _descargar_entradas(
+                    en_staging, DOWNLOAD_STAGING_DIR, conexiones, False, controlador
+                )
+            inicio += len(lote)
+
+            for resultado in lote_resultados:
+                final = destino_final[resultado["path"]]
+                if resultado["status"] == MANIFEST_COMPLETE:
+                    bytes_descargados += resultado["completed"]
+                    archivos_descargados += 1
+                    traslado = mover.submit(resultado["path"], final, resultado["completed"])
+                    traslados.append((dict(resultado, path=final), traslado))
+                else:
+                    resultados.append(dict(resultado, path=final))
+    finally:
+        mover.close()
+
+    movidos = 0
+    for resultado, traslado in traslados:
+        if traslado.result():
+            movidos += 1
+        else:
+            resultado.update(status="error", error="Error moviendo desde staging")
+        resultados.append(resultado)
 
     log_custom(
-        section="Descarga Directa",
-        message=f"DESCARGA COMPLETADA - {mode}: {total_downloaded}/{total_urls_nuevas} imágenes en {download_time:.1f}s ({rate:.1f} img/s)",
+        section="Staging",
+        message=f"Movidos {movidos}/{len(traslados)} files de staging al destino",
         level="INFO",
         file=LOG_FILE,
     )
+    return resultados
 
-    # Asegurar 100% al final
-    print("PROGRESS: 100", flush=True)
 
+class _SinProgreso:
+    """stdout que descarta las líneas ``PROGRESS:``; el resto pasa igual."""
 
-def _get_year_from_metadata(metadata: Dict) -> int:
-    """Extraer año de metadata"""
-    date_str = metadata.get("FECHA", "")
-    try:
-        return datetime.strptime(date_str, "%Y.%m.%d").year
-    except Exception:
-        return 2024
+    def __init__(self, stream):
+        self.stream = stream
+        self._descartada = False
+
+    def write(self, text):
+        # print() escribe el salto de línea aparte: se descarta con su línea
+        if text.startswith("PROGRESS:") or (self._descartada and text == "\n"):
+            self._descartada = not self._descartada
+            return len(text)
+        return self.stream.write(text)
 
+    def flush(self):
+        self.stream.flush()
 
-def _get_mission_from_metadata(metadata: Dict) -> str:
-    """Extraer misión de metadata"""
-    nasa_id = metadata.get("NASA_ID", "")
+
+def _etapa_pipeline(nombre, funcion, entrada, salida, fallidas):
+    """
+    HILO DE UNA ETAPA DEL PIPELINE
+    Consume pares (tanda, datos) de ``entrada`` hasta None y deja
+    (tanda, funcion(tanda, datos)) en ``salida``. Una tanda que falla sale
+    del pipeline y se anota en ``fallidas`` con su error (el workflow la
+    manda a la cola de reintentos); la etapa sigue vaciando su cola para no
+    bloquear a la anterior y al terminar propaga el None.
+    """
     try:
-        return nasa_id.split("-")[0]
-    except Exception:
-        return "UNKNOWN"
+        while True:
+            item = entrada.get()
+            if item is None:
+                break
+            lote, datos = item
+            try:
+                resultado = funcion(lote, datos)
+            except Exception as e:
+                log_custom(
+                    section="Pipeline",
+                    message=f"Error en la etapa {nombre} ({len(lote)} elementos a la cola de reintentos): {str(e)}",
+                    level="ERROR",
+                    file=LOG_FILE,
+                )
+                fallidas.append((lote, f"error en la etapa {nombre}: {e}"))
+                continue
+            salida.put((lote, resultado))
+    finally:
+        salida.put(None)
+
+
+def _encolar_tandas_fallidas(fallidas) -> int:
+    """TANDAS DESCARTADAS POR EL PIPELINE -> cola de reintentos (por URL)"""
+    fallos = [(m, error) for lote, error in fallidas for m in lote if m.get("URL")]
+    if not fallos:
+        return 0
+    encoladas, abandonadas = queue_failures(fallos)
+    log_custom(
+        section="Cola Reintentos",
+        message=f"{len(fallidas)} tandas fallidas en el pipeline: {encoladas} URLs en cola de reintentos, {abandonadas} abandonadas",
+        level="WARNING",
+        file=LOG_FILE,
+    )
+    return encoladas
 
 
 class HybridOptimizedProcessor:
     """Procesador híbrido con descarga directa al destination final"""
 
-    def __init__(self, database_path: str, batch_size: int = 75):
+    def __init__(self, database_path: str, batch_size: int = 1000):
         self.database_path = database_path
         self.batch_size = batch_size
         self.setup_sqlite_optimizations()
 
     def setup_sqlite_optimizations(self):
-        """Configurar SQLite para máximo rendimiento"""
-        import sqlite3
-
-        conn = sqlite3.connect(self.database_path)
-        cursor = conn.cursor()
-
-        optimizations = [
-            "PRAGMA journal_mode = WAL;",
-            "PRAGMA synchronous = NORMAL;",
-            "PRAGMA cache_size = 20000;",
-            "PRAGMA temp_store = memory;",
-            "PRAGMA mmap_size = 536870912;",
-            "PRAGMA optimize;",
-        ]
-
-        for opt in optimizations:
-            cursor.execute(opt)
-        conn.commit()
-        conn.close()
+        """Configurar SQLite para máximo rendimiento (PRAGMAs en cada conexión del engine compartido)"""
+        self.database_url = sqlite_url(self.database_path)
+        self.engine = get_engine(self.database_url)
 
         log_custom(
             section="Base de Datos",
@@ -384,6 +743,9 @@ class HybridOptimizedProcessor:
 
     def process_complete_workflow(self, metadata_list: List[Dict]):
         """FLUJO COMPLETO CON DESCARGA DIRECTA"""
+        if WORKFLOW_PIPELINE:
+            return self.process_pipeline_workflow(metadata_list)
+
         total_start = time.time()
 
         # Verificar configuration al inicio
@@ -404,8 +766,13 @@ class HybridOptimizedProcessor:
             file=LOG_FILE,
         )
 
+        #  RUTAS: calculadas una vez y compartidas por descarga y preparación
+        planificador = PlanificadorRutas(base_path)
+
         download_start = time.time()
-        download_imagees_aria2c_optimized(metadata_list, conexiones=32)
+        download_imagees_aria2c_optimized(metadata_list, conexiones=32, planificador=planificador)
+        # Las URLs fallidas van a la cola de reintentos; el resto sigue adelante
+        _actualizar_cola_reintentos(metadata_list)
         download_time = time.time() - download_start
 
         log_custom(
@@ -425,7 +792,7 @@ class HybridOptimizedProcessor:
 
         prep_start = time.time()
         prepared_data = self._prepare_data_from_organized_files(
-            metadata_list, base_path
+            metadata_list, base_path, planificador
         )
         prep_time = time.time() - prep_start
 
@@ -445,7 +812,12 @@ class HybridOptimizedProcessor:
         )
 
         db_start = time.time()
-        self._write_to_database_optimized(prepared_data)
+        _, _, no_escritos = self._write_to_database_optimized(prepared_data)
+        _confirmar_ingesta(
+            prepared_data,
+            no_escritos,
+            {m["URL"]: m for m in metadata_list if m.get("URL")},
+        )
         db_time = time.time() - db_start
 
         log_custom(
@@ -465,10 +837,165 @@ class HybridOptimizedProcessor:
             file=LOG_FILE,
         )
 
+    def process_pipeline_workflow(self, metadata_list: List[Dict], conexiones=32):
+        """
+         FLUJO EN PIPELINE: descarga -> verificación -> preparación -> BD
+        Tandas de PIPELINE_TANDA metadata; cada etapa en su hilo con colas
+        acotadas entre medias. Una tanda llega a la BD mientras las siguientes
+        se descargan, así una ejecución cortada deja en el catálogo todo lo
+        ya escrito. Las escrituras se agrupan en lotes de batch_size
+        (o lo que haya acumulado cuando no queda nada más listo).
+        """
+        total_start = time.time()
+        base_path, is_nas, mode = verificar_destination_descarga()
+        tandas = [
+            metadata_list[i : i + PIPELINE_TANDA]
+            for i in range(0, len(metadata_list), PIPELINE_TANDA)
+        ]
+
+        log_custom(
+            section="Workflow ISS",
+            message=f"Iniciando workflow en pipeline - {mode} - {len(metadata_list)} elementos en {len(tandas)} tandas de {PIPELINE_TANDA}",
+            level="INFO",
+            file=LOG_FILE,
+        )
+
+        planificador = PlanificadorRutas(base_path)
+        # Un solo controlador AIMD para toda la ejecución: aprende entre tandas
+        controlador = None
+        if DOWNLOAD_ADAPTIVE:
+            controlador = ControladorAIMD(
+                conexiones, ARIA2_SPLIT, carpeta_sonda=DOWNLOAD_STAGING_DIR or base_path
+            )
+        # Un solo pool de verificación para todas las tandas (sin fork: ver
+        # crear_pool_verificacion)
+        pool_verificacion = crear_pool_verificacion()
+
+        def descargar_tanda(lote, _):
+            entradas, nasa_por_url = planificador.entradas(lote)
+            nuevas = pending_downloads(entradas, nasa_por_url)
+            if nuevas:
+                record_downloads(
+                    (
+                        {"url": url, "path": os.path.join(folder, name), "status": MANIFEST_PENDING}
+                        for url, folder, name in nuevas
+                    ),
+                    nasa_por_url,
+                )
+                resultados = _descargar(
+                    nuevas, base_path, conexiones, is_nas, controlador, planificador
+                )
+                record_downloads(resultados, nasa_por_url)
+            return entradas, nasa_por_url
+
+        def verificar_tanda(lote, descarga):
+            entradas, nasa_por_url = descarga
+            _verificar_descargas(
+                entradas, base_path, conexiones, is_nas, nasa_por_url, pool_verificacion
+            )
+            _actualizar_cola_reintentos(lote)
+
+        def preparar_tanda(lote, _):
+            return self._prepare_data_from_organized_files(lote, base_path, planificador)
+
+        #  COLAS ENTRE ETAPAS: la de entrada lleva todas las tandas, el resto acotadas
+        cola_tandas = queue.Queue()
+        for lote in tandas:
+            cola_tandas.put((lote, None))
+        cola_tandas.put(None)
+        cola_verificar = queue.Queue(maxsize=PIPELINE_COLA)
+        cola_preparar = queue.Queue(maxsize=PIPELINE_COLA)
+        cola_bd = queue.Queue(maxsize=PIPELINE_COLA)
+
+        # Tandas descartadas por una etapa (list.append es seguro entre hilos)
+        fallidas = []
+        etapas = [
+            threading.Thread(
+                target=_etapa_pipeline,
+                args=(nombre, funcion, entrada, salida, fallidas),
+                name=f"pipeline-{nombre}",
+            )
+            for nombre, funcion, entrada, salida in (
+                ("descarga", descargar_tanda, cola_tandas, cola_verificar),
+                ("verificación", verificar_tanda, cola_verificar, cola_preparar),
+                ("preparación", preparar_tanda, cola_preparar, cola_bd),
+            )
+        ]
+
+        #  ESCRITURA EN ESTE HILO: lotes de batch_size, o lo acumulado si no hay más listo
+        salida = sys.stdout
+        pendientes_bd = []
+        # Metadata de lo pendiente de escribir, para reencolar si el lote falla
+        metadata_por_url = {}
+        procesados = written = skipped = 0
+        last_progress = -1
+        primer_registro = None
+        fin = False
+        with contextlib.redirect_stdout(_SinProgreso(salida)):
+            for etapa in etapas:
+                etapa.start()
+            try:
+                while not fin:
+                    item = cola_bd.get()
+                    fin = item is None
+                    if not fin:
+                        lote, registros = item
+                        pendientes_bd.extend(registros)
+                        metadata_por_url.update(
+                            (m["URL"], m) for m in lote if m.get("URL")
+                        )
+                        procesados += len(lote)
+
+                    while len(pendientes_bd) >= self.batch_size or (
+                        pendientes_bd and (fin or cola_bd.empty())
+                    ):
+                        lote_bd = pendientes_bd[: self.batch_size]
+                        del pendientes_bd[: self.batch_size]
+                        lote_written, lote_skipped, no_escritos = (
+                            self._write_to_database_optimized(lote_bd)
+                        )
+                        _confirmar_ingesta(lote_bd, no_escritos, metadata_por_url)
+                        for registro in lote_bd:
+                            metadata_por_url.pop(registro.get("url"), None)
+                        written += lote_written
+                        skipped += lote_skipped
+                        if primer_registro is None and lote_written:
+                            primer_registro = time.time() - total_start
+
+                    progress = int(procesados / max(len(metadata_list), 1) * 100)
+                    if progress != last_progress:
+                        print(f"PROGRESS: {progress}", file=salida, flush=True)
+                        last_progress = progress
+            finally:
+                # Si la escritura falla, vaciar la cola para que las etapas terminen
+                while not fin:
+                    fin = cola_bd.get() is None
+                for etapa in etapas:
+                    etapa.join()
+                pool_verificacion.shutdown()
+                _encolar_tandas_fallidas(fallidas)
+
+        total_time = time.time() - total_start
+        primer_txt = f"{primer_registro:.1f}s" if primer_registro is not None else "n/d"
+        log_custom(
+            section="Workflow ISS",
+            message=f"WORKFLOW PIPELINE COMPLETADO - {mode} - Total: {total_time:.1f}s | {written} escritos, {skipped} duplicados, {len(fallidas)} tandas fallidas | Primer registro en BD a los {primer_txt}",
+            level="INFO",
+            file=LOG_FILE,
+        )
+
     def _prepare_data_from_organized_files(
-        self, metadata_list: List[Dict], base_path: str
+        self,
+        metadata_list: List[Dict],
+        base_path: str,
+        planificador: Optional[PlanificadorRutas] = None,
     ) -> List[Dict]:
         """PREPARAR DATOS CON RUTA CORRECTA SEGÚN DESTINO"""
+        if planificador is None:
+            planificador = PlanificadorRutas(base_path)
+        #  Rutas y tamaños desde el manifiesto de descargas: una consulta en
+        #  lugar de un stat por file en el NAS
+        manifiesto = lookup_urls(m.get("URL") for m in metadata_list)
 
         def process_single_metadata(metadata):
             nasa_id = metadata.get("NASA_ID")
@@ -499,8 +1026,27 @@ class HybridOptimizedProcessor:
             }
 
             #  BUSCAR ARCHIVO EN DESTINO CORRECTO (NAS o Local)
-            final_path = self._find_organized_file_path(metadata, base_path)
+            registro = manifiesto.get(parsed_data["url"])
+            if registro is not None:
+                path, status, size, verified_at = registro
+                # Solo files que pasaron la verificación de integridad; el
+                # resto queda fuera de la BD y se reintenta en la siguiente ejecución
+                if status != MANIFEST_COMPLETE or verified_at is None:
+                    return None
+                parsed_data["path"] = path
+                # Tamaño en disco para las estadísticas de almacenamiento (storage_stats)
+                parsed_data["file_size"] = size
+                return parsed_data
+
+            # Fuera del manifiesto (descargado por otra vía): stat del file
+            final_path = self._find_organized_file_path(metadata, planificador)
             parsed_data["path"] = final_path
+            try:
+                parsed_data["file_size"] = (
+                    os.path.getsize(final_path) if final_path else None
+                )
+            except OSError:
+                parsed_data["file_size"] = None
             return parsed_data
 
         with ThreadPoolExecutor(max_workers=16) as executor:
@@ -517,29 +1063,19 @@ class HybridOptimizedProcessor:
 
         return prepared_data
 
-    def _find_organized_file_path(self, metadata: Dict, base_path: str) -> str:
-        """Buscar file en la estructura organizada (NAS o Local)"""
-        url = metadata.get("URL")
-        if not url:
-            return None
-
-        filename = os.path.basename(url)
-        year = _get_year_from_metadata(metadata)
-        mission = _get_mission_from_metadata(metadata)
-        camera = metadata.get("CAMARA") or "Sin_Camara"
-
-        #  RUTA SEGÚN DESTINO (NAS o Local)
-        final_path = os.path.join(base_path, str(year), mission, camera, filename)
-
-        return final_path if os.path.exists(final_path) else None
+    def _find_organized_file_path(
+        self, metadata: Dict, planificador: PlanificadorRutas
+    ) -> Optional[str]:
+        """Buscar file en la ruta planificada (la misma donde se descarga)"""
+        final_path = planificador.path(metadata)
+        return final_path if final_path and os.path.exists(final_path) else None
 
     def _write_to_database_optimized(self, prepared_data: List[Dict]):
-        """ESCRITURA SQLITE CON LOGS COHERENTES"""
-        sys.path.append(
-            os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
-        )
-        from db.Crud import MetadataCRUD
-        from db.Tables import Image
+        """
+        ESCRITURA SQLITE EN BLOQUE: una consulta de existentes y una transacción por lote
+        Devuelve (escritos, duplicados, registros de los lotes que fallaron)
+        """
+        from db.Shards import get_metadata_crud
 
         log_custom(
             section="Base de Datos",
@@ -548,10 +1084,12 @@ class HybridOptimizedProcessor:
             file=LOG_FILE,
         )
 
-        crud = MetadataCRUD()
+        # Con DB_SHARD_DIR configurado cada registro va al shard de su año
+        crud = get_metadata_crud(self.database_url)
         total_batches = (len(prepared_data) + self.batch_size - 1) // self.batch_size
         written = 0
         skipped = 0
+        no_escritos = []
 
         try:
             for i in range(0, len(prepared_data), self.batch_size):
@@ -559,78 +1097,9 @@ class HybridOptimizedProcessor:
                 batch_num = (i // self.batch_size) + 1
 
                 try:
-                    # Verificar existentes
-                    nasa_ids_in_batch = [item["nasa_id"] for item in batch]
-                    existing_ids = set()
-
-                    for nasa_id in nasa_ids_in_batch:
-                        if crud.session.query(
-                            crud.session.query(Image)
-                            .filter_by(nasa_id=nasa_id)
-                            .exists()
-                        ).scalar():
-                            existing_ids.add(nasa_id)
-
-                    new_items = [
-                        item for item in batch if item["nasa_id"] not in existing_ids
-                    ]
-
-                    if not new_items:
-                        skipped += len(batch)
-                        continue
-
-                    # Crear registros nuevos
-                    for item in new_items:
-                        existing_image = (
-                            crud.session.query(Image)
-                            .filter_by(nasa_id=item["nasa_id"])
-                            .first()
-                        )
-                        if existing_image:
-                            skipped += 1
-                            continue
-
-                        image_record = crud.create_image(
-                            nasa_id=item["nasa_id"],
-                            date=item["date"],
-                            time=item["time"],
-                            resolution=item["resolution"],
-                            path=item["path"],
-                        )
-
-                        if image_record:
-                            crud.create_image_details(
-                                image_id=image_record.image_id,
-                                features=item["features"],
-                                sun_elevation=item["sun_elevation"],
-                                sun_azimuth=item["sun_azimuth"],
-                                cloud_cover=item["cloud_cover"],
-                            )
-
-                            crud.create_map_location(
-                                image_id=image_record.image_id,
-                                nadir_lat=item["nadir_lat"],
-                                nadir_lon=item["nadir_lon"],
-                                center_lat=item["center_lat"],
-                                center_lon=item["center_lon"],
-                                nadir_center=item["nadir_center"],
-                                altitude=item["altitude"],
-                            )
-
-                            crud.create_camera_information(
-                                image_id=image_record.image_id,
-                                camera=item["camera"],
-                                focal_length=item["focal_length"],
-                                tilt=item["tilt"],
-                                format=item["format"],
-                                camera_metadata=item["camera_metadata"],
-                            )
-
-                            written += 1
-                        else:
-                            skipped += 1
-
-                    crud.session.commit()
+                    batch_written, batch_skipped = crud.bulk_insert_metadata(batch)
+                    written += batch_written
+                    skipped += batch_skipped
 
                     #  PROGRESO PARA ELECTRON
                     progress = int((written + skipped) / len(prepared_data) * 100)
@@ -652,8 +1121,7 @@ class HybridOptimizedProcessor:
                         level="ERROR",
                         file=LOG_FILE,
                     )
-                    crud.session.rollback()
-                    skipped += len(batch)
+                    no_escritos.extend(batch)
                     continue
 
         except Exception as e:
@@ -664,23 +1132,20 @@ class HybridOptimizedProcessor:
                 file=LOG_FILE,
             )
         finally:
-            try:
-                crud.session.close()
-            except:
-                pass
+            crud.close_session()
 
         log_custom(
             section="Base de Datos",
-            message=f"Escritura completed: {written} nuevos, {skipped} duplicados",
-            level="INFO",
+            message=f"Escritura completed: {written} nuevos, {skipped} duplicados, {len(no_escritos)} con error",
+            level="WARNING" if no_escritos else "INFO",
             file=LOG_FILE,
         )
 
+        return written, skipped, no_escritos
+
     def _to_float(self, value):
-        try:
-            return float(re.search(r"[-+]?[0-9]*\.?[0-9]+", str(value)).group())
-        except Exception:
-            return None
+        # float() directo; la regex solo para valores con unidades ("400 mm")
+        return parse_number(value)
 
     def _parse_date(self, value):
         try:
@@ -782,7 +1247,7 @@ def main_hibrido_directo_nas(json_filename):
     try:
         processor = HybridOptimizedProcessor(
             database_path=database_path,
-            batch_size=75,
+            batch_size=1000,
         )
 
         processor.process_complete_workflow(metadata)
@@ -0,0 +1,241 @@
+# ==========================================
+# VERIFICACIÓN DE INTEGRIDAD DE DESCARGAS
+# ==========================================
+"""
+Comprobaciones de integridad entre la descarga y la escritura en la BD.
+
+Por archivo:
+- Tamaño igual al esperado (Content-Length / totalLength) cuando se conoce
+- Páginas HTML/XML de error guardadas con nombre de imagen
+- JPEG: marcador SOI al inicio y EOI al final (detecta truncados)
+- TIFF/BigTIFF: recorre la cadena de IFDs y comprueba que todas las
+  tiras/teselas (StripOffsets/TileOffsets + ByteCounts) caben en el archivo
+- SHA-256 opcional (DOWNLOAD_VERIFY_SHA256=1)
+
+verificar_archivos() reparte el trabajo en un pool de procesos; quien
+verifica muchas tandas crea uno con crear_pool_verificacion() y lo reutiliza.
+"""
+
+import hashlib
+import multiprocessing
+import os
+import struct
+from concurrent.futures import ProcessPoolExecutor
+
+# Por debajo de este número de archivos no compensa arrancar procesos
+VERIFY_POOL_MIN = 32
+VERIFY_CHUNKSIZE = 16
+# Bytes finales donde buscar el EOI (algunas cámaras rellenan con ceros)
+JPEG_TAIL = 4096
+# Límite de IFDs recorridos (protege de cadenas en bucle)
+TIFF_MAX_IFDS = 1024
+HASH_BLOCK = 1024 * 1024
+
+JPEG_EXTENSIONS = (".jpg", ".jpeg")
+TIFF_EXTENSIONS = (".tif", ".tiff")
+
+# Pares (offsets, bytecounts) de los datos de imagen de un IFD
+TIFF_DATA_TAGS = ((273, 279), (324, 325))
+# Formato struct de los tipos TIFF que pueden llevar offsets/tamaños
+TIFF_INT_TYPES = {3: "H", 4: "I", 16: "Q"}
+
+
+def _es_html(head):
+    inicio = head.lstrip().lower()
+    return inicio.startswith((b"<!doctype", b"<html", b"<?xml", b"<head", b"<body"))
+
+
+def _verificar_jpeg(f, size):
+    f.seek(0)
+    if f.read(3) != b"\xff\xd8\xff":
+        return "JPEG sin marcador SOI"
+    f.seek(max(0, size - JPEG_TAIL))
+    if not f.read().rstrip(b"\x00").endswith(b"\xff\xd9"):
+        return "JPEG sin marcador EOI (truncado)"
+    return None
+
+
+def _valores_tiff(f, orden, entrada, big, size):
+    """Valores enteros de una entrada de IFD (en línea o en su offset)."""
+    tipo, count, valor = entrada
+    fmt = TIFF_INT_TYPES.get(tipo)
+    if fmt is None:
+        return None
+    nbytes = count * struct.calcsize(fmt)
+    if nbytes <= len(valor):
+        data = valor[:nbytes]
+    else:
+        offset = struct.unpack(orden + ("Q" if big else "I"), valor)[0]
+        if offset + nbytes > size:
+            return None
+        f.seek(offset)
+        data = f.read(nbytes)
+    return struct.unpack(f"{orden}{count}{fmt}", data)
+
+
+def _verificar_tiff(f, size):
+    f.seek(0)
+    head = f.read(16)
+    if head[:2] == b"II":
+        orden = "<"
+    elif head[:2] == b"MM":
+        orden = ">"
+    else:
+        return "cabecera TIFF inválida"
+
+    version = struct.unpack(orden + "H", head[2:4])[0]
+    if version == 42:
+        big = False
+        ifd = struct.unpack(orden + "I", head[4:8])[0]
+    elif version == 43 and len(head) >= 16:
+        big = True
+        ifd = struct.unpack(orden + "Q", head[8:16])[0]
+    else:
+        return "versión TIFF desconocida"
+
+    # Nº de entradas, nº de valores por entrada y offsets: 2/4/4 bytes o 8/8/8
+    fmt_count, fmt_valores, fmt_offset = ("Q", "Q", "Q") if big else ("H", "I", "I")
+    tam_count = struct.calcsize(fmt_count)
+    tam_offset = struct.calcsize(fmt_offset)
+    tam_entrada = 4 + 2 * tam_offset
+
+    if ifd == 0:
+        return "TIFF sin IFD"
+    vistos = set()
+    while ifd:
+        if ifd in vistos or len(vistos) >= TIFF_MAX_IFDS:
+            return "cadena de IFD en bucle"
+        vistos.add(ifd)
+        if ifd + tam_count > size:
+            return "IFD fuera del archivo (truncado)"
+        f.seek(ifd)
+        num = struct.unpack(orden + fmt_count, f.read(tam_count))[0]
+        raw = f.read(num * tam_entrada + tam_offset)
+        if len(raw) < num * tam_entrada + tam_offset:
+            return "IFD truncado"
+
+        tags = {}
+        for i in range(num):
+            entrada = raw[i * tam_entrada : (i + 1) * tam_entrada]
+            tag, tipo, count = struct.unpack(
+                orden + "HH" + fmt_valores, entrada[: 4 + tam_offset]
+            )
+            tags[tag] = (tipo, count, entrada[4 + tam_offset :])
+
+        for tag_offsets, tag_bytes in TIFF_DATA_TAGS:
+            if tag_offsets not in tags:
+                continue
+            offsets = _valores_tiff(f, orden, tags[tag_offsets], big, size)
+            longitudes = _valores_tiff(f, orden, tags.get(tag_bytes, (0, 0, b"")), big, size)
+            if offsets is None or longitudes is None or len(offsets) != len(longitudes):
+                return "tablas de tiras/teselas inválidas"
+            if any(o + n > size for o, n in zip(offsets, longitudes)):
+                return "datos de imagen fuera del archivo (truncado)"
+
+        ifd = struct.unpack(orden + fmt_offset, raw[num * tam_entrada :])[0]
+    return None
+
+
+def _sha256(f):
+    f.seek(0)
+    digest = hashlib.sha256()
+    for bloque in iter(lambda: f.read(HASH_BLOCK), b""):
+        digest.update(bloque)
+    return digest.hexdigest()
+
+
+def verificar_archivo(path, esperado=None, calcular_sha256=False):
+    """
+    VERIFICAR UN ARCHIVO DESCARGADO
+
+    Args:
+        path (str): Archivo a verificar.
+        esperado (int, optional): Tamaño anunciado por el servidor.
+        calcular_sha256 (bool): Calcular también el SHA-256.
+
+    Returns:
+        dict: path, ok, error (motivo del fallo o None), size y sha256.
+    """
+    informe = {"path": path, "ok": False, "error": None, "size": None, "sha256": None}
+    try:
+        size = informe["size"] = os.path.getsize(path)
+        if size == 0:
+            informe["error"] = "archivo vacío"
+            return informe
+        if esperado and size != esperado:
+            informe["error"] = f"tamaño {size} distinto del esperado {esperado}"
+            return informe
+
+        extension = os.path.splitext(path)[1].lower()
+        with open(path, "rb") as f:
+            head = f.read(64)
+            if _es_html(head):
+                informe["error"] = "página HTML/XML en lugar de imagen"
+                return informe
+
+            if extension in JPEG_EXTENSIONS or head.startswith(b"\xff\xd8"):
+                error = _verificar_jpeg(f, size)
+            elif extension in TIFF_EXTENSIONS or head[:2] in (b"II", b"MM"):
+                error = _verificar_tiff(f, size)
+            else:
+                error = None  # Formato sin comprobación estructural
+
+            if error is None and calcular_sha256:
+                informe["sha256"] = _sha256(f)
+        informe["error"] = error
+        informe["ok"] = error is None
+    except (OSError, struct.error) as e:
+        informe["error"] = str(e) or type(e).__name__
+    return informe
+
+
+def _verificar_tarea(tarea):
+    path, esperado, calcular_sha256 = tarea
+    return verificar_archivo(path, esperado, calcular_sha256)
+
+
+def crear_pool_verificacion(workers=None):
+    """
+    POOL DE PROCESOS PARA verificar_archivos()
+
+    Arranca los procesos con forkserver (o spawn donde no existe) en lugar de
+    fork: el proceso padre puede tener hilos de descarga y escritura con
+    locks tomados, y un hijo forkeado los heredaría bloqueados.
+
+    Args:
+        workers (int, optional): Procesos (por defecto, uno por CPU).
+
+    Returns:
+        ProcessPoolExecutor: Pool que el llamador debe cerrar (shutdown()).
+    """
+    metodo = (
+        "forkserver"
+        if "forkserver" in multiprocessing.get_all_start_methods()
+        else "spawn"
+    )
+    return ProcessPoolExecutor(
+        max_workers=workers, mp_context=multiprocessing.get_context(metodo)
+    )
+
+
+def verificar_archivos(tareas, calcular_sha256=False, workers=None, pool=None):
+    """
+    VERIFICAR MUCHOS ARCHIVOS EN UN POOL DE PROCESOS
+
+    Args:
+        tareas (list[tuple[str, int | None]]): (path, tamaño esperado) por archivo.
+        calcular_sha256 (bool): Calcular el SHA-256 de los válidos.
+        workers (int, optional): Procesos (por defecto, uno por CPU).
+        pool (ProcessPoolExecutor, optional): Pool de crear_pool_verificacion()
+            a reutilizar; sin él se crea uno para esta llamada.
+
+    Returns:
+        list[dict]: Informe de verificar_archivo() por tarea, en el mismo orden.
+    """
+    tareas = [(path, esperado, calcular_sha256) for path, esperado in tareas]
+    if len(tareas) < VERIFY_POOL_MIN:
+        return [_verificar_tarea(t) for t in tareas]
+    if pool is not None:
+        return list(pool.map(_verificar_tarea, tareas, chunksize=VERIFY_CHUNKSIZE))
+    with crear_pool_verificacion(workers) as pool:
+        return list(pool.map(_verificar_tarea, tareas, chunksize=VERIFY_CHUNKSIZE))
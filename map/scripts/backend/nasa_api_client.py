@@ -8,7 +8,6 @@ import os
 import sys
 import json
 import requests
-import sqlite3
 from datetime import datetime
 from typing import List, Dict, Optional, Tuple
 from concurrent.futures import ThreadPoolExecutor, as_completed
@@ -18,6 +17,12 @@ import time
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
 from log import log_custom
 
+# Engine e índice de NASA_IDs compartidos de la BD (una carga por proceso;
+# con DB_SHARD_DIR, uno por shard)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from db.Engine import sqlite_url
+from db.Shards import get_nasa_id_index
+
 # Cargar configuración desde el módulo helper
 from config import PROJECT_ROOT, ENV_FILE, load_env_config
 
@@ -288,13 +293,7 @@ class NASAAPIClient:
     def verificar_nasa_ids_en_bd(self, nasa_ids: List[str]) -> set:
         """Verify qué NASA_IDs ya existen en la base de datos"""
         try:
-            with sqlite3.connect(DATABASE_PATH) as conn:
-                cursor = conn.cursor()
-                placeholders = ",".join("?" * len(nasa_ids))
-                query = f"SELECT nasa_id FROM Image WHERE nasa_id IN ({placeholders})"
-                cursor.execute(query, nasa_ids)
-                existentes = {row[0] for row in cursor.fetchall()}
-                return existentes
+            return get_nasa_id_index(sqlite_url(DATABASE_PATH)).existing(nasa_ids)
         except Exception as e:
             log_custom(
                 section="Error BD",
@@ -0,0 +1,137 @@
+# ==========================================
+# PLANIFICADOR DE RUTAS DE ALMACENAMIENTO
+# ==========================================
+"""
+Ruta final única de cada imagen: {base_path}/{year}/{mission}/{camera}/{nombre}.
+
+La misma ruta la usan la descarga (dir=/out=), el manifiesto de descargas
+(y con él la limpieza) y la preparación de datos para la BD, así que un
+GeoTIFF (NASA_ID.tif) se encuentra donde se descargó.
+
+PlanificadorRutas calcula cada ruta una sola vez por ejecución y crea cada
+carpeta de destino una sola vez, en lugar de un os.makedirs por registro.
+"""
+
+import os
+import threading
+from datetime import datetime
+
+# Carpeta para metadata sin CAMARA (la que ya existe en el NAS)
+SIN_CAMARA = "Sin_Camera"
+# Año cuando FECHA no se puede leer
+ANIO_DEFECTO = 2024
+
+
+def get_year_from_metadata(metadata):
+    """Extraer año de metadata"""
+    date_str = metadata.get("FECHA", "")
+    try:
+        return datetime.strptime(date_str, "%Y.%m.%d").year
+    except Exception:
+        return ANIO_DEFECTO
+
+
+def get_mission_from_metadata(metadata):
+    """Extraer misión de metadata"""
+    nasa_id = metadata.get("NASA_ID", "")
+    try:
+        return nasa_id.split("-")[0]
+    except Exception:
+        return "UNKNOWN"
+
+
+def carpeta_destino(metadata, base_path):
+    """CARPETA FINAL: {base_path}/{year}/{mission}/{camera} (sin tocar el disco)"""
+    year = get_year_from_metadata(metadata)
+    mission = get_mission_from_metadata(metadata)
+    camera = metadata.get("CAMARA") or SIN_CAMARA
+    return os.path.join(base_path, str(year), mission, camera)
+
+
+def nombre_archivo_destino(metadata, url):
+    """
+    NOMBRE DEL ARCHIVO EN DESTINO para una URL de descarga
+    GeoTIFF (GetGeotiff.pl) -> NASA_ID.tif; sin extensión -> basename + .jpg
+    """
+    # Normalizar filename: eliminar query string y manejar GeoTIFFs
+    url_path = url.split("?", 1)[0]
+    raw_basename = os.path.basename(url_path)
+    ext = os.path.splitext(raw_basename)[1]
+
+    # Si la URL apunta a GetGeotiff.pl o no tiene extensión clara, usar NASA_ID.tif cuando sea posible
+    nasa_id = metadata.get("NASA_ID") or None
+    is_geotiff_url = "geotiff" in url.lower() or "getgeotiff.pl" in url.lower()
+
+    if is_geotiff_url and nasa_id:
+        return f"{nasa_id}.tif"
+    # Si no hay extensión, intentar añadir .jpg por defecto
+    if ext == "":
+        return raw_basename + ".jpg"
+    return raw_basename
+
+
+class PlanificadorRutas:
+    """
+    Rutas de destino de una ejecución, memorizadas por URL.
+
+    Se crea uno por ejecución y se pasa a la descarga y a la preparación de
+    datos; es seguro usarlo desde varios hilos.
+
+    Args:
+        base_path (str): Raíz del almacenamiento (NAS o carpeta local).
+    """
+
+    def __init__(self, base_path):
+        self.base_path = base_path
+        self._rutas = {}
+        self._carpetas_creadas = set()
+        self._lock = threading.Lock()
+
+    def planificar(self, metadata):
+        """
+        (carpeta, nombre) de la imagen, o None si el metadata no tiene URL.
+        """
+        url = metadata.get("URL")
+        if not url:
+            return None
+        ruta = self._rutas.get(url)
+        if ruta is None:
+            ruta = (
+                carpeta_destino(metadata, self.base_path),
+                nombre_archivo_destino(metadata, url),
+            )
+            self._rutas[url] = ruta
+        return ruta
+
+    def path(self, metadata):
+        """Ruta completa del archivo, o None si el metadata no tiene URL."""
+        ruta = self.planificar(metadata)
+        return os.path.join(*ruta) if ruta else None
+
+    def entradas(self, metadata_list):
+        """
+        ENTRADAS DE DESCARGA para una lista de metadata
+
+        Returns:
+            tuple[list[tuple[str, str, str]], dict[str, str]]: (url, carpeta,
+            nombre) por metadata con URL, y NASA_ID por URL.
+        """
+        entradas = []
+        nasa_por_url = {}
+        for metadata in metadata_list:
+            ruta = self.planificar(metadata)
+            if ruta is None:
+                continue
+            url = metadata["URL"]
+            entradas.append((url, *ruta))
+            nasa_por_url[url] = metadata.get("NASA_ID")
+        return entradas, nasa_por_url
+
+    def crear_carpetas(self, folders):
+        """Crear las carpetas que aún no se crearon en esta ejecución."""
+        with self._lock:
+            nuevas = set(folders) - self._carpetas_creadas
+        for folder in nuevas:
+            os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            self._carpetas_creadas |= nuevas
@@ -2,7 +2,10 @@
 """
  PROCESADOR INTELIGENTE CON AUTO-RETRY
 - Procesa solo imágenes NUEVAS (no en BD)
-- Si failure: limpia solo las de esta ejecución
+- URLs fallidas a una cola de reintentos persistente (por URL, con backoff);
+  lo que sí se completó se conserva en BD y almacenamiento
+- Si failure: conserva lo completado (ISS_ROLLBACK_ON_FAILURE=1 limpia
+  toda la ejecución, como antes)
 - Auto-programa retries con tiempo incremental
 - Gestión automática de tasks de Windows
 """
@@ -12,7 +15,6 @@ import sys
 import json
 import requests
 import subprocess
-import sqlite3
 from datetime import datetime, timedelta
 import time
 import asyncio
@@ -25,12 +27,15 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "u
 # Importaciones
 from imageProcessor import (
     HybridOptimizedProcessor,
-    download_imagees_aria2c_optimized,
     verificar_destination_descarga,
 )
 from extract_enriched_metadata import extract_metadata_enriquecido
 from log import log_custom
-from map.routes import NAS_PATH, NAS_MOUNT
+from map.routes import ISS_ROLLBACK_ON_FAILURE, NAS_PATH, NAS_MOUNT
+from db.Engine import sqlite_url
+from db.Shards import get_metadata_crud, get_nasa_id_index
+from db.Manifest import forget_downloads
+from db.RetryQueue import due_retries, retry_stats
 
 #  IMPORTAR CLIENTE PARA TAREAS PROGRAMADAS
 from task_api_client import process_task_scheduled
@@ -61,6 +66,9 @@ CURRENT_EXECUTION_FILE = os.path.join(
 TASK_NAME = "ISS_BatchProcessor"
 MAX_RETRIES = 6  # Máximo 6 intentos (10, 20, 30, 40, 50, 60 min)
 
+# URLs de la cola de reintentos procesadas por pasada
+RETRY_PASS_LIMIT = 500
+
 
 # ============================================================================
 #  GESTIÓN DE TAREAS DE WINDOWS
@@ -283,17 +291,8 @@ def clear_retry_info():
 def verificar_nasa_ids_en_bd(nasa_ids):
     """Verify qué NASA_IDs ya existen en la base de datos"""
     try:
-        with sqlite3.connect(DATABASE_PATH) as conn:
-            cursor = conn.cursor()
-
-            #  USAR TABLA Image CON nasa_id (minúscula)
-            placeholders = ",".join("?" * len(nasa_ids))
-            query = f"SELECT nasa_id FROM Image WHERE nasa_id IN ({placeholders})"
-
-            cursor.execute(query, nasa_ids)
-            existentes = {row[0] for row in cursor.fetchall()}
-
-            return existentes
+        #  Índice compartido de NASA_IDs (tabla Image; con DB_SHARD_DIR, todos los shards)
+        return get_nasa_id_index(sqlite_url(DATABASE_PATH)).existing(nasa_ids)
 
     except Exception as e:
         log_custom(
@@ -308,22 +307,20 @@ def verificar_nasa_ids_en_bd(nasa_ids):
 def limpiar_nasa_ids_de_bd(nasa_ids):
     """Delete NASA_IDs específicos de la base de datos"""
     try:
-        with sqlite3.connect(DATABASE_PATH) as conn:
-            cursor = conn.cursor()
-
-            placeholders = ",".join("?" * len(nasa_ids))
-            query = f"DELETE FROM metadata WHERE NASA_ID IN ({placeholders})"
-
-            cursor.execute(query, nasa_ids)
-            eliminados = cursor.rowcount
-            conn.commit()
+        #  Borrado en bloque (Image + tablas hijas) en una sola transacción;
+        #  los files los limpia limpiar_imagees_nas. Con DB_SHARD_DIR, en cada shard
+        crud = get_metadata_crud(sqlite_url(DATABASE_PATH))
+        try:
+            eliminados, _ = crud.delete_images(nasa_ids, remove_files=False)
+        finally:
+            crud.close_session()
 
-            log_custom(
-                section="Limpieza BD",
-                message=f"Eliminados {eliminados} registros de BD: {nasa_ids[:5]}...",
-                level="INFO",
-                file=LOG_FILE,
-            )
+        log_custom(
+            section="Limpieza BD",
+            message=f"Eliminados {eliminados} registros de BD: {nasa_ids[:5]}...",
+            level="INFO",
+            file=LOG_FILE,
+        )
 
     except Exception as e:
         log_custom(
@@ -337,20 +334,9 @@ def limpiar_nasa_ids_de_bd(nasa_ids):
 def limpiar_imagees_nas(nasa_ids):
     """Delete imágenes específicas del NAS/almacenamiento"""
     try:
-        base_path, is_nas, mode = verificar_destination_descarga()
-        eliminados = 0
-
-        for nasa_id in nasa_ids:
-            # Buscar files relacionados con este NASA_ID
-            for root, dirs, files in os.walk(base_path):
-                for file in files:
-                    if nasa_id in file:
-                        file_path = os.path.join(root, file)
-                        try:
-                            os.remove(file_path)
-                            eliminados += 1
-                        except:
-                            pass
+        #  Rutas desde el manifiesto de descargas (incluye las descargas a
+        #  medias de esta ejecución): sin recorrer el almacenamiento
+        _, eliminados = forget_downloads(nasa_ids)
 
         log_custom(
             section="Limpieza NAS",
@@ -442,6 +428,53 @@ def limpiar_solo_execution_actual():
     limpiar_registro_execution_actual()
 
 
+def conservar_execution_actual():
+    """Tras un fallo: conservar lo ya completado de la ejecución actual"""
+    nasa_ids_actuales = cargar_nasa_ids_execution_actual()
+
+    if nasa_ids_actuales:
+        en_bd = verificar_nasa_ids_en_bd(nasa_ids_actuales)
+        #  Lo que no llegó a la BD se reprocesa en el siguiente intento; sus
+        #  descargas terminadas se reaprovechan desde el manifiesto
+        log_custom(
+            section="Execution Cleanup",
+            message=f"Ejecución fallida: se conservan {len(en_bd)}/{len(nasa_ids_actuales)} elementos ya en BD",
+            level="INFO",
+            file=LOG_FILE,
+        )
+        print(f" Conservados {len(en_bd)}/{len(nasa_ids_actuales)} elementos de esta ejecución")
+
+    limpiar_registro_execution_actual()
+
+
+# ============================================================================
+#  COLA DE REINTENTOS POR URL
+# ============================================================================
+
+
+def procesar_cola_reintentos():
+    """Pasada ligera: descargar e insertar solo las URLs de la cola que tocan"""
+    pendientes = due_retries(limit=RETRY_PASS_LIMIT)
+    if not pendientes:
+        return 0
+
+    log_custom(
+        section="Cola Reintentos",
+        message=f"Reintentando {len(pendientes)} URLs de la cola",
+        level="INFO",
+        file=LOG_FILE,
+    )
+    print(f" Reintentando {len(pendientes)} URLs fallidas en ejecuciones anteriores")
+
+    # El workflow vuelve a encolar las que fallen y saca de la cola las que no
+    processor = HybridOptimizedProcessor(database_path=DATABASE_PATH, batch_size=1000)
+    processor.process_complete_workflow(pendientes)
+
+    stats = retry_stats()
+    print(f" Cola de reintentos: {stats['queued']} pendientes, {stats['abandoned']} abandonadas")
+    return len(pendientes)
+
+
 # ============================================================================
 #  PROCESAMIENTO DE TAREAS PROGRAMADAS - ACTUALIZADO
 # ============================================================================
@@ -588,10 +621,18 @@ async def run_task_inteligente(task):
         )
 
         print(f" Scraping completed: {len(metadata)} metadata enriquecidos")
+        bytes_previstos = sum(m.get("BYTES_PREVISTOS") or 0 for m in metadata)
+        sin_tamano = sum(
+            1 for m in metadata if m.get("URL") and m.get("BYTES_PREVISTOS") is None
+        )
+        print(
+            f" Descarga prevista: {bytes_previstos / 1024**3:.2f} GB"
+            f" (+{sin_tamano} imágenes sin tamaño conocido)"
+        )
 
         #  DESCARGAR Y PROCESAR IMÁGENES
         print(" Running download + DB workflow...")
-        processor = HybridOptimizedProcessor(database_path=DATABASE_PATH, batch_size=75)
+        processor = HybridOptimizedProcessor(database_path=DATABASE_PATH, batch_size=1000)
         processor.process_complete_workflow(metadata)
 
         #   ÉXITO - LIMPIAR REGISTROS DE CONTROL
@@ -648,6 +689,17 @@ async def main_inteligente(json_filename):
         intento = retry_info.get("intento", 0)
         print(f" Reintento {intento}/{MAX_RETRIES}")
 
+    #  PRIMERO LAS URLS FALLIDAS QUE YA TOCA REINTENTAR
+    try:
+        procesar_cola_reintentos()
+    except Exception as e:
+        log_custom(
+            section="Cola Reintentos",
+            message=f"Error en la pasada de reintentos: {str(e)}",
+            level="ERROR",
+            file=LOG_FILE,
+        )
+
     try:
         # Leer file de tasks o metadata
         if not os.path.exists(json_filename):
@@ -701,11 +753,10 @@ async def main_inteligente(json_filename):
 
                 print(f" Procesando {len(metadata_nuevos)} metadata nuevos")
 
-                # Procesar metadata directamente
-                download_imagees_aria2c_optimized(metadata_nuevos, conexiones=32)
-
+                # Descarga, verificación y escritura en BD las hace el workflow
+                # (con WORKFLOW_PIPELINE, solapadas por tandas)
                 processor = HybridOptimizedProcessor(
-                    database_path=DATABASE_PATH, batch_size=75
+                    database_path=DATABASE_PATH, batch_size=1000
                 )
                 processor.process_complete_workflow(metadata_nuevos)
 
@@ -753,9 +804,15 @@ def main():
         # Procesar argumentos
         if len(sys.argv) < 2:
             print(" Uso: python run_batch_processor.py <file_json>")
+            print("      python run_batch_processor.py --reintentos")
             print(" Ejemplo: python run_batch_processor.py tasks.json")
             sys.exit(1)
 
+        #  SOLO LA COLA DE REINTENTOS (sin consultar la API)
+        if sys.argv[1] == "--reintentos":
+            procesar_cola_reintentos()
+            return
+
         json_file = sys.argv[1]
 
         #  EJECUTAR CON ASYNCIO
@@ -774,8 +831,11 @@ def main():
         #  FALLO: Gestionar limpieza y retry
         print(f" Error during ejecución: {str(e)}")
 
-        # Limpiar solo elementos de esta ejecución
-        limpiar_solo_execution_actual()
+        # Conservar lo completado (o, si se pide, limpiar toda la ejecución)
+        if ISS_ROLLBACK_ON_FAILURE:
+            limpiar_solo_execution_actual()
+        else:
+            conservar_execution_actual()
 
         # Borrar task actual
         borrar_task_actual()
@@ -805,7 +865,7 @@ if __name__ == "__main__":
         print(" PROCESADOR INTELIGENTE CON AUTO-RETRY")
         print(" Características:")
         print("   • Procesa solo imágenes NUEVAS (no en BD)")
-        print("   • Auto-limpieza si failure")
+        print("   • Cola de reintentos por URL (conserva lo completado)")
         print("   • Reintentos automáticos incrementales")
         print("   • Gestión automática de tasks Windows")
         print("")
@@ -0,0 +1,163 @@
+# ==========================================
+# STAGING EN DISCO LOCAL + MOVER AL NAS
+# ==========================================
+"""
+Descarga en disco local (SSD) y traslado en paralelo al NAS.
+
+Con DOWNLOAD_STAGING_DIR configurado las descargas escriben en el disco
+local, así la latencia de escritura del NAS no frena el HTTP y en el NAS
+nunca quedan archivos a medias. Los archivos terminados pasan al NAS en
+hilos aparte mientras siguen las demás descargas:
+
+- Mismo sistema de archivos: un solo rename atómico
+- Otro sistema de archivos (NAS): copia a ``<nombre>.part`` en la carpeta
+  final y rename atómico a ``<nombre>``
+
+El espacio ocupado en staging está acotado por DOWNLOAD_STAGING_MAX_GB:
+antes de cada tanda de descargas se espera a que el mover libere sitio.
+"""
+
+import errno
+import os
+import shutil
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+#  IMPORTAR LOG_CUSTOM
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
+from log import log_custom
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "../.."))
+LOG_FILE = os.path.join(PROJECT_ROOT, "logs", "iss", "general.log")
+
+# Copias simultáneas hacia el NAS
+STAGING_MOVER_WORKERS = 4
+
+
+def mover_atomico(origen, destino):
+    """
+    MOVER UN ARCHIVO SIN DEJAR NUNCA UN ``destino`` A MEDIAS
+
+    Args:
+        origen (str): Archivo terminado en staging.
+        destino (str): Ruta final (la carpeta debe existir).
+
+    Raises:
+        OSError: Si la copia o el rename fallan; ``origen`` se conserva.
+    """
+    try:
+        os.replace(origen, destino)
+        return
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    # Otro sistema de archivos: copia a nombre temporal junto al destino
+    temporal = destino + ".part"
+    try:
+        shutil.copyfile(origen, temporal)
+        os.replace(temporal, destino)
+    except OSError:
+        if os.path.exists(temporal):
+            os.remove(temporal)
+        raise
+    os.remove(origen)
+
+
+class StagingMover:
+    """
+    Traslada archivos de staging al destino final en un pool de hilos.
+
+    Lleva la cuenta de los bytes en staging pendientes de mover, para que
+    el que descarga espere (wait_for_room) antes de pasarse del límite.
+
+    Args:
+        max_bytes (int): Bytes en staging a partir de los que se espera.
+        workers (int): Traslados simultáneos.
+    """
+
+    def __init__(self, max_bytes, workers=STAGING_MOVER_WORKERS):
+        self.max_bytes = max_bytes
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="staging-mover"
+        )
+        self._cond = threading.Condition()
+        self._staged = 0
+        self._folders = set()
+        self._folders_lock = threading.Lock()
+
+    @property
+    def staged_bytes(self):
+        with self._cond:
+            return self._staged
+
+    def submit(self, origen, destino, size):
+        """
+        Encolar el traslado de un archivo terminado.
+
+        Returns:
+            concurrent.futures.Future: True si llegó al destino, False si no.
+        """
+        with self._cond:
+            self._staged += size
+        return self._executor.submit(self._mover, origen, destino, size)
+
+    def _crear_folder(self, folder):
+        # Un solo mkdir por carpeta del NAS en toda la ejecución
+        with self._folders_lock:
+            if folder in self._folders:
+                return
+        os.makedirs(folder, exist_ok=True)
+        with self._folders_lock:
+            self._folders.add(folder)
+
+    def _mover(self, origen, destino, size):
+        try:
+            self._crear_folder(os.path.dirname(destino))
+            mover_atomico(origen, destino)
+            return True
+        except OSError as e:
+            log_custom(
+                section="Staging",
+                message=f"Error moviendo {origen} -> {destino}: {e}",
+                level="ERROR",
+                file=LOG_FILE,
+            )
+            return False
+        finally:
+            with self._cond:
+                self._staged -= size
+                self._cond.notify_all()
+
+    def wait_for_room(self, needed):
+        """Esperar a que quepan ``needed`` bytes más (o a que staging se vacíe)."""
+        with self._cond:
+            self._cond.wait_for(
+                lambda: self._staged == 0 or self._staged + needed <= self.max_bytes
+            )
+
+    def close(self):
+        """Esperar a que terminen todos los traslados encolados."""
+        self._executor.shutdown(wait=True)
+
+
+class ProgresoEscalado:
+    """
+    stdout que reescala las líneas ``PROGRESS: n`` de una tanda al tramo
+    [inicio, inicio + fraccion * 100] del progreso total; el resto pasa igual.
+    """
+
+    def __init__(self, stream, inicio, fraccion):
+        self.stream = stream
+        self.inicio = inicio
+        self.fraccion = fraccion
+
+    def write(self, text):
+        if text.startswith("PROGRESS:"):
+            valor = int(text[len("PROGRESS:") :].strip() or 0)
+            text = f"PROGRESS: {int(self.inicio + valor * self.fraccion)}"
+        return self.stream.write(text)
+
+    def flush(self):
+        self.stream.flush()
@@ -7,13 +7,18 @@ import os
 import sys
 import json
 import requests
-import sqlite3
 from typing import List, Dict, Optional
 
 # Importar logging
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils")))
 from log import log_custom
 
+# Engine e índice de NASA_IDs compartidos de la BD (una carga por proceso;
+# con DB_SHARD_DIR, uno por shard)
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+from db.Engine import sqlite_url
+from db.Shards import get_nasa_id_index
+
 # Cargar configuración desde el módulo helper
 from config import PROJECT_ROOT, ENV_FILE, load_env_config
 
@@ -172,23 +177,16 @@ class TaskAPIClient:
             return set()
 
         try:
-            with sqlite3.connect(DATABASE_PATH) as conn:
-                cursor = conn.cursor()
-
-                #  USAR TABLA Image CON nasa_id (minúscula)
-                placeholders = ",".join("?" * len(nasa_ids))
-                query = f"SELECT nasa_id FROM Image WHERE nasa_id IN ({placeholders})"
-                cursor.execute(query, nasa_ids)
-                existentes = {row[0] for row in cursor.fetchall()}
+            existentes = get_nasa_id_index(sqlite_url(DATABASE_PATH)).existing(nasa_ids)
 
-                log_custom(
-                    section="Task API Client",
-                    message=f"Verificación BD (Image): {len(existentes)} ya existen de {len(nasa_ids)} consultados",
-                    level="INFO",
-                    file=LOG_FILE,
-                )
+            log_custom(
+                section="Task API Client",
+                message=f"Verificación BD (Image): {len(existentes)} ya existen de {len(nasa_ids)} consultados",
+                level="INFO",
+                file=LOG_FILE,
+            )
 
-                return existentes
+            return existentes
 
         except Exception as e:
             log_custom(
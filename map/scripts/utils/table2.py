@@ -18,10 +18,12 @@ import subprocess
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
 from routes import DB_URL
-from db.Crud import MetadataCRUD
+from db.Crud import SEARCH_FIELDS
+from db.Shards import get_metadata_crud
 from log import log_custom
 
-crud = MetadataCRUD(db_url=DB_URL)
+# Con DB_SHARD_DIR la tabla lee (y borra) en todos los shards
+crud = get_metadata_crud(db_url=DB_URL)
 LOG_PATH = os.path.join(os.path.dirname(__file__), "..", "..", "logs", "table.log")
 
 
@@ -39,6 +41,29 @@ def abrir_con_editor_texto(path):
     )
 
 
+def escribir_csv_streaming(file_path, headers, rows):
+    """
+    Escribe rows en CSV a medida que llegan, sin materializarlas en memoria.
+
+    Args:
+        file_path (str): Ruta del CSV de salida.
+        headers (list[str]): Cabecera.
+        rows (Iterable[tuple]): Filas (p. ej. crud.iter_metadata()).
+
+    Returns:
+        int: Número de rows escritas.
+    """
+    total = 0
+    with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
+        writer = csv.writer(csvfile)
+        writer.writerow(headers)
+        for row in rows:
+            # csv escribe None como cadena vacía
+            writer.writerow(row)
+            total += 1
+    return total
+
+
 class ConfirmationDialog(ModalScreen[bool]):
     """Modal dialog to confirm destructive actions."""
 
@@ -145,7 +170,7 @@ class DataTableApp(App):
         Binding("p", "previous_page", "Previous page", show=True),
         Binding("q", "quit", "Exit", show=True),
         Binding("f", "toggle_source", "Switch source", show=True),
-        # Binding("s", "buscar", "Search", show=True),
+        Binding("s", "buscar", "Search", show=True),
         Binding("x", "export_csv", "Export CSV", show=True),
     ]
 
@@ -155,6 +180,8 @@ class DataTableApp(App):
         self.data = data
         self.offset = 0
         self.limit = 100
+        # Cursores keyset de ISS: última clave de cada página anterior
+        self.page_keys = [None]
         self.fuente = "ISS"  #  Fuente inicial
 
     def compose(self) -> ComposeResult:
@@ -423,13 +450,15 @@ class DataTableApp(App):
     def action_export_csv(self) -> None:
         """Exporta los datos a un file CSV con diálogo para elegir ubicación."""
         try:
-            # Obtener todos los datos de la base de datos (no solo la página actual)
+            # Comprobar que hay datos antes de abrir el diálogo
             if self.fuente == "ISS":
-                all_data = crud.get_all_metadata()
+                has_data = bool(crud.get_metadata_page(limit=1))
+                all_data = None
             elif self.fuente == "NOAA":
                 all_data = self.cargar_noaa_desde_json()
+                has_data = bool(all_data)
 
-            if not all_data:
+            if not has_data:
                 if self.fuente == "NOAA":
                     self.notify(
                         "No hay datos de NOAA para exportar. El file JSON está vacío o no contiene datos válidos.",
@@ -466,36 +495,20 @@ class DataTableApp(App):
                 self.notify("No se especificó una path de file.", severity="error")
                 return
 
-            # Preparar los datos para exportar
-            rows = []
-            for row in all_data:
-                # Convertir todos los valores a string y manejar None
-                row_str = []
-                for cell in row:
-                    if cell is None:
-                        row_str.append("")
-                    elif isinstance(cell, (int, float)):
-                        row_str.append(str(cell))
-                    else:
-                        row_str.append(str(cell))
-                rows.append(row_str)
-
-            # Escribir el file CSV
-            with open(file_path, "w", newline="", encoding="utf-8") as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(self.headers)
-                writer.writerows(rows)
+            # ISS se lee en streaming desde la BD (todo el catálogo, memoria constante)
+            rows = crud.iter_metadata() if self.fuente == "ISS" else all_data
+            total = escribir_csv_streaming(file_path, self.headers, rows)
 
             self.notify(
                 f"Datos exportados exitosamente a:\n{file_path}\n\n"
-                f"Total de registros: {len(all_data)}",
+                f"Total de registros: {total}",
                 severity="success",
             )
 
             # Log del evento
             log_custom(
                 "EXPORT_CSV",
-                f"Exportados {len(all_data)} registros a {file_path}",
+                f"Exportados {total} registros a {file_path}",
                 "INFO",
                 LOG_PATH,
             )
@@ -627,8 +640,8 @@ class DataTableApp(App):
             table.clear()
 
             # Obtener los datos actualizados
-            self.data = crud.get_paginated_metadata(
-                offset=self.offset, limit=self.limit
+            self.data = crud.get_metadata_page(
+                after=self.page_keys[-1], limit=self.limit
             )
 
             if not self.data:
@@ -659,12 +672,22 @@ class DataTableApp(App):
             self.notify(f"Error al refrescar la table: {e}", severity="error")
 
     def action_next_page(self) -> None:
-        new_data = crud.get_paginated_metadata(
-            offset=self.offset + self.limit, limit=self.limit
-        )
+        if self.fuente == "ISS":
+            if not self.data:
+                self.notify("No hay más datos para mostrar.", severity="info")
+                return
+
+            # Seek desde la última row visible: coste constante en cualquier página
+            next_key = crud.page_key(self.data[-1])
+            new_data = crud.get_metadata_page(after=next_key, limit=self.limit)
 
-        if not new_data:
-            self.notify("No hay más datos para mostrar.", severity="info")
+            if not new_data:
+                self.notify("No hay más datos para mostrar.", severity="info")
+                return
+
+            self.page_keys.append(next_key)
+            self.offset += self.limit
+            self.load_page(new_data)
             return
 
         self.offset += self.limit
@@ -673,17 +696,22 @@ class DataTableApp(App):
     def action_previous_page(self) -> None:
         if self.offset >= self.limit:
             self.offset -= self.limit
+            if self.fuente == "ISS" and len(self.page_keys) > 1:
+                self.page_keys.pop()
             self.load_page()
         else:
             self.notify("Ya estás en la primera página.", severity="warning")
 
-    def load_page(self):
+    def load_page(self, data=None):
         try:
             table = self.query_one(DataTable)
             table.clear()
 
             if self.fuente == "ISS":
-                data = crud.get_paginated_metadata(offset=self.offset, limit=self.limit)
+                if data is None:
+                    data = crud.get_metadata_page(
+                        after=self.page_keys[-1], limit=self.limit
+                    )
             elif self.fuente == "NOAA":
                 data = self.cargar_noaa_desde_json()
                 if not data:
@@ -712,6 +740,8 @@ class DataTableApp(App):
                     )
                 if self.offset >= self.limit:
                     self.offset -= self.limit
+                    if self.fuente == "ISS" and len(self.page_keys) > 1:
+                        self.page_keys.pop()
                 return
 
             self.data = data  #  NECESARIO para paths completas al abrir/eliminar
@@ -783,6 +813,7 @@ class DataTableApp(App):
     def action_toggle_source(self) -> None:
         self.fuente = "NOAA" if self.fuente == "ISS" else "ISS"
         self.offset = 0
+        self.page_keys = [None]
 
         # Cambiar headers primero
         if self.fuente == "NOAA":
@@ -996,6 +1027,25 @@ class DataTableApp(App):
             self.notify(f"Columna no encontrada: {column}", severity="error")
             return
 
+        # Columnas indexadas en FTS5: buscar en toda la BD, no solo en la página
+        if self.fuente == "ISS" and column in SEARCH_FIELDS:
+            try:
+                total = crud.count_search_results(termino, column=column)
+                resultados = crud.search_metadata(
+                    termino, column=column, limit=self.limit
+                )
+                self.mostrar_results_filtrados(resultados)
+                if total > len(resultados):
+                    self.notify(
+                        f"Mostrando los {len(resultados)} mejores de {total} results.",
+                        severity="info",
+                    )
+            except Exception as e:
+                err = f"Error en la búsqueda: {e}"
+                self.notify(err, severity="error")
+                log_custom("SEARCH", err, "ERROR", LOG_PATH)
+            return
+
         filtrado = [
             row for row in self.data if termino.lower() in str(row[idx]).lower()
         ]
@@ -1041,11 +1091,11 @@ if __name__ == "__main__":
         "FORMATO",
         "CAMARA_METADATOS",
     ]
-    data = crud.get_paginated_metadata(offset=0, limit=100)
+    data = crud.get_metadata_page(limit=100)
 
     # Obtener los datos de la base de datos
     try:
-        data = crud.get_paginated_metadata(offset=0, limit=100)
+        data = crud.get_metadata_page(limit=100)
         if not data:
             raise ValueError("No hay datos en la base de datos.")
         run_datatable(headers, data)
@@ -0,0 +1,56 @@
+import datetime
+import os
+import sys
+
+import pytest
+
+MAP_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+for path in (
+    os.path.dirname(MAP_DIR),  # map.routes
+    MAP_DIR,  # db.*
+    os.path.join(MAP_DIR, "scripts", "backend"),  # format_policy, integrity, ...
+):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+from db.Crud import MetadataCRUD  # noqa: E402
+from db.Engine import sqlite_url  # noqa: E402
+
+
+@pytest.fixture
+def db_url(tmp_path):
+    """URL of a fresh SQLite database in the test's temp directory."""
+    return sqlite_url(str(tmp_path / "metadata.db"))
+
+
+@pytest.fixture
+def crud(db_url):
+    crud = MetadataCRUD(db_url)
+    yield crud
+    crud.close_session()
+
+
+@pytest.fixture
+def make_record(tmp_path):
+    """Factory of prepared records as bulk_insert_metadata() receives them."""
+
+    def make(nasa_id, date=datetime.date(2024, 3, 4), **fields):
+        record = {
+            "nasa_id": nasa_id,
+            "date": date,
+            "time": datetime.time(10, 0, 0),
+            "resolution": "4000 x 3000",
+            "path": str(tmp_path / f"{nasa_id}.jpg"),
+            "file_size": 1000,
+            "features": "Panama City",
+            "center_lat": 9.0,
+            "center_lon": -79.5,
+            "nadir_lat": 9.0,
+            "nadir_lon": -79.5,
+            "camera": "NIKON D5",
+            "format": "JPG",
+        }
+        record.update(fields)
+        return record
+
+    return make
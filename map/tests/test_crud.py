@@ -0,0 +1,133 @@
+import datetime
+
+from sqlalchemy import text
+
+NASA_ID = 2
+PATH = 1
+
+
+def test_bulk_insert_skips_existing_and_repeated_nasa_ids(crud, make_record):
+    first = [make_record("ISS071-E-1"), make_record("ISS071-E-2")]
+    assert crud.bulk_insert_metadata(first) == (2, 0)
+
+    written, skipped = crud.bulk_insert_metadata(
+        [make_record("ISS071-E-2"), make_record("ISS071-E-3"), make_record("ISS071-E-3")]
+    )
+
+    assert (written, skipped) == (1, 2)
+    assert crud.get_existing_nasa_ids(["ISS071-E-1", "ISS071-E-3", "nope"]) == {
+        "ISS071-E-1",
+        "ISS071-E-3",
+    }
+
+
+def test_bulk_insert_fills_catalog_and_typed_columns(crud, make_record):
+    crud.bulk_insert_metadata([make_record("ISS071-E-1", resolution="6048 x 4032")])
+
+    row = crud.session.execute(
+        text("SELECT width, height, date_int, time_sec, mission, file_format FROM Image")
+    ).one()
+    assert tuple(row) == (6048, 4032, 20240304, 36000, "ISS071", "jpg")
+    assert [r[NASA_ID] for r in crud.get_all_metadata()] == ["ISS071-E-1"]
+
+
+def test_keyset_pages_cover_the_catalog_in_order(crud, make_record):
+    records = [
+        make_record(f"ISS071-E-{i}", date=datetime.date(2024, 1, 1 + i % 5))
+        for i in range(12)
+    ] + [make_record("ISS071-E-undated", date=None)]
+    crud.bulk_insert_metadata(records)
+
+    pages = [crud.get_metadata_page(limit=5)]
+    while pages[-1]:
+        pages.append(crud.get_metadata_page(after=crud.page_key(pages[-1][-1]), limit=5))
+    rows = [row for page in pages for row in page]
+
+    assert [len(page) for page in pages] == [5, 5, 3, 0]
+    assert rows == crud.get_paginated_metadata(0, 100)
+    assert rows[-1][NASA_ID] == "ISS071-E-undated"
+    assert [crud.page_key(r) for r in rows] == sorted(crud.page_key(r) for r in rows)
+
+    previous = crud.get_metadata_page(before=crud.page_key(pages[1][0]), limit=5)
+    assert previous == pages[0]
+
+
+def test_full_text_search_matches_prefixes_per_column(crud, make_record):
+    crud.bulk_insert_metadata(
+        [
+            make_record("ISS071-E-1", features="Lake Titicaca"),
+            make_record("ISS071-E-2", features="Panama Canal"),
+            make_record("ISS072-E-3", features="Ocean", camera="HASSELBLAD"),
+        ]
+    )
+
+    assert [r[NASA_ID] for r in crud.search_metadata("titi")] == ["ISS071-E-1"]
+    assert [r[NASA_ID] for r in crud.search_metadata("hassel", column="CAMARA")] == [
+        "ISS072-E-3"
+    ]
+    assert crud.search_metadata("panama", column="camera") == []
+    assert crud.count_search_results("ISS071") == 2
+
+
+def test_bbox_query_uses_the_point_inside_the_box(crud, make_record):
+    crud.bulk_insert_metadata(
+        [
+            make_record("ISS071-E-1", center_lat=9.0, center_lon=-79.5),
+            make_record("ISS071-E-2", center_lat=40.4, center_lon=-3.7),
+            make_record(
+                "ISS071-E-3",
+                date=datetime.date(2020, 1, 1),
+                center_lat=8.5,
+                center_lon=-80.0,
+            ),
+        ]
+    )
+
+    inside = crud.query_bbox(8.0, 10.0, -81.0, -79.0)
+    assert [r[NASA_ID] for r in inside] == ["ISS071-E-3", "ISS071-E-1"]
+
+    recent = crud.query_bbox(
+        8.0, 10.0, -81.0, -79.0, date_range=(datetime.date(2024, 1, 1), None)
+    )
+    assert [r[NASA_ID] for r in recent] == ["ISS071-E-1"]
+
+
+def test_storage_stats_group_recorded_sizes(crud, make_record):
+    crud.bulk_insert_metadata(
+        [
+            make_record("ISS071-E-1", file_size=100),
+            make_record("ISS071-E-2", file_size=300),
+            make_record("ISS072-E-3", path="/nas/ISS072-E-3.tif", file_size=None),
+        ]
+    )
+
+    (overall,) = crud.storage_stats()
+    assert (overall["count"], overall["total_bytes"], overall["mean_bytes"]) == (3, 400, 200)
+
+    by_format = {row["format"]: row for row in crud.storage_stats(group_by=("format",))}
+    assert by_format["jpg"]["count"] == 2
+    assert by_format["tif"]["total_bytes"] is None
+
+
+def test_delete_images_removes_rows_and_files(crud, make_record, tmp_path):
+    records = [make_record("ISS071-E-1"), make_record("ISS071-E-2")]
+    for record in records:
+        with open(record["path"], "wb") as f:
+            f.write(b"x")
+    crud.bulk_insert_metadata(records)
+
+    assert crud.delete_images(["ISS071-E-1", "nope"]) == (1, 1)
+    assert not (tmp_path / "ISS071-E-1.jpg").exists()
+    assert [r[NASA_ID] for r in crud.get_all_metadata()] == ["ISS071-E-2"]
+
+
+def test_update_paths_sets_path_and_clears_missing_flag(crud, make_record):
+    crud.bulk_insert_metadata([make_record("ISS071-E-1")])
+    crud.session.execute(text("UPDATE Image SET file_missing = 1"))
+    crud.session.commit()
+
+    assert crud.update_paths({"ISS071-E-1": "/nas/new/ISS071-E-1.tif"}) == 1
+
+    row = crud.session.execute(text("SELECT path, file_format, file_missing FROM Image")).one()
+    assert tuple(row) == ("/nas/new/ISS071-E-1.tif", "tif", None)
+    assert crud.get_all_metadata()[0][PATH] == "/nas/new/ISS071-E-1.tif"
@@ -0,0 +1,73 @@
+import pytest
+
+pytest.importorskip("requests")
+
+from format_policy import GEOTIFF_BYTES_POR_PIXEL, planificar_formatos  # noqa: E402
+
+MB = 1024**2
+# 1000 x 1000 px GeoTIFF estimate: 3 MB
+GEOTIFF_BYTES = 1000 * 1000 * GEOTIFF_BYTES_POR_PIXEL
+
+
+def _metadata(i, jpg_bytes=MB, geotiff=True, **fields):
+    metadata = {
+        "NASA_ID": f"ISS071-E-{i}",
+        "URL_JPG": f"https://example.org/{i}.JPG",
+        "URL_GEOTIFF": f"https://example.org/{i}.tif" if geotiff else None,
+        "BYTES_JPG": jpg_bytes,
+        "RESOLUCION": "1000 x 1000",
+    }
+    metadata.update(fields)
+    return metadata
+
+
+def _plan(metadata_list, **kwargs):
+    options = dict(presupuesto_gb=None, max_nubes=None, min_elevacion=None, head=False)
+    options.update(kwargs)
+    return planificar_formatos(metadata_list, **options)
+
+
+def test_without_budget_every_geotiff_is_chosen():
+    metadata_list = [_metadata(0), _metadata(1, geotiff=False)]
+
+    resumen = _plan(metadata_list)
+
+    assert (resumen["geotiff"], resumen["jpeg"]) == (1, 1)
+    assert metadata_list[0]["URL"].endswith(".tif")
+    assert metadata_list[1]["URL"].endswith(".JPG")
+    assert resumen["bytes"] == GEOTIFF_BYTES + MB
+
+
+def test_budget_upgrades_the_cheapest_images_that_fit():
+    # Image 1 has the largest JPEG, so its GeoTIFF costs the least extra
+    metadata_list = [_metadata(0), _metadata(1, jpg_bytes=2 * MB), _metadata(2)]
+    # Room for image 1's upgrade plus half a MB: not enough for another one
+    presupuesto = (4 * MB + (GEOTIFF_BYTES - 2 * MB) + MB // 2) / 1024**3
+
+    resumen = _plan(metadata_list, presupuesto_gb=presupuesto)
+
+    assert [m["URL"].endswith(".tif") for m in metadata_list] == [False, True, False]
+    assert resumen["bytes"] <= resumen["presupuesto"]
+
+
+def test_per_image_rules_keep_cloudy_and_night_images_in_jpeg():
+    metadata_list = [
+        _metadata(0, COBERTURA_NUBOSA="10", ELEVACION_SOL="30"),
+        _metadata(1, COBERTURA_NUBOSA="80", ELEVACION_SOL="30"),
+        _metadata(2, COBERTURA_NUBOSA="10", ELEVACION_SOL="-20"),
+        _metadata(3),
+    ]
+
+    _plan(metadata_list, max_nubes=25, min_elevacion=0)
+
+    assert [m["URL"].endswith(".tif") for m in metadata_list] == [True, False, False, False]
+
+
+def test_unknown_sizes_are_counted_apart_from_the_total():
+    metadata_list = [_metadata(0, geotiff=False), _metadata(1, jpg_bytes=None, geotiff=False)]
+
+    resumen = _plan(metadata_list)
+
+    assert resumen["bytes"] == MB
+    assert resumen["sin_tamano"] == 1
+    assert metadata_list[1]["BYTES_PREVISTOS"] is None
@@ -0,0 +1,61 @@
+import struct
+
+from integrity import verificar_archivo, verificar_archivos
+
+JPEG = b"\xff\xd8\xff\xe0" + b"\x00" * 100 + b"\xff\xd9"
+
+
+def _write(tmp_path, name, data):
+    path = tmp_path / name
+    path.write_bytes(data)
+    return str(path)
+
+
+def _tiff(strip_offset, strip_size, total):
+    """Little-endian TIFF with one IFD and one strip."""
+    entries = [(273, 4, 1, strip_offset), (279, 4, 1, strip_size)]
+    ifd = struct.pack("<H", len(entries))
+    for tag, kind, count, value in entries:
+        ifd += struct.pack("<HHII", tag, kind, count, value)
+    ifd += struct.pack("<I", 0)
+    data = b"II" + struct.pack("<HI", 42, 8) + ifd
+    return data + b"\x00" * (total - len(data))
+
+
+def test_valid_jpeg_passes_and_truncated_jpeg_fails(tmp_path):
+    assert verificar_archivo(_write(tmp_path, "ok.jpg", JPEG))["ok"]
+
+    informe = verificar_archivo(_write(tmp_path, "cut.jpg", JPEG[:-2]))
+    assert not informe["ok"]
+    assert "EOI" in informe["error"]
+
+
+def test_size_must_match_the_announced_size(tmp_path):
+    path = _write(tmp_path, "ok.jpg", JPEG)
+
+    assert verificar_archivo(path, esperado=len(JPEG))["ok"]
+    assert "esperado" in verificar_archivo(path, esperado=len(JPEG) + 1)["error"]
+
+
+def test_html_error_page_and_empty_file_are_rejected(tmp_path):
+    html = verificar_archivo(_write(tmp_path, "page.jpg", b"<!DOCTYPE html><html></html>"))
+    assert "HTML" in html["error"]
+    assert verificar_archivo(_write(tmp_path, "empty.jpg", b""))["error"] == "archivo vacío"
+
+
+def test_tiff_strips_must_fit_in_the_file(tmp_path):
+    assert verificar_archivo(_write(tmp_path, "ok.tif", _tiff(64, 32, 96)))["ok"]
+    assert not verificar_archivo(_write(tmp_path, "cut.tif", _tiff(64, 320, 96)))["ok"]
+
+
+def test_batch_verification_keeps_task_order(tmp_path):
+    tareas = [
+        (_write(tmp_path, f"{i}.jpg", JPEG if i % 2 else JPEG[:-2]), None)
+        for i in range(40)
+    ]
+
+    informes = verificar_archivos(tareas, calcular_sha256=True, workers=2)
+
+    assert [i["path"] for i in informes] == [path for path, _ in tareas]
+    assert [i["ok"] for i in informes] == [bool(i % 2) for i in range(40)]
+    assert all(i["sha256"] for i in informes if i["ok"])
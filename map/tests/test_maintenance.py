@@ -0,0 +1,65 @@
+from sqlalchemy import text
+
+from db import maintenance
+
+
+def _image_row(crud, nasa_id):
+    return crud.session.execute(
+        text(
+            "SELECT width, height, mission, file_size, file_missing FROM Image "
+            "WHERE nasa_id = :nasa_id"
+        ),
+        {"nasa_id": nasa_id},
+    ).one()
+
+
+def _reset_typed_columns(crud):
+    crud.session.execute(
+        text(
+            "UPDATE Image SET width = NULL, height = NULL, date_int = NULL, "
+            "time_sec = NULL, mission = NULL, file_size = NULL"
+        )
+    )
+    crud.session.commit()
+
+
+def test_backfill_fills_typed_columns_and_reads_sizes(crud, make_record, db_url):
+    record = make_record("ISS071-E-1", resolution="6048 x 4032")
+    with open(record["path"], "wb") as f:
+        f.write(b"x" * 1234)
+    crud.bulk_insert_metadata([record, make_record("ISS071-E-2")])
+    _reset_typed_columns(crud)
+
+    maintenance.backfill_typed(db_url, workers=1)
+
+    assert tuple(_image_row(crud, "ISS071-E-1")) == (6048, 4032, "ISS071", 1234, None)
+    # No file on disk: flagged so the next run does not stat it again
+    assert tuple(_image_row(crud, "ISS071-E-2"))[3:] == (None, 1)
+
+
+def test_backfill_never_overwrites_a_recorded_size(crud, make_record, db_url):
+    # File not on disk (e.g. NAS unmounted) and a resolution that never parses,
+    # so the row is picked up on every run
+    crud.bulk_insert_metadata(
+        [make_record("ISS071-E-1", resolution="unknown", file_size=12345)]
+    )
+
+    maintenance.backfill_typed(db_url, workers=1)
+    maintenance.backfill_typed(db_url, workers=1)
+
+    assert tuple(_image_row(crud, "ISS071-E-1"))[3:] == (12345, None)
+
+
+def test_backfill_skips_rows_flagged_missing(crud, make_record, db_url):
+    crud.bulk_insert_metadata([make_record("ISS071-E-1", file_size=None)])
+    maintenance.backfill_typed(db_url, workers=1)
+
+    with maintenance.get_engine(db_url).connect() as conn:
+        pending = conn.execute(maintenance._PENDING_IMAGES, {"first": 0, "last": 10}).all()
+    assert pending == []
+
+    # A new path clears the flag, so the file is looked up again
+    crud.update_paths({"ISS071-E-1": "/nas/moved/ISS071-E-1.jpg"})
+    with maintenance.get_engine(db_url).connect() as conn:
+        pending = conn.execute(maintenance._PENDING_IMAGES, {"first": 0, "last": 10}).all()
+    assert len(pending) == 1
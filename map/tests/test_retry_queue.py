@@ -0,0 +1,37 @@
+from db.RetryQueue import (
+    RETRY_BASE_SECONDS,
+    RETRY_MAX_ATTEMPTS,
+    backoff_seconds,
+    clear_retries,
+    due_retries,
+    queue_failures,
+    retry_stats,
+)
+
+
+def _metadata(i):
+    return {"NASA_ID": f"ISS071-E-{i}", "URL": f"https://example.org/ISS071-E-{i}.JPG"}
+
+
+def test_failures_are_queued_with_backoff_and_cleared(db_url):
+    assert queue_failures([(_metadata(1), "timeout"), (_metadata(2), "404")], db_url) == (2, 0)
+
+    assert due_retries(db_url=db_url) == []
+    later = due_retries(now=2**40, db_url=db_url)
+    assert sorted(m["NASA_ID"] for m in later) == ["ISS071-E-1", "ISS071-E-2"]
+
+    assert clear_retries([_metadata(1)["URL"]], db_url) == 1
+    assert retry_stats(db_url)["queued"] == 1
+
+
+def test_backoff_doubles_and_urls_are_abandoned_after_the_last_attempt(db_url):
+    assert backoff_seconds(1) == RETRY_BASE_SECONDS
+    assert backoff_seconds(2) == 2 * RETRY_BASE_SECONDS
+
+    for _ in range(RETRY_MAX_ATTEMPTS - 1):
+        assert queue_failures([(_metadata(1), "timeout")], db_url) == (1, 0)
+    assert queue_failures([(_metadata(1), "timeout")], db_url) == (0, 1)
+
+    stats = retry_stats(db_url)
+    assert (stats["queued"], stats["abandoned"]) == (0, 1)
+    assert due_retries(now=2**40, db_url=db_url) == []
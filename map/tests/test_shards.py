@@ -0,0 +1,80 @@
+import datetime
+
+import pytest
+
+from db.Shards import ShardedMetadataCRUD
+
+NASA_ID = 2
+
+
+@pytest.fixture
+def sharded(tmp_path):
+    sharded = ShardedMetadataCRUD(str(tmp_path / "shards"), "year")
+    yield sharded
+    sharded.close_session()
+
+
+def test_records_go_to_their_year_shard_without_duplicates(sharded, make_record):
+    records = [
+        make_record("ISS060-E-1", date=datetime.date(2019, 6, 1)),
+        make_record("ISS071-E-1", date=datetime.date(2024, 6, 1)),
+        make_record("ISS071-E-2", date=None),
+    ]
+    assert sharded.bulk_insert_metadata(records) == (3, 0)
+    assert sharded.shard_keys() == ["2019", "2024", "undated"]
+
+    # A changed date must not copy the record into another shard
+    moved = make_record("ISS060-E-1", date=datetime.date(2024, 1, 1))
+    assert sharded.bulk_insert_metadata([moved]) == (0, 1)
+    assert [r[NASA_ID] for r in sharded.iter_metadata()] == [
+        "ISS060-E-1",
+        "ISS071-E-1",
+        "ISS071-E-2",
+    ]
+
+
+def test_keyset_pages_merge_across_shards(sharded, make_record):
+    sharded.bulk_insert_metadata(
+        [
+            make_record(f"ISS0{60 + y}-E-{i}", date=datetime.date(2019 + y, 1, 1 + i))
+            for y in range(3)
+            for i in range(3)
+        ]
+    )
+
+    first = sharded.get_metadata_page(limit=4)
+    second = sharded.get_metadata_page(after=sharded.page_key(first[-1]), limit=4)
+
+    assert [r[NASA_ID] for r in first + second] == [
+        r[NASA_ID] for r in sharded.get_all_metadata()[:8]
+    ]
+
+
+def test_lookups_and_path_updates_reach_the_owning_shard(sharded, make_record):
+    sharded.bulk_insert_metadata(
+        [
+            make_record("ISS060-E-1", date=datetime.date(2019, 6, 1), camera="NIKON D4"),
+            make_record("ISS071-E-1", date=datetime.date(2024, 6, 1), camera="NIKON D5"),
+        ]
+    )
+
+    image_id = sharded.get_image_id_by_nasa_id("ISS071-E-1")
+    assert sharded.get_camera_name(image_id) == "NIKON D5"
+    assert sharded.get_image_id_by_nasa_id("nope") is None
+
+    sharded.update_image_path("ISS071-E-1", "/nas/ISS071-E-1.tif")
+    assert sharded.shard("2024").get_all_metadata()[0][1] == "/nas/ISS071-E-1.tif"
+    assert sharded.rebuild_catalog() == 2
+
+
+def test_storage_stats_without_shards_reports_zero_totals(sharded):
+    assert sharded.storage_stats() == [
+        {
+            "count": 0,
+            "total_bytes": None,
+            "min_bytes": None,
+            "max_bytes": None,
+            "mean_bytes": None,
+        }
+    ]
+    assert sharded.storage_stats(group_by=("format",)) == []